@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+class CommonConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'common'
+
+    def ready(self):
+        # Import to install the slow-query logger on new connections
+        import common.slow_queries  # noqa
+        # Import to register the system checks
+        import common.checks  # noqa
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .db_routers import replicas_enabled
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Replicas are ignored unless the read-your-writes pins can be shared between workers."""
+    if settings.DATABASE_REPLICAS and not replicas_enabled():
+        return [Warning(
+            'DATABASE_REPLICAS are configured but the default cache is local to each process.',
+            hint=(
+                'Set CACHE_BACKEND to a shared backend (e.g. Redis or Memcached) so a user who '
+                'just wrote is pinned to the primary on every worker; until then all reads go '
+                'to the primary.'
+            ),
+            id='common.W001',
+        )]
+    return []
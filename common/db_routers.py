@@ -0,0 +1,147 @@
+"""
+Database routing for read replicas.
+
+Reads are sent to a replica only while a view has explicitly opted in via
+``use_read_alias`` (see ``common.mixins.ReplicaReadMixin``); everything else,
+including all writes, goes to ``default``. Users who just wrote are pinned to
+the primary through the default cache, so replicas are only used when that
+cache is shared by every worker.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    """Route reads to the alias chosen for the current request, writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+def get_read_alias():
+    return _read_alias.get()
+
+
+def set_read_alias(alias):
+    """Send reads to ``alias`` until the returned token is passed to ``reset_read_alias``."""
+    return _read_alias.set(alias)
+
+
+def reset_read_alias(token):
+    _read_alias.reset(token)
+
+
+@contextmanager
+def use_read_alias(alias):
+    token = set_read_alias(alias)
+    try:
+        yield
+    finally:
+        reset_read_alias(token)
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Read from the primary for a while so the user sees their own writes."""
+    cache.set(_pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def replicas_enabled():
+    """
+    Whether reads may go to replicas: only when some are configured and the
+    pins above are stored in a cache every worker shares.
+    """
+    return bool(settings.DATABASE_REPLICAS) and not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+class ReplicaHealth:
+    """
+    Tracks which replicas are usable. Each replica is probed at most once per
+    ``REPLICA_HEALTH_CHECK_INTERVAL``; one that is unreachable or lagging more
+    than ``REPLICA_MAX_LAG_SECONDS`` is ejected for ``REPLICA_EJECT_SECONDS``.
+    """
+
+    LAG_QUERY = (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ejected_until = {}
+        self._checked_at = {}
+
+    def healthy_replicas(self):
+        now = time.monotonic()
+        healthy = []
+        for alias in settings.DATABASE_REPLICAS:
+            if self._ejected_until.get(alias, 0) > now:
+                continue
+            with self._lock:
+                due = now - self._checked_at.get(alias, -float('inf')) >= settings.REPLICA_HEALTH_CHECK_INTERVAL
+                if due:
+                    self._checked_at[alias] = now
+            if due and not self.check(alias):
+                continue
+            healthy.append(alias)
+        return healthy
+
+    def check(self, alias):
+        try:
+            connection = connections[alias]
+            connection.ensure_connection()
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(self.LAG_QUERY)
+                    lag = cursor.fetchone()[0]
+                if lag > settings.REPLICA_MAX_LAG_SECONDS:
+                    self.eject(alias, f"replication lag {lag:.1f}s")
+                    return False
+        except DatabaseError as e:
+            self.eject(alias, str(e))
+            return False
+        return True
+
+    def eject(self, alias, reason):
+        logger.warning("Ejecting replica %s for %ss: %s", alias, settings.REPLICA_EJECT_SECONDS, reason)
+        with self._lock:
+            self._ejected_until[alias] = time.monotonic() + settings.REPLICA_EJECT_SECONDS
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica():
+    """Pick a healthy replica at random, or None to read from the primary."""
+    if not replicas_enabled():
+        return None
+    healthy = replica_health.healthy_replicas()
+    return random.choice(healthy) if healthy else None
@@ -0,0 +1,238 @@
+"""
+Per-route query deadlines and load shedding.
+
+Every read (GET, HEAD, OPTIONS) gets a budget of SQL time:
+``EXPENSIVE_ROUTE_DEADLINE_MS`` on the routes in ``EXPENSIVE_ROUTES``,
+``REQUEST_DEADLINE_MS`` elsewhere (0 disables it). An ``execute_wrapper``
+refuses statements once the budget is spent, and the first statement on each
+connection bounds the database side too: PostgreSQL gets a
+``statement_timeout`` of what is left of the budget, SQLite a
+``progress_handler`` that interrupts the statement at the deadline. A read
+that runs out of time ends with ``DeadlineExceeded``, a 503 with
+``Retry-After``. Streamed bodies keep the budget until they are closed.
+Writes are not budgeted: requests are not atomic, so cutting one short
+would keep the statements it already committed and invite a duplicate
+retry.
+
+Expensive routes also admit at most ``EXPENSIVE_ROUTE_MAX_IN_FLIGHT``
+requests at a time per process, including while their body streams; the
+excess is answered with a 503 before it reaches the view or the database.
+Batch sub-requests are held to the budget and the limit of their own route.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Virtual machine instructions between two deadline checks on SQLite
+SQLITE_PROGRESS_INTERVAL = 1000
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+
+class DeadlineExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The request took too long. Please retry shortly.'
+    default_code = 'deadline_exceeded'
+
+    def __init__(self, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = settings.LOAD_SHED_RETRY_AFTER_SECONDS
+
+
+class Overloaded(DeadlineExceeded):
+    default_detail = 'Too many requests to this endpoint are in progress. Please retry shortly.'
+    default_code = 'overloaded'
+
+
+def shed_response(exc):
+    """The 503 a DRF view would render for ``exc``, for requests that never reach one."""
+    response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+    response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+def resolve_route(request):
+    """Resolve ``request`` ahead of the handler; returns its view name, or None for a 404."""
+    try:
+        request.resolver_match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    return request.resolver_match.view_name
+
+
+def route_budget(route, method):
+    """``(deadline in ms, in-flight limit)`` of a ``method`` request to ``route``; 0 or None when it has none."""
+    if route in settings.EXPENSIVE_ROUTES:
+        deadline_ms, limit = settings.EXPENSIVE_ROUTE_DEADLINE_MS, settings.EXPENSIVE_ROUTE_MAX_IN_FLIGHT
+    else:
+        deadline_ms, limit = settings.REQUEST_DEADLINE_MS, None
+    if method not in SAFE_METHODS:
+        deadline_ms = 0
+    return deadline_ms, limit
+
+
+@contextmanager
+def enforce(deadline):
+    """Hold the statements run in the block to ``deadline``, if there is one."""
+    with ExitStack() as stack:
+        if deadline is not None:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(deadline))
+        yield
+
+
+class GuardedStream:
+    """
+    Streaming body that runs each step under its request's deadline and calls
+    ``finish`` once, when the response is closed.
+    """
+
+    def __init__(self, content, deadline, finish):
+        self.content = iter(content)
+        self.deadline = deadline
+        self.finish = finish
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with enforce(self.deadline):
+            return next(self.content)
+
+    def close(self):
+        if not self.finished:
+            self.finished = True
+            self.finish()
+
+
+class InFlightLimiter:
+    """Counts the requests in progress per route in this process."""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, route, limit):
+        with self.lock:
+            count = self.in_flight.get(route, 0)
+            if count >= limit:
+                return False
+            self.in_flight[route] = count + 1
+            return True
+
+    def release(self, route):
+        with self.lock:
+            self.in_flight[route] -= 1
+
+
+limiter = InFlightLimiter()
+
+
+@contextmanager
+def budgeted(route, method):
+    """
+    Run the block under the budget of a ``method`` request to ``route``,
+    holding one of its in-flight slots; raises ``Overloaded`` when none is free.
+    """
+    deadline_ms, limit = route_budget(route, method)
+    if limit and not limiter.acquire(route, limit):
+        registry.inc('requests_shed_total', (('route', route), ('reason', 'overloaded')))
+        raise Overloaded()
+    deadline = Deadline(deadline_ms, route) if deadline_ms else None
+    try:
+        with enforce(deadline):
+            yield
+    finally:
+        if deadline is not None:
+            deadline.disarm()
+        if limit:
+            limiter.release(route)
+
+
+class Deadline:
+    """``execute_wrapper`` enforcing a request's SQL time budget on the connections it uses."""
+
+    def __init__(self, milliseconds, route):
+        self.expires = time.monotonic() + milliseconds / 1000
+        self.route = route
+        self.armed = []
+        self.exceeded = False
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if self.remaining() <= 0:
+            raise self.exceed()
+        if connection not in self.armed:
+            self.arm(connection, context['cursor'])
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if self.is_timeout(connection, exc):
+                raise self.exceed() from exc
+            raise
+
+    def exceed(self):
+        if not self.exceeded:
+            self.exceeded = True
+            registry.inc('requests_shed_total', (('route', self.route or 'unresolved'), ('reason', 'deadline')))
+            logger.warning("Request to %s ran out of its query time budget", self.route)
+        return DeadlineExceeded()
+
+    def arm(self, connection, cursor):
+        self.armed.append(connection)
+        if connection.vendor == 'postgresql':
+            # On the raw cursor, so the wrappers don't see it; reset by disarm()
+            cursor.cursor.execute(
+                "SELECT set_config('statement_timeout', %s, false)",
+                [str(max(int(self.remaining() * 1000), 1))]
+            )
+        elif connection.vendor == 'sqlite':
+            connection.connection.set_progress_handler(self.interrupt, SQLITE_PROGRESS_INTERVAL)
+
+    def interrupt(self):
+        # Non-zero aborts the statement with "interrupted"
+        return int(self.remaining() <= 0)
+
+    @staticmethod
+    def is_timeout(connection, exc):
+        if connection.vendor == 'postgresql':
+            cause = exc.__cause__
+            return (getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)) == QUERY_CANCELED
+        if connection.vendor == 'sqlite':
+            return str(exc) == 'interrupted'
+        return False
+
+    def disarm(self):
+        """Lift the budget from the connections it was set on, which outlive the request."""
+        for connection in self.armed:
+            if connection.connection is None:
+                continue
+            try:
+                with connection.wrap_database_errors:
+                    if connection.vendor == 'postgresql':
+                        with connection.connection.cursor() as cursor:
+                            cursor.execute('RESET statement_timeout')
+                    elif connection.vendor == 'sqlite':
+                        connection.connection.set_progress_handler(None, 0)
+            except DatabaseError:
+                # Don't hand a connection with a stale timeout to the next request
+                logger.warning("Could not reset the statement timeout on %s", connection.alias, exc_info=True)
+                connection.close()
+        self.armed = []
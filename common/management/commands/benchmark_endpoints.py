@@ -0,0 +1,256 @@
+import gc
+import io
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from common.middleware import QueryCounter
+
+# Seeded datasets: the benchmarked user always owns the same amount of data,
+# only the size of the tables around it grows.
+DATASETS = {
+    'small': {'users': 20, 'vehicles_per_user': 3, 'records_per_vehicle': 40},
+    'medium': {'users': 200, 'vehicles_per_user': 3, 'records_per_vehicle': 40},
+    'large': {'users': 2000, 'vehicles_per_user': 3, 'records_per_vehicle': 40},
+}
+
+ENDPOINTS = [
+    ('vehicle-list', '/api/vehicles/'),
+    ('record-list', '/api/maintenance/records/'),
+    ('record-upcoming', '/api/maintenance/records/upcoming/'),
+    ('reminder-upcoming', '/api/maintenance/reminders/upcoming/'),
+    ('sync-full', '/api/sync/'),
+]
+
+SEED = 42
+# Latency changes below this many milliseconds are always treated as noise
+MIN_LATENCY_DELTA_MS = 1.0
+# Latency changes below this many times the measured p50-p95 spread are treated as noise
+NOISE_SPREADS = 2
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark API endpoints against seeded datasets in throwaway test databases '
+        'and compare query counts and peak memory (and, as warnings, p50/p95 latency) '
+        'with the committed baselines'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--datasets',
+            default='small,medium',
+            help=f"Comma-separated datasets to run ({', '.join(DATASETS)})"
+        )
+        parser.add_argument('--endpoints', default='', help='Comma-separated endpoint names (default: all)')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--threshold', type=float, default=None, help='Overrides BENCHMARK_REGRESSION_THRESHOLD')
+        parser.add_argument('--baseline-dir', default=None, help='Overrides BENCHMARK_BASELINE_DIR')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baselines')
+        parser.add_argument(
+            '--gate-latency',
+            action='store_true',
+            help='Fail on latency regressions too; only meaningful on the machine that recorded the baselines'
+        )
+
+    def handle(self, *args, **options):
+        datasets = [name.strip() for name in options['datasets'].split(',') if name.strip()]
+        unknown = set(datasets) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown dataset(s): {', '.join(sorted(unknown))}")
+        endpoints = ENDPOINTS
+        if options['endpoints']:
+            wanted = set(options['endpoints'].split(','))
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in wanted]
+            if not endpoints:
+                raise CommandError('No known endpoints selected')
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = settings.BENCHMARK_REGRESSION_THRESHOLD
+        baseline_dir = Path(options['baseline_dir'] or settings.BENCHMARK_BASELINE_DIR)
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        # Measure the endpoints' own queries, not hits on the upcoming cache
+        cache_off = override_settings(UPCOMING_CACHE_ENABLED=False)
+        cache_off.enable()
+        try:
+            regressions = []
+            for dataset in datasets:
+                results = self.run_dataset(dataset, endpoints, options['iterations'], options['warmup'])
+                baseline_path = baseline_dir / f"{dataset}.json"
+                if options['update_baseline']:
+                    self.write_baseline(baseline_path, results)
+                    continue
+                regressions += self.compare(dataset, baseline_path, results, threshold, options['gate_latency'])
+        finally:
+            cache_off.disable()
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) over the {threshold:.0%} threshold:\n  "
+                + '\n  '.join(regressions)
+            )
+        if not options['update_baseline']:
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def run_dataset(self, dataset, endpoints, iterations, warmup):
+        for alias in connections:
+            if not settings.DATABASES[alias].get('TEST', {}).get('MIRROR'):
+                call_command('flush', database=alias, interactive=False, verbosity=0)
+        cache.clear()
+        self.stdout.write(f"Seeding '{dataset}' dataset...")
+        call_command('seed_fleet', seed=SEED, prefix='bench', stdout=io.StringIO(), **DATASETS[dataset])
+
+        from users.models import User
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email='bench-0@example.com'))
+
+        results = {}
+        self.stdout.write(f"{'endpoint':<20} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>9}")
+        for name, url in endpoints:
+            for _ in range(warmup):
+                self.get(client, url)
+
+            timings = []
+            queries = QueryCounter()
+            # Collector pauses land on random requests and dominate p95
+            gc.collect()
+            gc.disable()
+            try:
+                self.time_requests(client, url, iterations, queries, timings)
+            finally:
+                gc.enable()
+
+            # Allocation tracing slows everything down, so measure it
+            # separately; the smallest of a few peaks filters out GC noise.
+            peaks = []
+            for _ in range(3):
+                tracemalloc.start()
+                self.get(client, url)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            peak = min(peaks)
+
+            results[name] = {
+                'p50_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'queries': queries.count,
+                'peak_kib': round(peak / 1024, 1),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<20} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['queries']:>8} {row['peak_kib']:>9.1f}"
+            )
+        return results
+
+    def time_requests(self, client, url, iterations, queries, timings):
+        for iteration in range(iterations):
+            # Queries are counted on the first request; the rest use a
+            # throwaway counter so every request pays the same overhead.
+            counter = QueryCounter() if iteration else queries
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(counter))
+                start = time.perf_counter()
+                self.get(client, url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+        return response
+
+    def environment(self):
+        return {
+            'python': platform.python_version(),
+            'database': connections['default'].vendor,
+            'machine': platform.machine(),
+        }
+
+    def write_baseline(self, path, results):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {'environment': self.environment(), 'datasets': DATASETS[path.stem], 'endpoints': results}
+        path.write_text(json.dumps(payload, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote baseline {path}"))
+
+    def compare(self, dataset, path, results, threshold, gate_latency=False):
+        if not path.exists():
+            self.stdout.write(self.style.WARNING(f"No baseline for '{dataset}' at {path}; skipping comparison"))
+            return []
+        baseline = json.loads(path.read_text())
+        if baseline.get('datasets') != DATASETS[dataset]:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline for '{dataset}' was recorded with a different dataset definition"
+            ))
+        if baseline.get('environment', {}).get('database') != connections['default'].vendor:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline for '{dataset}' was recorded on {baseline['environment'].get('database')}"
+            ))
+
+        regressions = []
+        for name, current in results.items():
+            expected = baseline['endpoints'].get(name)
+            if expected is None:
+                self.stdout.write(self.style.WARNING(f"No baseline for '{name}' in '{dataset}'"))
+                continue
+            # Query counts and allocations don't depend on the machine's load,
+            # so they gate; latency does, so by default it only warns.
+            if current['queries'] > expected['queries']:
+                regressions.append(
+                    f"{dataset}/{name}: queries {expected['queries']} -> {current['queries']}"
+                )
+            if current['peak_kib'] > expected['peak_kib'] * (1 + threshold):
+                regressions.append(
+                    f"{dataset}/{name}: peak_kib {expected['peak_kib']:.1f} -> {current['peak_kib']:.1f}"
+                )
+            for metric, limit in self.latency_limits(expected, current, threshold).items():
+                if current[metric] <= limit:
+                    continue
+                message = f"{dataset}/{name}: {metric} {expected[metric]:.2f} -> {current[metric]:.2f}"
+                if gate_latency:
+                    regressions.append(message)
+                else:
+                    self.stdout.write(self.style.WARNING(f"Slower (not gated): {message}"))
+        return regressions
+
+    def latency_limits(self, expected, current, threshold):
+        """
+        Highest p50/p95 that is not a regression: over the threshold and over
+        the noise of both runs, estimated from their p50-p95 spread.
+        """
+        spread = max(expected['p95_ms'] - expected['p50_ms'], current['p95_ms'] - current['p50_ms'])
+        noise = max(MIN_LATENCY_DELTA_MS, NOISE_SPREADS * spread)
+        return {
+            metric: max(expected[metric] * (1 + threshold), expected[metric] + noise)
+            for metric in ('p50_ms', 'p95_ms')
+        }
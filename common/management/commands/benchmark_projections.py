@@ -0,0 +1,126 @@
+import io
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from maintenance.models import MaintenanceRecord, Reminder
+from maintenance.projections import (
+    MaintenanceRecordListProjection,
+    MaintenanceRecordProjection,
+    ReminderListProjection,
+    ReminderProjection,
+)
+from vehicles.models import Vehicle, VehicleImage
+from vehicles.projections import VehicleListProjection
+
+SEED = 42
+
+
+def cases():
+    """
+    ``(name, queryset, select_related, prefetch_related, projection class)``.
+    The serializers get their relations loaded up front, so only the
+    serialization itself is compared.
+    """
+    return [
+        ('vehicle-list', Vehicle.objects.order_by('pk'), ('image',), (), VehicleListProjection),
+        (
+            'record-list', MaintenanceRecord.objects.all(),
+            ('vehicle', 'maintenance_type'), (), MaintenanceRecordListProjection,
+        ),
+        (
+            'record-detail', MaintenanceRecord.objects.all(),
+            ('vehicle__image', 'maintenance_type'), ('reminders',), MaintenanceRecordProjection,
+        ),
+        (
+            'reminder-list', Reminder.objects.all(),
+            ('maintenance_record__vehicle', 'maintenance_record__maintenance_type'), (), ReminderListProjection,
+        ),
+        ('reminder-detail', Reminder.objects.all(), (), (), ReminderProjection),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows per second of the list serializers and their read-only projections '
+        'on a seeded throwaway database, checking that both render identical JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Rows rendered per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case; the fastest is reported')
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        try:
+            self.seed(options['rows'])
+            self.run(options['rows'], options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, rows):
+        vehicles = 10
+        call_command(
+            'seed_fleet', seed=SEED, prefix='bench', users=1, vehicles_per_user=vehicles,
+            records_per_vehicle=max(1, rows // vehicles), stdout=io.StringIO()
+        )
+        # Half the vehicles get an image so both branches of vehicle_image run
+        VehicleImage.objects.bulk_create([
+            VehicleImage(vehicle=vehicle, image=f"vehicles/images/{vehicle.pk} front.jpg")
+            for vehicle in Vehicle.objects.order_by('pk')[::2]
+        ])
+
+    def run(self, rows, repeat):
+        request = Request(APIRequestFactory().get('/api/'))
+        context = {'request': request, 'format': None, 'view': None}
+        renderer = JSONRenderer()
+
+        self.stdout.write(
+            f"{'case':<16} {'rows':>6} {'serializer rows/s':>18} {'projection rows/s':>18} {'speedup':>8}"
+        )
+        mismatched = []
+        for name, queryset, select_related, prefetch_related, projection_class in cases():
+            serializer_class = projection_class.serializer_class
+
+            def serialize():
+                instances = queryset.select_related(*select_related).prefetch_related(*prefetch_related)[:rows]
+                return renderer.render(serializer_class(instances, many=True, context=context).data)
+
+            def project():
+                projection = projection_class(context)
+                return renderer.render(projection.project(projection.rows(queryset)[:rows]))
+
+            expected, before = self.best(serialize, repeat)
+            actual, after = self.best(project, repeat)
+            if expected != actual:
+                mismatched.append(name)
+            count = min(rows, queryset.count())
+            self.stdout.write(
+                f"{name:<16} {count:>6} {count / before:>18,.0f} {count / after:>18,.0f} {before / after:>7.1f}x"
+            )
+
+        if mismatched:
+            raise CommandError(f"Projection output differs from the serializer for: {', '.join(mismatched)}")
+        self.stdout.write(self.style.SUCCESS('Projection output is byte-identical'))
+
+    def best(self, render, repeat):
+        """Rendered output and the fastest of ``repeat`` runs in seconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = render()
+            timings.append(time.perf_counter() - start)
+        return output, min(timings)
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.schema import generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = 'Render the OpenAPI schema to OPENAPI_SCHEMA_DIR so it is not generated per request (run on deploy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Public base URL of the API, e.g. https://api.example.com')
+
+    def handle(self, *args, **options):
+        Path(settings.OPENAPI_SCHEMA_DIR).mkdir(parents=True, exist_ok=True)
+        for fmt, content in generate_schema(url=options['url']).items():
+            path = schema_path(fmt)
+            tmp_path = path.with_suffix(f".{fmt}.tmp")
+            tmp_path.write_bytes(content)
+            # Atomic swap so running workers never read a half-written file
+            tmp_path.replace(path)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({len(content) // 1024} KiB)"))
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from maintenance.models import MaintenanceRecord, MaintenanceType, Reminder
+from common.sharding import mirror_reference_row
+from vehicles.models import Vehicle
+
+# Sharded tables with generated primary keys (vehicle images reuse the vehicle id)
+ID_MODELS = (Vehicle, MaintenanceRecord, Reminder)
+
+
+class Command(BaseCommand):
+    help = 'Reserve primary key ranges on each shard and copy reference data to it'
+
+    def handle(self, *args, **options):
+        for index, alias in enumerate(settings.DATABASE_SHARDS):
+            if alias == 'default':
+                continue
+            floor = index * settings.SHARD_ID_SPACE
+            for model in ID_MODELS:
+                self.reserve_ids(alias, model._meta.db_table, floor)
+            for maintenance_type in MaintenanceType.objects.using('default').iterator():
+                mirror_reference_row(maintenance_type)
+            self.stdout.write(self.style.SUCCESS(f"Prepared shard {alias} (ids from {floor})"))
+
+    def reserve_ids(self, alias, table, floor):
+        """Make new rows on ``alias`` get ids of at least ``floor``."""
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s",
+                    [floor, table]
+                )
+                if cursor.rowcount == 0:
+                    cursor.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+                        [table, floor]
+                    )
+            elif connection.vendor == 'postgresql':
+                quoted = connection.ops.quote_name(table)
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {quoted})))",
+                    [table, floor]
+                )
+            else:
+                self.stderr.write(f"Cannot reserve ids on {connection.vendor}; skipping {table}")
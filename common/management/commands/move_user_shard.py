@@ -0,0 +1,149 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from common.sharding import invalidate_assignment
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from users.models import ShardAssignment
+from vehicles.models import Vehicle, VehicleImage
+
+# Parents first; deletes walk this list backwards
+MOVED_MODELS = (
+    (Vehicle, 'user_id', 'updated_at'),
+    (VehicleImage, 'vehicle__user_id', None),
+    (MaintenanceRecord, 'vehicle__user_id', 'updated_at'),
+    (Reminder, 'maintenance_record__vehicle__user_id', 'updated_at'),
+    (ArchivedMaintenanceRecord, 'vehicle__user_id', 'archived_at'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a user's vehicles, images, maintenance records (live and archived) and reminders to "
+        "another shard while the API stays up (writes pause only for the final delta)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('target', help='Database alias of the destination shard')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-wait',
+            action='store_true',
+            help="Don't wait for cached shard assignments to expire (single-process setups)"
+        )
+
+    def handle(self, *args, **options):
+        user_id, target = options['user_id'], options['target']
+        self.batch_size = options['batch_size']
+        if target not in settings.DATABASE_SHARDS:
+            raise CommandError(f"Unknown shard '{target}'")
+
+        assignment, _ = ShardAssignment.objects.using('default').get_or_create(user_id=user_id)
+        source = assignment.alias
+        if source == target:
+            self.stdout.write(f"User {user_id} is already on {target}")
+            return
+
+        # 1. Bulk copy while the user keeps reading and writing on the source
+        self.purge(target, user_id)
+        copy_started = timezone.now()
+        copied = self.copy(source, target, user_id)
+        self.stdout.write(f"Copied {copied} row(s) from {source} to {target}")
+
+        # 2. Pause writes and copy whatever changed meanwhile
+        self.set_assignment(user_id, is_moving=True)
+        try:
+            self.wait_for_caches(options)
+            copied = self.copy(source, target, user_id, since=copy_started)
+            removed = self.remove_deleted(source, target, user_id)
+            self.stdout.write(f"Copied {copied} changed row(s), removed {removed} deleted row(s)")
+            # 3. Switch reads and writes to the target
+            self.set_assignment(user_id, alias=target, is_moving=False)
+        except Exception:
+            self.set_assignment(user_id, is_moving=False)
+            raise
+
+        # 4. Drop the old copy once nobody can still be routed to it
+        self.wait_for_caches(options)
+        self.purge(source, user_id)
+        self.stdout.write(self.style.SUCCESS(f"Moved user {user_id} from {source} to {target}"))
+
+    def set_assignment(self, user_id, **fields):
+        ShardAssignment.objects.using('default').filter(user_id=user_id).update(
+            updated_at=timezone.now(), **fields
+        )
+        invalidate_assignment(user_id)
+
+    def wait_for_caches(self, options):
+        if not options['no_wait']:
+            time.sleep(settings.SHARD_DIRECTORY_CACHE_SECONDS)
+
+    def copy(self, source, target, user_id, since=None):
+        """Upsert the user's rows from ``source`` into ``target``, keeping ids and timestamps."""
+        total = 0
+        for model, user_lookup, changed_field in MOVED_MODELS:
+            rows = model._base_manager.using(source).filter(**{user_lookup: user_id})
+            if since is not None and changed_field:
+                rows = rows.filter(**{f"{changed_field}__gte": since})
+            pk_name = model._meta.pk.name
+            update_fields = [f.name for f in model._meta.concrete_fields if not f.primary_key]
+            timestamp_fields = [
+                f.name for f in model._meta.concrete_fields
+                if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+            ]
+            batch = []
+            for row in rows.order_by('pk').iterator(chunk_size=self.batch_size):
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    total += self.write_batch(model, target, batch, pk_name, update_fields, timestamp_fields)
+                    batch = []
+            if batch:
+                total += self.write_batch(model, target, batch, pk_name, update_fields, timestamp_fields)
+        return total
+
+    def write_batch(self, model, target, batch, pk_name, update_fields, timestamp_fields):
+        # bulk_create stamps auto_now/auto_now_add fields; put the originals back afterwards
+        stamps = [{name: getattr(row, name) for name in timestamp_fields} for row in batch]
+        with transaction.atomic(using=target):
+            model._base_manager.using(target).bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=[pk_name],
+                update_fields=update_fields
+            )
+            if timestamp_fields:
+                for row, values in zip(batch, stamps):
+                    for name, value in values.items():
+                        setattr(row, name, value)
+                model._base_manager.using(target).bulk_update(batch, timestamp_fields)
+        return len(batch)
+
+    def remove_deleted(self, source, target, user_id):
+        """Delete rows from ``target`` that were deleted on ``source`` during the copy."""
+        removed = 0
+        for model, user_lookup, _ in reversed(MOVED_MODELS):
+            source_pks = set(
+                model._base_manager.using(source).filter(**{user_lookup: user_id}).values_list('pk', flat=True)
+            )
+            target_pks = set(
+                model._base_manager.using(target).filter(**{user_lookup: user_id}).values_list('pk', flat=True)
+            )
+            stale = list(target_pks - source_pks)
+            for start in range(0, len(stale), self.batch_size):
+                chunk = stale[start:start + self.batch_size]
+                removed += model._base_manager.using(target).filter(pk__in=chunk)._raw_delete(target)
+        return removed
+
+    def purge(self, alias, user_id):
+        """Delete the user's rows on ``alias`` in batches, without signals or tombstones."""
+        for model, user_lookup, _ in reversed(MOVED_MODELS):
+            rows = model._base_manager.using(alias).filter(**{user_lookup: user_id})
+            while True:
+                pks = list(rows.values_list('pk', flat=True)[:self.batch_size])
+                if not pks:
+                    break
+                model._base_manager.using(alias).filter(pk__in=pks)._raw_delete(alias)
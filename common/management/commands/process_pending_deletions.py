@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from vehicles.deletion import pending_deletions, purge_account, purge_vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        'Finish deleting the accounts and vehicles still marked pending-delete, '
+        'e.g. after a worker restarted mid-deletion'
+    )
+
+    def handle(self, *args, **options):
+        accounts, vehicles = pending_deletions()
+        for user_id in accounts:
+            purge_account(user_id)
+        for vehicle_id, alias in vehicles:
+            purge_vehicle(vehicle_id, alias)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {len(accounts)} account(s) and {len(vehicles)} vehicle(s)"
+        ))
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Run in a fresh interpreter so nothing is imported yet
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import config.wsgi
+loaded = time.perf_counter()
+if {urls!r}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+print(json.dumps({{'wsgi_s': loaded - start, 'total_s': time.perf_counter() - start}}))
+"""
+
+
+class ImportNode:
+    def __init__(self, name, self_us, cumulative_us, level):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.level = level
+        self.children = []
+
+
+def parse_importtime(output):
+    """Build the import tree from ``-X importtime`` output (children precede parents)."""
+    pending = []
+    for line in output.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        node = ImportNode(name, int(self_us), int(cumulative_us), len(indent) // 2)
+        while pending and pending[-1].level > node.level:
+            node.children.insert(0, pending.pop())
+        pending.append(node)
+    return pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure worker startup: import config.wsgi (and the URLconf) in a fresh interpreter '
+        'with -X importtime and attribute import time to installed apps'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15, help='Number of slowest modules to list')
+        parser.add_argument('--no-urls', action='store_true', help="Don't import the URLconf after config.wsgi")
+        parser.add_argument('--json', action='store_true', help='Print JSON instead of a report')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(urls=not options['no_urls'])],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        roots = parse_importtime(result.stderr)
+
+        by_owner = defaultdict(int)
+        modules = []
+        self.attribute(roots, None, by_owner, modules)
+        owners = sorted(by_owner.items(), key=lambda item: item[1], reverse=True)
+        slowest = sorted(modules, key=lambda node: node.self_us, reverse=True)[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'wsgi_ms': round(timings['wsgi_s'] * 1000, 1),
+                'total_ms': round(timings['total_s'] * 1000, 1),
+                'owners': [{'owner': owner, 'ms': round(us / 1000, 1)} for owner, us in owners],
+                'modules': [
+                    {'module': node.name, 'self_ms': round(node.self_us / 1000, 1),
+                     'cumulative_ms': round(node.cumulative_us / 1000, 1)}
+                    for node in slowest
+                ],
+            }, indent=2))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"config.wsgi ready in {timings['wsgi_s'] * 1000:.0f} ms, "
+            f"{timings['total_s'] * 1000:.0f} ms including the URLconf"
+        ))
+        self.stdout.write('Import time by owner (an app owns the modules it pulls in):')
+        for owner, us in owners:
+            if us >= 1000:
+                self.stdout.write(f"  {us / 1000:>8.1f} ms  {owner}")
+        self.stdout.write('Slowest modules (self time):')
+        for node in slowest:
+            self.stdout.write(f"  {node.self_us / 1000:>8.1f} ms  {node.name}")
+
+    def attribute(self, nodes, inherited, by_owner, modules):
+        """Charge each module to the innermost installed app that imported it."""
+        for node in nodes:
+            app = self.app_of(node.name)
+            by_owner[app or inherited or self.package_of(node.name)] += node.self_us
+            modules.append(node)
+            self.attribute(node.children, app or inherited, by_owner, modules)
+
+    def app_of(self, module):
+        """Installed app ``module`` belongs to, if any."""
+        matches = [app for app in settings.INSTALLED_APPS if module == app or module.startswith(f"{app}.")]
+        return max(matches, key=len) if matches else None
+
+    def package_of(self, module):
+        top_level = module.split('.')[0]
+        if top_level in sys.stdlib_module_names or top_level.startswith('_'):
+            return 'python'
+        return top_level
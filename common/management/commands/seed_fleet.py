@@ -0,0 +1,340 @@
+import io
+import random
+import string
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from common.sharding import place_user
+from maintenance.models import MaintenanceRecord, MaintenanceType, Reminder
+from users.models import ShardAssignment, User
+from vehicles.constants import VehicleType
+from vehicles.models import Vehicle
+
+# name, interval km, interval months, typical cost, relative frequency
+MAINTENANCE_CATALOG = [
+    ('Oil Change', 10000, 12, 80, 40),
+    ('Tire Rotation', 10000, 6, 40, 20),
+    ('Brake Service', 30000, 24, 350, 10),
+    ('Air Filter Replacement', 20000, 12, 45, 8),
+    ('Battery Replacement', None, 48, 180, 4),
+    ('Coolant Flush', 60000, 48, 120, 4),
+    ('Transmission Service', 80000, 60, 400, 3),
+    ('Annual Inspection', None, 12, 60, 11),
+]
+
+MAKES = {
+    'Toyota': ['Corolla', 'Camry', 'RAV4', 'Hilux'],
+    'Ford': ['Focus', 'F-150', 'Transit', 'Ranger'],
+    'Volkswagen': ['Golf', 'Passat', 'Tiguan', 'Crafter'],
+    'Honda': ['Civic', 'Accord', 'CR-V', 'CBR500R'],
+    'Hyundai': ['i30', 'Tucson', 'Santa Fe', 'H350'],
+    'Mercedes-Benz': ['C-Class', 'Sprinter', 'GLC', 'Vito'],
+}
+VEHICLE_TYPES = [
+    (VehicleType.CAR, 60), (VehicleType.SUV, 15), (VehicleType.TRUCK, 10),
+    (VehicleType.VAN, 10), (VehicleType.MOTORCYCLE, 5),
+]
+COLORS = ['White', 'Black', 'Silver', 'Grey', 'Blue', 'Red', 'Green']
+PROVIDERS = [
+    'QuickLube Express', 'City Auto Care', 'Dealer Service Center',
+    'Main Street Garage', 'Fleet Maintenance Co', 'Tire & Brake Depot', '',
+]
+VIN_ALPHABET = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+
+
+def copy_value(value):
+    """Format a value for PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+class TableWriter:
+    """Buffers rows for one table and writes them with COPY or ``bulk_create``"""
+
+    def __init__(self, model, columns, alias, batch_size, use_copy):
+        self.model = model
+        self.columns = columns
+        self.alias = alias
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.rows = []
+        self.written = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            buffer = io.StringIO()
+            for row in self.rows:
+                buffer.write('\t'.join(map(copy_value, row)))
+                buffer.write('\n')
+            buffer.seek(0)
+            connection = connections[self.alias]
+            quote = connection.ops.quote_name
+            columns = ', '.join(quote(column) for column in self.columns)
+            with connection.cursor() as cursor:
+                cursor.cursor.copy_expert(
+                    f"COPY {quote(self.model._meta.db_table)} ({columns}) FROM STDIN",
+                    buffer
+                )
+        else:
+            # auto_now fields are restamped by bulk_create; seeded timestamps
+            # only matter for COPY-sized datasets anyway.
+            self.model._base_manager.using(self.alias).bulk_create(
+                [self.model(**dict(zip(self.columns, row))) for row in self.rows],
+                batch_size=self.batch_size
+            )
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic fleet (users x vehicles x maintenance records, with '
+        'reminders) for load and scale testing. Deterministic for a given --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--vehicles-per-user', type=int, default=5)
+        parser.add_argument('--records-per-vehicle', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix',
+            default='fleet',
+            help='Prefix for generated emails and registration numbers; must be unused'
+        )
+        parser.add_argument('--password', default='fleet-password', help='Password for every generated user')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL')
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help="Don't rebuild derived data (cost benchmarks, vehicle rollups) after seeding"
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        self.rng = random.Random(options['seed'])
+        self.today = timezone.now().date()
+        self.prefix = options['prefix']
+        batch_size = options['batch_size']
+
+        if User.objects.filter(email__startswith=f"{self.prefix}-").exists():
+            raise CommandError(f"Users with prefix '{self.prefix}' already exist; pick another --prefix")
+
+        self.types = self.ensure_maintenance_types()
+        user_ids = self.create_users(options['users'], options['password'], batch_size)
+
+        users_by_shard = defaultdict(list)
+        for user_id in user_ids:
+            users_by_shard[place_user(user_id)].append(user_id)
+        ShardAssignment.objects.bulk_create(
+            [
+                ShardAssignment(user_id=user_id, alias=alias)
+                for alias, ids in users_by_shard.items() for user_id in ids
+            ],
+            batch_size=batch_size
+        )
+
+        totals = defaultdict(int)
+        for alias, ids in users_by_shard.items():
+            use_copy = connections[alias].vendor == 'postgresql' and not options['no_copy']
+            with transaction.atomic(using=alias):
+                written = self.seed_shard(
+                    alias, ids, options['vehicles_per_user'], options['records_per_vehicle'],
+                    batch_size, use_copy
+                )
+            for name, count in written.items():
+                totals[name] += count
+
+        if not options['skip_derived']:
+            call_command('rebuild_cost_sketches', stdout=io.StringIO())
+            call_command('reconcile_vehicle_rollups', stdout=io.StringIO())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(user_ids)} users, {totals['vehicles']} vehicles, "
+            f"{totals['records']} maintenance records and {totals['reminders']} reminders "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def ensure_maintenance_types(self):
+        types = []
+        for name, km, months, cost, weight in MAINTENANCE_CATALOG:
+            maintenance_type, _ = MaintenanceType.objects.get_or_create(
+                name=name,
+                defaults={'recommended_interval_km': km, 'recommended_interval_months': months}
+            )
+            types.append((maintenance_type, Decimal(cost), weight))
+        return types
+
+    def create_users(self, count, password, batch_size):
+        password_hash = make_password(password)
+        now = timezone.now()
+        users = [
+            User(
+                email=f"{self.prefix}-{index}@example.com",
+                first_name='Fleet',
+                last_name=f"Owner {index}",
+                password=password_hash,
+                date_joined=now
+            )
+            for index in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(
+            User.objects.filter(email__startswith=f"{self.prefix}-")
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def next_ids(self, alias, model):
+        """First free primary key for ``model`` on ``alias``, honouring shard id ranges."""
+        floor = settings.DATABASE_SHARDS.index(alias) * settings.SHARD_ID_SPACE
+        current = model._base_manager.using(alias).aggregate(top=Max('pk'))['top'] or 0
+        return max(current, floor) + 1
+
+    def seed_shard(self, alias, user_ids, vehicles_per_user, records_per_vehicle, batch_size, use_copy):
+        vehicle_columns = [
+            'id', 'created_at', 'updated_at', 'user_id', 'make', 'model_name',
+            'registration_number', 'vehicle_type', 'year', 'color', 'vin_number',
+            'purchase_date', 'current_mileage',
+            # Rollups start empty and are filled in by reconcile_vehicle_rollups
+            'last_service_date', 'next_due_date', 'total_spent', 'open_reminders',
+        ]
+        record_columns = [
+            'id', 'vehicle_id', 'maintenance_type_id', 'date_performed',
+            'mileage_at_service', 'cost', 'service_provider', 'notes',
+            'next_due_date', 'next_due_mileage', 'status', 'created_at', 'updated_at',
+        ]
+        reminder_columns = [
+            'id', 'maintenance_record_id', 'due_date', 'is_completed', 'notes',
+            'created_at', 'updated_at',
+        ]
+        vehicles = TableWriter(Vehicle, vehicle_columns, alias, batch_size, use_copy)
+        records = TableWriter(MaintenanceRecord, record_columns, alias, batch_size, use_copy)
+        reminders = TableWriter(Reminder, reminder_columns, alias, batch_size, use_copy)
+
+        vehicle_id = self.next_ids(alias, Vehicle)
+        record_id = self.next_ids(alias, MaintenanceRecord)
+        reminder_id = self.next_ids(alias, Reminder)
+
+        for user_id in user_ids:
+            for _ in range(vehicles_per_user):
+                vehicle, record_rows = self.generate_vehicle(vehicle_id, user_id, records_per_vehicle)
+                # Records first to learn the final mileage, then the vehicle row
+                latest_by_type = {}
+                for row in record_rows:
+                    row[0] = record_id
+                    latest_by_type[row[2]] = record_id
+                    record_id += 1
+                vehicle[-1] = record_rows[-1][4] if record_rows else 0
+                vehicles.add(vehicle + [None, None, 0, 0])
+                label = f"{vehicle[8]} {vehicle[4]} {vehicle[5]} ({vehicle[6]})"
+                for row in record_rows:
+                    records.add(row)
+                    if row[8] is None:
+                        continue
+                    # One reminder per record with a due date, as the record
+                    # signal would create; superseded ones are completed.
+                    completed = latest_by_type[row[2]] != row[0] or row[8] < self.today
+                    type_name = self.type_names[row[2]]
+                    reminders.add([
+                        reminder_id, row[0], row[8], completed,
+                        f"Upcoming maintenance for {label} - {type_name}",
+                        row[11], row[12],
+                    ])
+                    reminder_id += 1
+                vehicle_id += 1
+
+        # Foreign keys are deferred, so flush order within the transaction is free
+        vehicles.flush()
+        records.flush()
+        reminders.flush()
+
+        if use_copy:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Vehicle, MaintenanceRecord, Reminder]):
+                    cursor.execute(sql)
+
+        return {'vehicles': vehicles.written, 'records': records.written, 'reminders': reminders.written}
+
+    @property
+    def type_names(self):
+        if not hasattr(self, '_type_names'):
+            self._type_names = {maintenance_type.pk: maintenance_type.name for maintenance_type, _, _ in self.types}
+        return self._type_names
+
+    def generate_vehicle(self, vehicle_id, user_id, record_count):
+        rng = self.rng
+        make = rng.choice(list(MAKES))
+        vehicle_type = rng.choices(
+            [choice for choice, _ in VEHICLE_TYPES],
+            weights=[weight for _, weight in VEHICLE_TYPES]
+        )[0]
+        year = min(self.today.year, int(rng.triangular(2005, self.today.year, self.today.year - 4)))
+        purchase_date = date(year, 1, 1) + timedelta(days=rng.randint(0, 364))
+        purchase_date = min(purchase_date, self.today - timedelta(days=30))
+        created = timezone.make_aware(datetime.combine(purchase_date, dt_time(12)))
+        vehicle = [
+            vehicle_id, created, created, user_id, make, rng.choice(MAKES[make]),
+            f"{self.prefix.upper()}-{vehicle_id}", vehicle_type, year,
+            rng.choice(COLORS), ''.join(rng.choices(VIN_ALPHABET, k=17)),
+            purchase_date, 0,
+        ]
+        return vehicle, self.generate_records(vehicle_id, purchase_date, record_count)
+
+    def generate_records(self, vehicle_id, purchase_date, count):
+        rng = self.rng
+        if not count:
+            return []
+        span_days = max((self.today - purchase_date).days, 1)
+        km_per_day = max(rng.gauss(15000, 5000), 3000) / 365
+        # Service dates spread over the vehicle's life, oldest first
+        days = sorted(rng.randint(0, span_days) for _ in range(count))
+        weights = [weight for _, _, weight in self.types]
+        rows = []
+        for offset in days:
+            maintenance_type, base_cost, _ = rng.choices(self.types, weights=weights)[0]
+            performed = purchase_date + timedelta(days=offset)
+            mileage = int(offset * km_per_day * rng.uniform(0.9, 1.1))
+            if rows:
+                mileage = max(mileage, rows[-1][4])
+            cost = (base_cost * Decimal(str(round(rng.lognormvariate(0, 0.35), 3)))).quantize(Decimal('0.01'))
+            status = MaintenanceRecord.Status.COMPLETED
+            if offset >= span_days - 14 and rng.random() < 0.5:
+                status = rng.choice([MaintenanceRecord.Status.PENDING, MaintenanceRecord.Status.IN_PROGRESS])
+            elif rng.random() < 0.02:
+                status = MaintenanceRecord.Status.CANCELLED
+            next_due = maintenance_type.next_due(performed, mileage)
+            stamp = timezone.make_aware(datetime.combine(performed, dt_time(12)))
+            rows.append([
+                None, vehicle_id, maintenance_type.pk, performed, mileage, cost,
+                rng.choice(PROVIDERS), '', next_due['date'], next_due['mileage'],
+                status, stamp, stamp,
+            ])
+        return rows
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common import slow_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the slow queries recorded by the worker processes (requires SLOW_QUERY_DIR), '
+        'grouped by fingerprint with their EXPLAIN plans'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--fingerprint', help='Show the occurrences of one query')
+        parser.add_argument('--json', action='store_true', help='Print JSON instead of a report')
+        parser.add_argument('--clear', action='store_true', help='Delete the recorded snapshots')
+
+    def handle(self, *args, **options):
+        if not settings.SLOW_QUERY_DIR:
+            raise CommandError('SLOW_QUERY_DIR is not set, so slow queries are only kept in each worker process')
+
+        if options['clear']:
+            removed = 0
+            for path in Path(settings.SLOW_QUERY_DIR).glob(f"{slow_queries.SNAPSHOT_PREFIX}-*.json"):
+                path.unlink(missing_ok=True)
+                removed += 1
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} snapshot(s)"))
+            return
+
+        occurrences = slow_queries.entries()
+        if options['fingerprint']:
+            rows = [entry for entry in occurrences if entry['fingerprint'] == options['fingerprint']]
+        else:
+            rows = slow_queries.summarize(occurrences)
+        rows = rows[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write('No slow queries recorded')
+            return
+        for row in rows:
+            if options['fingerprint']:
+                self.stdout.write(
+                    f"{row['recorded_at']}  {row['duration_ms']:.1f} ms  {row['endpoint'] or '-'}  {row['params']}"
+                )
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{row['fingerprint']}  x{row['count']}  total {row['total_ms']:.1f} ms  "
+                f"avg {row['avg_ms']:.1f} ms  max {row['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"  {row['sql']}")
+            if row['endpoints']:
+                self.stdout.write(f"  endpoints: {', '.join(row['endpoints'])}")
+            for frame in row['stack']:
+                self.stdout.write(f"    at {frame}")
+            if row['plan']:
+                label = 'EXPLAIN ANALYZE' if row['analyzed'] else 'EXPLAIN'
+                self.stdout.write(f"  {label}:")
+                for line in row['plan'].splitlines():
+                    self.stdout.write(f"    {line}")
+            self.stdout.write('')
@@ -0,0 +1,161 @@
+"""
+Low-overhead in-process metrics rendered in the Prometheus text format.
+
+Each worker aggregates into a module-level registry. When ``METRICS_DIR`` is
+set, workers periodically write their registry to a snapshot file there and
+``/metrics`` merges all of them, so any worker can answer a scrape for the
+whole host. Clear ``METRICS_DIR`` on deploy, as with any multiprocess
+Prometheus setup.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .snapshots import read_snapshots, write_snapshot
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SNAPSHOT_PREFIX = 'metrics'
+
+_descriptions = {}
+
+
+def describe(name, metric_type, help_text):
+    """Register the TYPE and HELP lines for a metric family."""
+    _descriptions[name] = (metric_type, help_text)
+
+
+class Registry:
+    """Thread-safe counters and histograms keyed by metric name and label values"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * (len(buckets) + 1),
+                    'sum': 0.0,
+                }
+            histogram['counts'][bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [
+                    [name, [list(label) for label in labels], value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, [list(label) for label in labels], dict(histogram, counts=list(histogram['counts']))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self):
+        """Write this process's snapshot if the flush interval has passed."""
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        write_snapshot(settings.METRICS_DIR, SNAPSHOT_PREFIX, self.snapshot())
+
+
+registry = Registry()
+
+
+def merged_snapshot():
+    """This process's metrics merged with the latest snapshots of the others."""
+    counters = {}
+    histograms = {}
+    snapshots = [registry.snapshot()]
+    if settings.METRICS_DIR:
+        snapshots += list(read_snapshots(settings.METRICS_DIR, SNAPSHOT_PREFIX, include_own=False))
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(histogram, counts=list(histogram['counts']))
+            else:
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], histogram['counts'])]
+                merged['sum'] += histogram['sum']
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+    counters, histograms = merged_snapshot()
+    families = {}
+    for (name, labels), value in counters.items():
+        families.setdefault(name, []).append(('counter', labels, value))
+    for (name, labels), histogram in histograms.items():
+        families.setdefault(name, []).append(('histogram', labels, histogram))
+
+    lines = []
+    for name in sorted(families):
+        samples = families[name]
+        metric_type, help_text = _descriptions.get(name, (samples[0][0], ''))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for kind, labels, value in sorted(samples, key=lambda sample: sample[1]):
+            if kind == 'counter':
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(value['buckets'] + ['+Inf'], value['counts']):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+
+describe('http_request_duration_seconds', 'histogram', 'Request latency by route and method.')
+describe('http_requests_total', 'counter', 'Requests by route, method and status class.')
+describe('http_response_size_bytes_total', 'counter', 'Bytes of non-streaming response bodies by route and method.')
+describe('db_queries_total', 'counter', 'SQL queries executed by route and method.')
+describe('db_query_duration_seconds_total', 'counter', 'Time spent executing SQL by route and method.')
+describe('upcoming_cache_requests_total', 'counter', 'Upcoming records/reminders cache lookups by endpoint and result (hit or miss).')
+describe('deleted_rows_total', 'counter', 'Rows removed by background vehicle and account deletions, by table.')
+describe('outbox_events_total', 'counter', 'Outbox events handled by the dispatcher, by result (applied, failed and left for a retry, or quarantined).')
+describe('requests_shed_total', 'counter', 'Requests answered with a 503 by route and reason (overloaded: over the in-flight limit, deadline: out of query time).')
+describe('slow_query_explains_total', 'counter', 'EXPLAINs of slow queries by result (explained, failed, or dropped with too many pending).')
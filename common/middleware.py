@@ -0,0 +1,160 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .deadlines import (
+    Deadline,
+    DeadlineExceeded,
+    GuardedStream,
+    Overloaded,
+    enforce,
+    limiter,
+    resolve_route,
+    route_budget,
+    shed_response,
+)
+from .metrics import registry
+from .profiling import profile_request
+from .slow_queries import current_request
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts queries and the time spent in them"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def staff_user(request):
+    """The staff user behind a session or a JWT, if any."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_staff else None
+
+
+def route_label(request):
+    """Low-cardinality name of the route that served ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and response size metrics per route and method"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        token = current_request.set(request)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        elapsed = time.perf_counter() - start
+
+        labels = (('route', route_label(request)), ('method', request.method))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.inc('http_requests_total', labels + (('status', f"{response.status_code // 100}xx"),))
+        registry.inc('db_queries_total', labels, queries.count)
+        registry.inc('db_query_duration_seconds_total', labels, queries.seconds)
+        if not response.streaming:
+            registry.inc('http_response_size_bytes_total', labels, len(response.content))
+        registry.maybe_flush()
+        return response
+
+
+class DeadlineMiddleware:
+    """
+    Give each request its route's SQL time budget, and shed requests to
+    expensive routes beyond their in-flight limit; see ``common.deadlines``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = resolve_route(request)
+        deadline_ms, limit = route_budget(route, request.method)
+        if limit and not limiter.acquire(route, limit):
+            registry.inc('requests_shed_total', (('route', route), ('reason', 'overloaded')))
+            return shed_response(Overloaded())
+        deadline = Deadline(deadline_ms, route) if deadline_ms else None
+
+        def finish():
+            if deadline is not None:
+                deadline.disarm()
+            if limit:
+                limiter.release(route)
+
+        try:
+            with enforce(deadline):
+                response = self.get_response(request)
+        except BaseException:
+            finish()
+            raise
+        if response.streaming and not isinstance(response, FileResponse):
+            # The body runs its queries as it is sent; keep the budget and the slot until it is closed
+            response.streaming_content = GuardedStream(response.streaming_content, deadline, finish)
+        else:
+            finish()
+        return response
+
+    def process_exception(self, request, exception):
+        # DRF views render it themselves; this covers plain Django views
+        if isinstance(exception, DeadlineExceeded):
+            return shed_response(exception)
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests from staff users that ask for it with the ``X-Profile``
+    header or the ``_profile`` query parameter; see ``common.profiling``.
+    Other requests pay for a single flag check.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if not (settings.PROFILING_ENABLED and (
+            'HTTP_X_PROFILE' in request.META or '_profile' in request.META.get('QUERY_STRING', '')
+        )):
+            return self.get_response(request)
+
+        user = staff_user(request)
+        # One profiler per process: concurrent profiles would measure each other
+        if user is None or not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return profile_request(self.get_response, request, user)
+        finally:
+            self.lock.release()
@@ -0,0 +1,183 @@
+import json
+import logging
+
+from django.conf import settings
+from django.db import OperationalError
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .db_routers import (
+    choose_replica,
+    get_read_alias,
+    is_pinned_to_primary,
+    pin_to_primary,
+    replica_health,
+    reset_read_alias,
+    set_read_alias,
+)
+from .sharding import get_assignment, is_sharded, reset_current_shard, set_current_shard
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests of a view from a read replica.
+
+    After a successful write the user is pinned to the primary for
+    ``REPLICA_PIN_SECONDS`` so they always read their own writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._read_alias_token = None
+        if request.method in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            if not is_pinned_to_primary(request.user.pk):
+                alias = choose_replica()
+                if alias is not None:
+                    self._read_alias_token = set_read_alias(alias)
+
+    def handle_exception(self, exc):
+        alias = get_read_alias()
+        if isinstance(exc, OperationalError) and alias is not None:
+            replica_health.eject(alias, str(exc))
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_alias_token', None)
+        if token is not None:
+            reset_read_alias(token)
+            self._read_alias_token = None
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Your data is being moved. Please retry shortly.'
+    default_code = 'shard_moving'
+    wait = 30
+
+
+class ShardRoutingMixin:
+    """
+    Route sharded models to the authenticated user's shard for the request.
+    Writes are refused while the user is being moved between shards.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._shard_token = None
+        if is_sharded() and request.user.is_authenticated:
+            alias, is_moving = get_assignment(request.user.pk)
+            if is_moving and request.method not in SAFE_METHODS:
+                raise ShardMoving()
+            self._shard_token = set_current_shard(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_shard_token', None)
+        if token is not None:
+            reset_current_shard(token)
+            self._shard_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class StreamingListMixin:
+    """
+    ``?stream=true`` on a list endpoint returns every matching row, unpaginated,
+    as one JSON array written incrementally through a ``StreamingHttpResponse``.
+    The queryset is walked with ``.iterator()`` and serialized
+    ``STREAMING_LIST_CHUNK_SIZE`` rows at a time, so memory is bounded by the
+    chunk size rather than by the result. ``stream_select_related`` names the
+    relations the list serializer reads; views with a ``projection_class``
+    stream projected rows instead.
+
+    The status code is sent before the rows are read, so an error mid-stream
+    can only cut the body short; clients see truncated, invalid JSON.
+    """
+    stream_select_related = ()
+
+    def list(self, request, *args, **kwargs):
+        if not self.stream_requested():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Shard and replica routing is reset when the view returns, before
+        # the body is streamed, so pin the database the request would use.
+        queryset = queryset.using(queryset.db)
+        projection_class = getattr(self, 'projection_class', None)
+        if projection_class is not None:
+            projection = projection_class(self.get_serializer_context())
+            rows, serialize = projection.rows(queryset), projection.project
+        else:
+            if self.stream_select_related:
+                queryset = queryset.select_related(*self.stream_select_related)
+            rows, serialize = queryset, self.serializer_for_chunks()
+        return StreamingHttpResponse(self.stream_json(rows, serialize), content_type='application/json')
+
+    def stream_requested(self):
+        return self.request.query_params.get('stream', '').lower() in ('1', 'true')
+
+    def serializer_for_chunks(self):
+        serializer_class, context = self.get_serializer_class(), self.get_serializer_context()
+
+        def serialize(chunk):
+            return serializer_class(chunk, many=True, context=context).data
+        return serialize
+
+    def stream_json(self, rows, serialize):
+        chunk_size = settings.STREAMING_LIST_CHUNK_SIZE
+        separator = b''
+        yield b'['
+        chunk = []
+        try:
+            for row in rows.iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) == chunk_size:
+                    yield separator + self.encode_chunk(serialize(chunk))
+                    separator = b','
+                    chunk = []
+            if chunk:
+                yield separator + self.encode_chunk(serialize(chunk))
+        except Exception:
+            logger.exception("Streaming %s failed mid-response", type(self).__name__)
+            raise
+        yield b']'
+
+    @staticmethod
+    def encode_chunk(data):
+        # The chunk's array without its brackets
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))[1:-1].encode()
+
+
+class ProjectionListMixin:
+    """
+    Serve the list action from ``projection_class`` (a
+    ``common.projections.Projection`` of the list serializer) instead of
+    serializing model instances. Other list-shaped actions can return
+    ``self.projected_list(queryset, projection_class)``.
+    """
+    projection_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.projection_class is None:
+            return super().list(request, *args, **kwargs)
+        return self.projected_list(self.filter_queryset(self.get_queryset()))
+
+    def projected_list(self, queryset, projection_class=None):
+        projection = (projection_class or self.projection_class)(self.get_serializer_context())
+        rows = projection.rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.project(page))
+        return Response(projection.project(rows))
@@ -5,4 +5,23 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class LoadedValuesMixin:
+    """Remember the field values an instance was loaded with so signals can tell what changed"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, field_name, default=None):
+        return getattr(self, '_loaded_values', {}).get(field_name, default)
+
+    def refresh_loaded_values(self, *field_names):
+        """Treat the current values of ``field_names`` as the ones last written."""
+        loaded = getattr(self, '_loaded_values', {})
+        loaded.update({name: getattr(self, name) for name in field_names})
+        self._loaded_values = loaded
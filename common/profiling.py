@@ -0,0 +1,146 @@
+"""
+On-demand request profiling. A staff user adds the ``X-Profile`` header (or
+the ``_profile`` query parameter) to a request and it runs under cProfile,
+tracemalloc and an SQL recorder. The results are kept as a ``.prof`` file
+plus a JSON summary in PROFILING_DIR, capped at PROFILING_MAX_ARTIFACTS.
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+ARTIFACT_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class SQLRecorder:
+    """``execute_wrapper`` that keeps every statement with its timing"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': repr(params)[:500],
+                'many': many,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+def artifact_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def artifact_path(artifact_id, suffix):
+    """Path of an artifact, or ``None`` for ids that are not ours."""
+    if not ARTIFACT_ID_RE.match(artifact_id) or suffix not in ('prof', 'json'):
+        return None
+    return artifact_dir() / f"{artifact_id}.{suffix}"
+
+
+def list_artifacts():
+    """Summaries of the stored profiles, newest first."""
+    summaries = []
+    for path in sorted(artifact_dir().glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            with open(path) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({
+            key: summary.get(key)
+            for key in ('id', 'captured_at', 'method', 'path', 'user_id', 'status', 'duration_ms', 'query_count')
+        })
+    return summaries
+
+
+def enforce_retention():
+    """Delete the oldest artifacts beyond PROFILING_MAX_ARTIFACTS."""
+    summaries = sorted(artifact_dir().glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in summaries[settings.PROFILING_MAX_ARTIFACTS:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def profile_request(get_response, request, user):
+    """Run ``get_response`` under the profilers and store the artifacts."""
+    recorders = [SQLRecorder(alias) for alias in connections]
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        profiler.enable()
+        try:
+            response = get_response(request)
+            # Rendering happens lazily for some responses; include it
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+        finally:
+            profiler.disable()
+    duration = time.perf_counter() - start
+
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    if started_tracing:
+        tracemalloc.stop()
+
+    artifact_id = uuid.uuid4().hex
+    directory = artifact_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{artifact_id}.prof")
+
+    stats_output = io.StringIO()
+    pstats.Stats(profiler, stream=stats_output).sort_stats('cumulative').print_stats(40)
+    queries = [query for recorder in recorders for query in recorder.queries]
+    allocations = [
+        {
+            'location': str(stat.traceback[0]) if stat.traceback else '',
+            'size_diff_kib': round(stat.size_diff / 1024, 1),
+            'count_diff': stat.count_diff,
+        }
+        for stat in after.compare_to(before, 'lineno')[:25]
+    ]
+    summary = {
+        'id': artifact_id,
+        'captured_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user_id': user.pk,
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'query_count': len(queries),
+        'query_ms': round(sum(query['ms'] for query in queries), 3),
+        'queries': queries,
+        'peak_memory_kib': round(peak / 1024, 1),
+        'allocations': allocations,
+        'top_functions': stats_output.getvalue(),
+    }
+    with open(directory / f"{artifact_id}.json", 'w') as f:
+        json.dump(summary, f, indent=1)
+    enforce_retention()
+
+    response['X-Profile-Id'] = artifact_id
+    return response
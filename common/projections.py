@@ -0,0 +1,165 @@
+"""
+Read-only projections: build list payloads straight from ``values_list()``
+rows instead of model instances and DRF field machinery. A projection is
+compiled from the serializer it stands in for, so the payload keeps that
+serializer's field names, order and representations byte for byte:
+
+* plain model fields are read from their column and converted with a
+  converter picked once per field (most are the identity);
+* fields named in ``nested`` are rendered by another projection over the
+  related row's columns, once per related object per request;
+* anything else needs a ``project_<field>(row)`` method, the projection
+  counterpart of ``get_<field>`` on a ``SerializerMethodField``.
+"""
+import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns column values unchanged
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def converter_for(field):
+    """Callable turning a non-null column value into ``field``'s representation, or ``None`` for as-is."""
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    if type(field) is serializers.DateField:
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is None:
+            return None
+        if output_format.lower() == ISO_8601:
+            return datetime.date.isoformat
+    return field.to_representation
+
+
+class Projection:
+    """Fast, read-only stand-in for ``serializer_class(many=True)`` on list endpoints"""
+    serializer_class = None
+    # Field name -> projection class rendering that forward relation
+    nested = {}
+    # Extra values() lookups read by project_<field> methods
+    extra_lookups = ()
+
+    def __init__(self, context=None, prefix=''):
+        self.context = context if context is not None else {}
+        self.prefix = prefix
+        self.children = {
+            name: projection(self.context, f"{prefix}{name}__") for name, projection in self.nested.items()
+        }
+        self.columns = None
+        self.db = None
+        self._scheme_host = None
+        self._related = {}
+
+    @classmethod
+    def readable_fields(cls):
+        """``(name, field)`` pairs of the serializer's output, compiled once per class."""
+        fields = cls.__dict__.get('_readable_fields')
+        if fields is None:
+            fields = [
+                (name, field) for name, field in cls.serializer_class().fields.items()
+                if not field.write_only
+            ]
+            cls._readable_fields = fields
+        return fields
+
+    def lookup_for(self, name, field):
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)) or (
+            isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField)
+        ) or field.source == '*':
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} needs a nested projection or a project_{name}() method for '{name}'."
+            )
+        return field.source.replace('.', '__')
+
+    @staticmethod
+    def relation_lookup(name, field):
+        """The foreign key column a nested field is rendered from."""
+        return name if field.source == '*' else field.source.replace('.', '__')
+
+    def lookups(self):
+        """Every values() lookup the projection reads, in column order."""
+        lookups = []
+        for name, field in self.readable_fields():
+            if name in self.children:
+                lookups.append(self.prefix + self.relation_lookup(name, field))
+                lookups.extend(self.children[name].lookups())
+            elif not hasattr(self, f"project_{name}"):
+                lookups.append(self.prefix + self.lookup_for(name, field))
+        lookups.extend(self.prefix + lookup for lookup in self.extra_lookups)
+        return list(dict.fromkeys(lookups))
+
+    def bind(self, columns, db):
+        """Resolve the plan against the row layout: ``(name, column index or None, converter)``."""
+        self.columns = columns
+        self.db = db
+        self.plan = []
+        for name, field in self.readable_fields():
+            if name in self.children:
+                child = self.children[name]
+                child.bind(columns, db)
+                child.key_index = columns[self.prefix + self.relation_lookup(name, field)]
+                self.plan.append((name, None, child.related_representation))
+            elif hasattr(self, f"project_{name}"):
+                self.plan.append((name, None, getattr(self, f"project_{name}")))
+            else:
+                self.plan.append((name, columns[self.prefix + self.lookup_for(name, field)], converter_for(field)))
+
+    def rows(self, queryset):
+        """``queryset`` as tuples carrying every column the projection reads."""
+        lookups = self.lookups()
+        self.bind({lookup: index for index, lookup in enumerate(lookups)}, queryset.db)
+        return queryset.values_list(*lookups)
+
+    def value(self, row, lookup):
+        """Value of one of the projection's lookups in ``row``."""
+        return row[self.columns[self.prefix + lookup]]
+
+    def prepare(self, rows):
+        """Hook to fetch whatever a batch of rows needs in bulk before it is projected."""
+
+    def project(self, rows):
+        """Representations of ``rows`` (from ``rows()``), as the serializer would render them."""
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+    def to_representation(self, row):
+        ret = {}
+        for name, index, convert in self.plan:
+            if index is None:
+                ret[name] = convert(row)
+            else:
+                value = row[index]
+                ret[name] = value if value is None or convert is None else convert(value)
+        return ret
+
+    def related_representation(self, row):
+        """Representation of a related object, built once per object per request."""
+        pk = row[self.key_index]
+        if pk is None:
+            return None
+        data = self._related.get(pk)
+        if data is None:
+            data = self._related[pk] = self.to_representation(row)
+        return data
+
+    def absolute_url(self, url):
+        """``request.build_absolute_uri(url)``, with the scheme and host resolved once per request."""
+        request = self.context.get('request')
+        if request is None:
+            return None
+        if url.startswith('/') and not url.startswith('//') and '/./' not in url and '/../' not in url:
+            if self._scheme_host is None:
+                self._scheme_host = request.build_absolute_uri('/')[:-1]
+            return self._scheme_host + url
+        return request.build_absolute_uri(url)
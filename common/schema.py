@@ -0,0 +1,118 @@
+"""
+Precomputed OpenAPI schema. ``manage.py generate_schema`` renders the schema
+with drf-yasg at deploy time; the views here serve those files with strong
+ETags and serve the Swagger UI and ReDoc pages pointing at them. drf-yasg is
+only imported when the schema has to be generated, never to serve it.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_INFO = {
+    'title': 'Vehicle Maintenance Tracker API',
+    'default_version': 'v1',
+    'description': 'API for tracking vehicle maintenance schedules and reminders',
+    'terms_of_service': 'https://www.example.com/terms/',
+    'contact_email': 'contact@maintenancetracker.com',
+    'license_name': 'MIT License',
+}
+
+FORMATS = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+Document = namedtuple('Document', ['content', 'etag'])
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def generate_schema(url=None):
+    """Build the schema with drf-yasg and return ``{format: bytes}``."""
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    info = openapi.Info(
+        title=SCHEMA_INFO['title'],
+        default_version=SCHEMA_INFO['default_version'],
+        description=SCHEMA_INFO['description'],
+        terms_of_service=SCHEMA_INFO['terms_of_service'],
+        contact=openapi.Contact(email=SCHEMA_INFO['contact_email']),
+        license=openapi.License(name=SCHEMA_INFO['license_name']),
+    )
+    schema = OpenAPISchemaGenerator(info, url=url).get_schema(request=None, public=True)
+    return {
+        'json': OpenAPICodecJson(validators=[]).encode(schema),
+        'yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def schema_path(fmt):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"schema.{fmt}"
+
+
+def make_document(content):
+    return Document(content, hashlib.sha256(content).hexdigest()[:32])
+
+
+def get_document(fmt):
+    """
+    The precomputed schema in ``fmt``. Falls back to generating it once per
+    process when ``generate_schema`` has not been run for this deploy.
+    """
+    document = _documents.get(fmt)
+    if document is not None:
+        return document
+    with _lock:
+        if fmt not in _documents:
+            path = schema_path(fmt)
+            if path.exists():
+                _documents[fmt] = make_document(path.read_bytes())
+            else:
+                logger.warning("%s is missing; generating the schema in-process. Run generate_schema on deploy.", path)
+                for name, content in generate_schema().items():
+                    _documents.setdefault(name, make_document(content))
+    return _documents[fmt]
+
+
+def get_docs_page(ui):
+    """Rendered Swagger UI (``swagger``) or ReDoc (``redoc``) page for the cached schema."""
+    key = f"page:{ui}"
+    document = _documents.get(key)
+    if document is None:
+        spec_url = reverse('schema-json')
+        context = {'title': SCHEMA_INFO['title'], 'version': SCHEMA_INFO['default_version']}
+        if ui == 'swagger':
+            template = 'drf-yasg/swagger-ui.html'
+            context['swagger_settings'] = json.dumps({
+                'url': spec_url,
+                'docExpansion': 'list',
+                'deepLinking': False,
+                'showExtensions': True,
+                'defaultModelRendering': 'model',
+                'defaultModelExpandDepth': 3,
+                'defaultModelsExpandDepth': 3,
+                'persistAuth': False,
+            })
+            context['oauth2_config'] = '{}'
+        else:
+            template = 'drf-yasg/redoc.html'
+            context['redoc_settings'] = json.dumps({
+                'url': spec_url,
+                'lazyRendering': False,
+                'hideHostname': False,
+                'expandResponses': 'all',
+            })
+        document = _documents[key] = make_document(render_to_string(template, context).encode())
+    return document
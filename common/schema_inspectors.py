@@ -0,0 +1,26 @@
+"""drf-yasg inspectors; only imported by drf-yasg while generating the schema."""
+from drf_yasg import openapi
+from drf_yasg.inspectors import FieldInspector, NotHandled
+from rest_framework import serializers
+
+
+class FileListFieldInspector(FieldInspector):
+    """
+    Describe a ``ListField`` of files, which Swagger 2.0 cannot express, as a
+    file form field that may be repeated.
+    """
+
+    def field_to_swagger_object(self, field, swagger_object_type, use_references, **kwargs):
+        if not (isinstance(field, serializers.ListField) and isinstance(field.child, serializers.FileField)):
+            return NotHandled
+
+        SwaggerType, _ = self._get_partial_types(field, swagger_object_type, use_references, **kwargs)
+        if swagger_object_type == openapi.Parameter:
+            return SwaggerType(
+                type=openapi.TYPE_FILE,
+                description='Repeat the field to upload several files'
+            )
+        return SwaggerType(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY)
+        )
@@ -0,0 +1,36 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """A single sub-request inside a batch"""
+    METHODS = ['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE']
+
+    id = serializers.CharField(required=False, allow_blank=True)
+    method = serializers.CharField(default='GET')
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_method(self, value):
+        value = value.upper()
+        if value not in self.METHODS:
+            raise serializers.ValidationError(f"Unsupported method '{value}'.")
+        return value
+
+    def validate_path(self, value):
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError('Only /api/ endpoints can be batched.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for the batch endpoint payload"""
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests."
+            )
+        return value
@@ -0,0 +1,149 @@
+"""
+Horizontal sharding of per-user data.
+
+Each user's vehicles, vehicle images, maintenance records and reminders live
+on one database alias from ``DATABASE_SHARDS``, recorded in
+``users.ShardAssignment`` on ``default``. Everything else (users, maintenance
+types, sync tombstones, ...) lives on ``default``. Maintenance types are
+mirrored to every shard because maintenance records reference them.
+
+Queries without an instance to go by use the shard selected with
+``use_shard``; ``common.mixins.ShardRoutingMixin`` selects the requesting
+user's shard for API views.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_routers import get_read_alias
+
+SHARDED_MODELS = {
+    'vehicles.Vehicle',
+    'vehicles.VehicleImage',
+    'maintenance.MaintenanceRecord',
+    'maintenance.Reminder',
+    'maintenance.ArchivedMaintenanceRecord',
+    # Appended in the same transaction as the record it describes
+    'maintenance.OutboxEvent',
+}
+
+# Read-mostly tables copied to every shard so sharded rows can reference them
+REFERENCE_MODELS = {
+    'maintenance.MaintenanceType',
+}
+
+_current_shard = ContextVar('current_shard', default=None)
+
+
+def is_sharded():
+    return len(settings.DATABASE_SHARDS) > 1
+
+
+def get_current_shard():
+    return _current_shard.get()
+
+
+def set_current_shard(alias):
+    return _current_shard.set(alias)
+
+
+def reset_current_shard(token):
+    _current_shard.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    """Route sharded models to ``alias`` for the duration of the block."""
+    token = set_current_shard(alias)
+    try:
+        yield
+    finally:
+        reset_current_shard(token)
+
+
+def place_user(user_id):
+    """Shard for a user that has not been placed yet."""
+    shards = settings.DATABASE_SHARDS
+    return shards[user_id % len(shards)]
+
+
+def _assignment_key(user_id):
+    return f"shard:{user_id}"
+
+
+def get_assignment(user_id):
+    """Return ``(alias, is_moving)`` for a user, placing new users by id."""
+    cached = cache.get(_assignment_key(user_id))
+    if cached is not None:
+        return tuple(cached)
+    from users.models import ShardAssignment
+    assignment, _ = ShardAssignment.objects.using('default').get_or_create(
+        user_id=user_id,
+        defaults={'alias': place_user(user_id)}
+    )
+    value = (assignment.alias, assignment.is_moving)
+    cache.set(_assignment_key(user_id), value, settings.SHARD_DIRECTORY_CACHE_SECONDS)
+    return value
+
+
+def shard_for_user(user_id):
+    if not is_sharded():
+        return 'default'
+    return get_assignment(user_id)[0]
+
+
+def invalidate_assignment(user_id):
+    cache.delete(_assignment_key(user_id))
+
+
+def _instance_db(hints):
+    instance = hints.get('instance')
+    return instance._state.db if instance is not None else None
+
+
+class ShardRouter:
+    """
+    Route sharded models to the shard of the instance or of the current
+    request. Returns None for ``default`` so the replica router still applies.
+    """
+
+    def db_for_read(self, model, **hints):
+        label = model._meta.label
+        if label in SHARDED_MODELS:
+            return self._shard(hints)
+        instance_db = _instance_db(hints)
+        if instance_db is None or instance_db == 'default' or instance_db not in settings.DATABASE_SHARDS:
+            return None
+        if label in REFERENCE_MODELS:
+            return instance_db
+        # A global row (e.g. the owner) reached from a sharded row
+        return get_read_alias() or 'default'
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label in SHARDED_MODELS:
+            return self._shard(hints)
+        return None
+
+    def _shard(self, hints):
+        alias = _instance_db(hints)
+        if alias not in settings.DATABASE_SHARDS:
+            alias = get_current_shard()
+        return alias if alias and alias != 'default' else None
+
+
+def mirror_reference_row(instance):
+    """Copy a reference row from ``default`` to every other shard."""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    }
+    for alias in settings.DATABASE_SHARDS:
+        if alias == 'default':
+            continue
+        manager = model._base_manager.using(alias)
+        if not manager.filter(pk=instance.pk).update(**values):
+            manager.bulk_create([model(pk=instance.pk, **values)])
@@ -0,0 +1,258 @@
+"""
+Slow-query log. An ``execute_wrapper`` installed on every database connection
+records statements slower than SLOW_QUERY_THRESHOLD_MS into a bounded ring
+buffer, with a fingerprint, the call site and the endpoint that ran them. The
+query plan is captured with EXPLAIN on a background thread (EXPLAIN ANALYZE
+for a sampled share of SELECTs), once per fingerprint every
+SLOW_QUERY_EXPLAIN_TTL_SECONDS; later occurrences reuse that plan. At most
+SLOW_QUERY_MAX_PENDING_EXPLAINS run or wait at a time, so a struggling
+database is not handed a pile of EXPLAINs: past that, occurrences go without
+a plan. When SLOW_QUERY_DIR is set, each process
+also writes its buffer to a snapshot file so any process can read them all.
+"""
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from .metrics import registry
+from .snapshots import read_snapshots, write_snapshot
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = 'slow-queries'
+STACK_DEPTH = 8
+# Frames that wrap every request and say nothing about where a query came from
+IGNORED_FRAMES = ('common/slow_queries.py', 'common/middleware.py', 'common/profiling.py')
+
+# The request being served, so slow queries can name their endpoint
+current_request = ContextVar('current_request', default=None)
+
+_local = threading.local()
+_buffer = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+_lock = threading.Lock()
+# Fingerprint -> (plan, analyzed, monotonic time it was explained)
+_plans = {}
+# Fingerprints with an EXPLAIN queued or running
+_pending = set()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*(?:\?\s*,\s*)+\?\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Hash of the statement with literals and placeholder lists normalised away."""
+    normalized = _STRING_RE.sub('?', sql)
+    normalized = normalized.replace('%s', '?')
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST_RE.sub('(?+)', normalized)
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def call_site():
+    """Project frames of the current stack, innermost last."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(IGNORED_FRAMES)
+    ]
+    return [f"{frame.filename[len(base) + 1:]}:{frame.lineno} in {frame.name}" for frame in frames[-STACK_DEPTH:]]
+
+
+def current_endpoint():
+    request = current_request.get()
+    if request is None:
+        return None
+    from .middleware import route_label
+    return f"{request.method} {route_label(request)}"
+
+
+class SlowQueryLogger:
+    """``execute_wrapper`` that records statements over the threshold"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS and not getattr(_local, 'explaining', False):
+                record(self.alias, sql, params, many, elapsed_ms)
+
+
+def statement_type(sql):
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ''
+
+
+def record(alias, sql, params, many, elapsed_ms):
+    entry = {
+        'fingerprint': fingerprint(sql),
+        'sql': sql,
+        'params': repr(params)[:500],
+        'alias': alias,
+        'duration_ms': round(elapsed_ms, 3),
+        'endpoint': current_endpoint(),
+        'stack': call_site(),
+        'recorded_at': timezone.now().isoformat(),
+        'plan': None,
+        'analyzed': False,
+    }
+    # executemany batches can't be explained as one statement
+    explainable = not many and statement_type(sql) in ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+    with _lock:
+        _buffer.append(entry)
+        queue = explainable and claim_explain(entry)
+    if queue:
+        run_in_background(explain, entry, params)
+    else:
+        flush()
+
+
+def claim_explain(entry):
+    """
+    Give ``entry`` its fingerprint's cached plan if it is fresh, or reserve an
+    EXPLAIN for it; returns whether one should be queued. Call under ``_lock``.
+    """
+    key = entry['fingerprint']
+    cached = _plans.get(key)
+    if cached is not None and time.monotonic() - cached[2] < settings.SLOW_QUERY_EXPLAIN_TTL_SECONDS:
+        entry['plan'], entry['analyzed'] = cached[0], cached[1]
+        return False
+    if key in _pending:
+        # Filled in by the EXPLAIN already under way
+        return False
+    if len(_pending) >= settings.SLOW_QUERY_MAX_PENDING_EXPLAINS:
+        registry.inc('slow_query_explains_total', (('result', 'dropped'),))
+        return False
+    _pending.add(key)
+    return True
+
+
+def explain(entry, params):
+    """
+    Run EXPLAIN on the entry's statement and hand the plan to every buffered
+    occurrence of its fingerprint still without one.
+    """
+    connection = connections[entry['alias']]
+    analyze = (
+        statement_type(entry['sql']) == 'SELECT'
+        and connection.vendor == 'postgresql'
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_ANALYZE_SAMPLE_RATE
+    )
+    options = {'analyze': True, 'buffers': True} if analyze else {}
+    _local.explaining = True
+    try:
+        prefix = connection.ops.explain_query_prefix(**options)
+        # A savepoint keeps a failing EXPLAIN from breaking the caller's
+        # transaction when background tasks run inline.
+        with transaction.atomic(using=entry['alias']), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {entry['sql']}", params)
+            rows = cursor.fetchall()
+        plan = '\n'.join(' '.join(str(column) for column in row) for row in rows)
+        registry.inc('slow_query_explains_total', (('result', 'explained'),))
+    except Exception as e:
+        plan, analyze = f"EXPLAIN failed: {e}", False
+        registry.inc('slow_query_explains_total', (('result', 'failed'),))
+        logger.warning("Could not explain slow query %s: %s", entry['fingerprint'], e)
+    finally:
+        _local.explaining = False
+    store_plan(entry['fingerprint'], plan, analyze)
+    flush()
+
+
+def store_plan(key, plan, analyzed):
+    """Cache the plan of fingerprint ``key`` and fill it into its buffered occurrences."""
+    now = time.monotonic()
+    with _lock:
+        _pending.discard(key)
+        expired = [
+            other for other, cached in _plans.items()
+            if now - cached[2] >= settings.SLOW_QUERY_EXPLAIN_TTL_SECONDS
+        ]
+        for other in expired:
+            del _plans[other]
+        _plans[key] = (plan, analyzed, now)
+        for entry in _buffer:
+            if entry['fingerprint'] == key and entry['plan'] is None:
+                entry['plan'], entry['analyzed'] = plan, analyzed
+
+
+def flush():
+    if settings.SLOW_QUERY_DIR:
+        write_snapshot(settings.SLOW_QUERY_DIR, SNAPSHOT_PREFIX, entries(include_others=False))
+
+
+def entries(include_others=True):
+    """Slow query occurrences of this process, plus the other processes' snapshots."""
+    with _lock:
+        result = [dict(entry) for entry in _buffer]
+    if include_others and settings.SLOW_QUERY_DIR and Path(settings.SLOW_QUERY_DIR).is_dir():
+        for snapshot in read_snapshots(settings.SLOW_QUERY_DIR, SNAPSHOT_PREFIX, include_own=False):
+            result.extend(snapshot)
+    return result
+
+
+def summarize(occurrences):
+    """Group occurrences by fingerprint, slowest total time first."""
+    groups = {}
+    for entry in sorted(occurrences, key=lambda entry: entry['recorded_at']):
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'sql': entry['sql'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'endpoints': set(),
+                'stack': entry['stack'],
+                'plan': None,
+                'analyzed': False,
+                'last_seen': None,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        if entry['endpoint']:
+            group['endpoints'].add(entry['endpoint'])
+        if entry['plan']:
+            group['plan'], group['analyzed'] = entry['plan'], entry['analyzed']
+        group['last_seen'] = entry['recorded_at']
+    summaries = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+    for group in summaries:
+        group['endpoints'] = sorted(group['endpoints'])
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 3)
+        group['total_ms'] = round(group['total_ms'], 3)
+    return summaries
+
+
+def install(sender, connection, **kwargs):
+    """``connection_created`` receiver adding the logger to new connections."""
+    if settings.SLOW_QUERY_THRESHOLD_MS <= 0:
+        return
+    if not any(isinstance(wrapper, SlowQueryLogger) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLogger(connection.alias))
+
+
+connection_created.connect(install, dispatch_uid='common.slow_queries.install')
@@ -0,0 +1,41 @@
+"""
+Per-process JSON snapshot files, used to share in-process aggregates between
+the worker processes of one host. Each process owns one file and replaces it
+atomically; readers merge every file in the directory.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_snapshot(directory, prefix, data):
+    """Atomically replace this process's snapshot file."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{prefix}-", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, directory / f"{prefix}-{os.getpid()}.json")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshots(directory, prefix, include_own=True):
+    """Yield the snapshots written by every process, optionally skipping this one."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return
+    own = f"{prefix}-{os.getpid()}.json"
+    for path in sorted(directory.glob(f"{prefix}-*.json")):
+        if not include_own and path.name == own:
+            continue
+        try:
+            with open(path) as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            # Being replaced or truncated; the next scrape will pick it up
+            continue
@@ -0,0 +1,37 @@
+"""
+Minimal in-process background execution for work that should not hold up
+a request, such as set-based recomputations scheduled after a commit.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run ``func`` on a worker thread, or inline when BACKGROUND_TASKS_EAGER is set."""
+    global _executor
+    if settings.BACKGROUND_TASKS_EAGER:
+        return func(*args, **kwargs)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='background'
+        )
+    return _executor.submit(_run, func, args, kwargs)
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+        raise
+    finally:
+        # Worker threads get their own connections; don't leak them.
+        connections.close_all()
@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from common.db_routers import replica_health, replicas_enabled
+from users.models import User
+
+REPLICA = settings.DATABASE_REPLICAS[0] if settings.DATABASE_REPLICAS else None
+
+
+@skipUnless(REPLICA, 'needs a read replica, e.g. DB_ENGINE=sqlite3 DB_REPLICAS=replica.sqlite3')
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The replica is a test mirror of the primary, so both aliases see the same
+    rows; what differs is the connection each query runs on.
+    """
+    databases = {'default', *settings.DATABASE_REPLICAS[:1]}
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        # Pins only count when every worker sees them
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+        replica_health._ejected_until.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('driver@example.com', 'Dee', 'Driver', 'pw-12345-xyz'))
+
+    def list_types(self):
+        """GET the maintenance types; returns the aliases that ran queries for it."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get('/api/maintenance/maintenance-types/')
+        self.assertEqual(response.status_code, 200)
+        return {alias for alias, queries in (('default', primary), (REPLICA, replica)) if len(queries)}
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.list_types(), {REPLICA})
+
+    def test_reads_after_a_write_are_pinned_to_the_primary(self):
+        response = self.client.post('/api/maintenance/maintenance-types/', {'name': 'Oil change'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.list_types(), {'default'})
+
+    def test_replicas_are_off_without_a_shared_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(replicas_enabled())
+            self.assertEqual(self.list_types(), {'default'})
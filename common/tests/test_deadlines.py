@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from common import deadlines
+from maintenance.views import MaintenanceRecordViewSet
+from users.models import User
+
+RECORD_LIST = 'maintenance:maintenance-record-list'
+
+
+def slow_list(self, request, *args, **kwargs):
+    """Stand-in for a list that runs one statement for several seconds."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_sleep(5)')
+        else:
+            cursor.execute(
+                'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) '
+                'SELECT count(*) FROM n'
+            )
+        return Response(cursor.fetchone())
+
+
+@override_settings(
+    EXPENSIVE_ROUTES=[RECORD_LIST],
+    EXPENSIVE_ROUTE_DEADLINE_MS=100,
+    EXPENSIVE_ROUTE_MAX_IN_FLIGHT=1,
+    LOAD_SHED_RETRY_AFTER_SECONDS=7,
+)
+class DeadlineTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('driver@example.com', 'Dee', 'Driver', 'pw-12345-xyz'))
+
+    def test_statement_over_the_deadline_is_cut_short_with_503(self):
+        with mock.patch.object(MaintenanceRecordViewSet, 'list', slow_list):
+            response = self.client.get('/api/maintenance/records/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(response.json()['detail'], deadlines.DeadlineExceeded.default_detail)
+
+    def test_batch_sub_request_gets_its_route_deadline(self):
+        with mock.patch.object(MaintenanceRecordViewSet, 'list', slow_list):
+            response = self.client.post('/api/batch/', {'requests': [
+                {'method': 'GET', 'path': '/api/maintenance/records/'},
+            ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['responses'][0]['status'], 503)
+
+    def test_requests_over_the_in_flight_limit_are_shed(self):
+        self.assertTrue(deadlines.limiter.acquire(RECORD_LIST, 1))
+        self.addCleanup(deadlines.limiter.release, RECORD_LIST)
+        with mock.patch.object(MaintenanceRecordViewSet, 'list') as view:
+            response = self.client.get('/api/maintenance/records/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(response.json()['detail'], deadlines.Overloaded.default_detail)
+        view.assert_not_called()
+
+    def test_slot_is_released_after_the_response(self):
+        with mock.patch.object(MaintenanceRecordViewSet, 'list', lambda self, request: Response([])):
+            self.assertEqual(self.client.get('/api/maintenance/records/').status_code, 200)
+            self.assertEqual(self.client.get('/api/maintenance/records/').status_code, 200)
+        self.assertEqual(deadlines.limiter.in_flight[RECORD_LIST], 0)
+
+    def test_writes_are_not_budgeted(self):
+        self.assertEqual(deadlines.route_budget(RECORD_LIST, 'POST'), (0, 1))
+        self.assertEqual(deadlines.route_budget(RECORD_LIST, 'GET'), (100, 1))
@@ -0,0 +1,207 @@
+import hmac
+import io
+import json
+import logging
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.urls import Resolver404, resolve
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .deadlines import DeadlineExceeded, budgeted
+from .metrics import render_prometheus
+from .middleware import staff_user
+from .profiling import artifact_path, list_artifacts
+from . import schema, slow_queries
+from .serializers import BatchSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class BatchView(APIView):
+    """
+    Execute several API sub-requests in one round trip.
+
+    Sub-requests are dispatched in-process through the URL resolver and run
+    as the user authenticated for the batch itself, so the JWT is validated
+    once. Items flagged ``atomic`` run in their own transaction, which is
+    rolled back when the sub-request fails. Each sub-request gets the query
+    budget and takes an in-flight slot of its own route (``common.deadlines``).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchSerializer
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        responses = [
+            self.execute(request, item)
+            for item in serializer.validated_data['requests']
+        ]
+        return Response({'responses': responses})
+
+    def execute(self, request, item):
+        """Run one sub-request and return its status and decoded body."""
+        result = {'id': item.get('id'), 'status': None, 'body': None}
+        subrequest = self.build_subrequest(request, item)
+        try:
+            match = resolve(subrequest.path_info)
+        except Resolver404:
+            result['status'] = status.HTTP_404_NOT_FOUND
+            result['body'] = {'detail': 'Not found.'}
+            return result
+        if getattr(match.func, 'cls', None) is BatchView:
+            result['status'] = status.HTTP_400_BAD_REQUEST
+            result['body'] = {'detail': 'Batches cannot be nested.'}
+            return result
+
+        subrequest.resolver_match = match
+        try:
+            with budgeted(match.view_name, item['method']):
+                if item['atomic']:
+                    with transaction.atomic():
+                        response = self.dispatch_subrequest(subrequest, match)
+                        if response.status_code >= 400:
+                            transaction.set_rollback(True)
+                else:
+                    response = self.dispatch_subrequest(subrequest, match)
+                # Streamed bodies run their queries as they are read
+                body = self.decode_body(response)
+        except DeadlineExceeded as exc:
+            result['status'] = exc.status_code
+            result['body'] = {'detail': exc.detail}
+            return result
+        except Exception:
+            logger.exception("Batch sub-request %s %s failed", item['method'], item['path'])
+            result['status'] = status.HTTP_500_INTERNAL_SERVER_ERROR
+            result['body'] = {'detail': 'Internal server error.'}
+            return result
+
+        result['status'] = response.status_code
+        result['body'] = body
+        return result
+
+    def build_subrequest(self, request, item):
+        """Build a Django request for ``item`` that reuses the batch's authentication."""
+        path, _, query_string = item['path'].partition('?')
+        body = b''
+        if item.get('body') is not None:
+            body = json.dumps(item['body']).encode('utf-8')
+
+        environ = {
+            key: value for key, value in request.META.items()
+            if not key.startswith('wsgi.')
+        }
+        environ.update({
+            'REQUEST_METHOD': item['method'],
+            'PATH_INFO': path,
+            'QUERY_STRING': query_string,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': request.scheme,
+        })
+        subrequest = WSGIRequest(environ)
+        # DRF authenticates requests carrying these attributes without
+        # re-validating the token.
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+        return subrequest
+
+    def dispatch_subrequest(self, subrequest, match):
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+
+    def decode_body(self, response):
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        if not content:
+            return None
+        if response.get('Content-Type', '').startswith('application/json'):
+            return json.loads(content)
+        return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+def metrics_view(request):
+    """
+    Expose metrics in the Prometheus text format. Scrapers send METRICS_TOKEN
+    as a bearer token; without a token configured only staff users can read
+    them.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+            return HttpResponseForbidden()
+    elif staff_user(request) is None:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+class ProfileListView(APIView):
+    """List the stored request profiles, newest first (staff only)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_artifacts())
+
+
+class ProfileDownloadView(APIView):
+    """Download a profile as a pstats ``.prof`` file or its JSON summary (staff only)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, artifact_id, suffix):
+        path = artifact_path(artifact_id, suffix)
+        if path is None or not path.exists():
+            raise Http404
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=path.name,
+            content_type='application/json' if suffix == 'json' else 'application/octet-stream'
+        )
+
+
+class SlowQueryView(APIView):
+    """
+    Slow queries grouped by fingerprint with their plans (staff only).
+    ``?fingerprint=`` returns the individual occurrences of one query instead.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        occurrences = slow_queries.entries()
+        fingerprint = request.query_params.get('fingerprint')
+        if fingerprint:
+            return Response([entry for entry in occurrences if entry['fingerprint'] == fingerprint])
+        return Response(slow_queries.summarize(occurrences))
+
+
+@require_GET
+@cache_control(public=True, max_age=300)
+@condition(etag_func=lambda request, fmt: schema.get_document(fmt).etag)
+def schema_view(request, fmt):
+    """Serve the precomputed OpenAPI schema as JSON or YAML."""
+    return HttpResponse(schema.get_document(fmt).content, content_type=schema.FORMATS[fmt])
+
+
+@require_GET
+@cache_control(public=True, max_age=300)
+@condition(etag_func=lambda request, ui: schema.get_docs_page(ui).etag)
+def docs_view(request, ui):
+    """Serve the Swagger UI or ReDoc page for the precomputed schema."""
+    return HttpResponse(schema.get_docs_page(ui).content, content_type='text/html; charset=utf-8')
@@ -0,0 +1,62 @@
+"""
+Worker warm-up, run from ``config.wsgi`` when WARM_UP_ON_START is set, so the
+cost of the first request is paid before the worker accepts traffic.
+"""
+import logging
+import time
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def iter_views(patterns):
+    """Yield the view callables of every pattern, importing lazy URL modules."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def serializer_classes(callback):
+    """Serializer classes a DRF view can use, one per viewset action."""
+    view_class = getattr(callback, 'cls', None)
+    if view_class is None:
+        return set()
+    actions = getattr(callback, 'actions', None) or {'get': None}
+    classes = set()
+    for action in set(actions.values()):
+        view = view_class()
+        view.action = action
+        view.request = None
+        view.format_kwarg = None
+        view.kwargs = {}
+        try:
+            classes.add(view.get_serializer_class())
+        except Exception:
+            # Views without a serializer or that need a real request
+            continue
+    return classes
+
+
+def warm_up():
+    start = time.perf_counter()
+    resolver = get_resolver()
+    # Builds the reverse() lookup tables, importing every URL module
+    resolver.reverse_dict
+
+    serializers = set()
+    for callback in iter_views(resolver.url_patterns):
+        serializers |= serializer_classes(callback)
+    for serializer_class in serializers:
+        try:
+            # Builds the field map, filling the model _meta caches on the way
+            serializer_class(context={}).fields
+        except Exception as e:
+            logger.warning("Could not warm up %s: %s", serializer_class.__name__, e)
+
+    logger.info(
+        "Worker warmed up in %.0f ms (%d serializers)",
+        (time.perf_counter() - start) * 1000, len(serializers)
+    )
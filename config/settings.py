@@ -35,18 +35,36 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'common',
     'users',
     'vehicles',
     'maintenance',
+    'sync',
+    'exports',
 ]
 
+# Worker startup: API-only worker pools can drop the admin and the API docs,
+# defer importing URL modules until they are routed to, and warm up before
+# taking traffic (see `manage.py profile_startup`)
+ENABLE_ADMIN = os.getenv('ENABLE_ADMIN', 'True') == 'True'
+ENABLE_API_DOCS = os.getenv('ENABLE_API_DOCS', 'True') == 'True'
+LAZY_URLCONF = os.getenv('LAZY_URLCONF', 'False') == 'True'
+WARM_UP_ON_START = os.getenv('WARM_UP_ON_START', 'False') == 'True'
+if not ENABLE_ADMIN:
+    INSTALLED_APPS.remove('django.contrib.admin')
+if not ENABLE_API_DOCS:
+    INSTALLED_APPS.remove('drf_yasg')
+
 MIDDLEWARE = [
+    'common.middleware.MetricsMiddleware',
+    'common.middleware.DeadlineMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,14 +90,67 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
-DATABASES = {
+DB_ENGINE = os.getenv('DB_ENGINE', 'postgresql')
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'maintenance_tracker_db'),
+            'USER': os.environ.get('DB_USER', 'main_tracker_user'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+        }
+    }
+
+# User-id shards beyond default: comma-separated hosts (PostgreSQL) or database files (SQLite)
+DATABASE_SHARDS = ['default']
+for index, location in enumerate(filter(None, os.getenv('DB_SHARDS', '').split(',')), start=1):
+    shard = dict(DATABASES['default'])
+    shard['NAME' if DB_ENGINE == 'sqlite3' else 'HOST'] = location.strip()
+    DATABASES[f'shard_{index}'] = shard
+    DATABASE_SHARDS.append(f'shard_{index}')
+
+# Seconds a user's shard assignment may be served from the cache
+SHARD_DIRECTORY_CACHE_SECONDS = int(os.getenv('SHARD_DIRECTORY_CACHE_SECONDS', '60'))
+# Primary keys on shard N start at N * SHARD_ID_SPACE so rows can move between shards
+SHARD_ID_SPACE = 10 ** 12
+
+# Read replicas: comma-separated hosts (PostgreSQL) or database files (SQLite); used only with a shared CACHE_BACKEND
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    replica['NAME' if DB_ENGINE == 'sqlite3' else 'HOST'] = location.strip()
+    DATABASES[f'replica_{index}'] = replica
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = [
+    'common.sharding.ShardRouter',
+    'common.db_routers.ReplicaRouter',
+]
+
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '10'))
+REPLICA_EJECT_SECONDS = int(os.getenv('REPLICA_EJECT_SECONDS', '30'))
+REPLICA_MAX_LAG_SECONDS = int(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))
+# Seconds a user keeps reading from the primary after a write; never shorter than the
+# lag a replica may reach before it is ejected, or users could miss their own writes
+REPLICA_PIN_SECONDS = max(
+    int(os.getenv('REPLICA_PIN_SECONDS', '0')),
+    REPLICA_MAX_LAG_SECONDS + REPLICA_HEALTH_CHECK_INTERVAL
+)
+
+# Cache (shared across workers in production, e.g. Redis or Memcached)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ.get('DB_NAME', 'maintenance_tracker_db'),
-        'USER': os.environ.get('DB_USER', 'main_tracker_user'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '5432'),
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -149,6 +220,121 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
 }
 
+# Offline sync settings
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+SYNC_WATERMARK_OVERLAP_SECONDS = int(os.getenv('SYNC_WATERMARK_OVERLAP_SECONDS', '5'))
+
+# Admin changelist settings for very large tables
+ADMIN_SCALE_MODE = os.getenv('ADMIN_SCALE_MODE', 'False') == 'True'
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '10000'))
+
+# Prometheus metrics: set METRICS_DIR to share metrics between worker processes
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+# Bearer token scrapers send to /metrics; without one only staff users can read it
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# On-demand profiling of staff requests (X-Profile header or ?_profile)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_ARTIFACTS = int(os.getenv('PROFILING_MAX_ARTIFACTS', '50'))
+
+# Slow-query log: statements slower than the threshold (0 disables) are kept
+# with their EXPLAIN plan; a share of slow SELECTs gets EXPLAIN ANALYZE on PostgreSQL
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_EXPLAIN_ANALYZE_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE_SAMPLE_RATE', '0'))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', '200'))
+# Each fingerprint is explained at most once per TTL, with at most this many EXPLAINs queued
+SLOW_QUERY_EXPLAIN_TTL_SECONDS = int(os.getenv('SLOW_QUERY_EXPLAIN_TTL_SECONDS', '300'))
+SLOW_QUERY_MAX_PENDING_EXPLAINS = int(os.getenv('SLOW_QUERY_MAX_PENDING_EXPLAINS', '2'))
+# Directory shared by the worker processes of a host; empty keeps the log per process
+SLOW_QUERY_DIR = os.getenv('SLOW_QUERY_DIR', '')
+
+# Directory holding the OpenAPI schema rendered by `manage.py generate_schema`
+OPENAPI_SCHEMA_DIR = os.getenv('OPENAPI_SCHEMA_DIR', BASE_DIR / 'openapi')
+SWAGGER_SETTINGS = {
+    'DEFAULT_FIELD_INSPECTORS': [
+        'common.schema_inspectors.FileListFieldInspector',
+        'drf_yasg.inspectors.CamelCaseJSONFilter',
+        'drf_yasg.inspectors.RecursiveFieldInspector',
+        'drf_yasg.inspectors.ReferencingSerializerInspector',
+        'drf_yasg.inspectors.ChoiceFieldInspector',
+        'drf_yasg.inspectors.FileFieldInspector',
+        'drf_yasg.inspectors.DictFieldInspector',
+        'drf_yasg.inspectors.JSONFieldInspector',
+        'drf_yasg.inspectors.HiddenFieldInspector',
+        'drf_yasg.inspectors.RelatedFieldInspector',
+        'drf_yasg.inspectors.SerializerMethodFieldInspector',
+        'drf_yasg.inspectors.SimpleFieldInspector',
+        'drf_yasg.inspectors.StringDefaultFieldInspector',
+    ],
+}
+
+# Maintenance history exports (files are private; downloads go through the API)
+EXPORTS_DIR = os.getenv('EXPORTS_DIR', BASE_DIR / 'exports_data')
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+EXPORT_RETENTION_HOURS = int(os.getenv('EXPORT_RETENTION_HOURS', '24'))
+EXPORT_MAX_ACTIVE_PER_USER = int(os.getenv('EXPORT_MAX_ACTIVE_PER_USER', '3'))
+# Pending exports not started within this many minutes were lost with their worker's queue and are failed
+EXPORT_PENDING_TIMEOUT_MINUTES = int(os.getenv('EXPORT_PENDING_TIMEOUT_MINUTES', '30'))
+# Running exports older than this are taken for dead workers and failed
+EXPORT_RUNNING_TIMEOUT_MINUTES = int(os.getenv('EXPORT_RUNNING_TIMEOUT_MINUTES', '60'))
+
+# Rows serialized at a time by list endpoints in streaming mode (?stream=true)
+STREAMING_LIST_CHUNK_SIZE = int(os.getenv('STREAMING_LIST_CHUNK_SIZE', '500'))
+
+# Per-user cache of the upcoming records/reminders endpoints (needs a shared CACHE_BACKEND; off with LocMemCache)
+UPCOMING_CACHE_ENABLED = os.getenv('UPCOMING_CACHE_ENABLED', 'True') == 'True'
+
+# Largest page a client can ask the vehicle timeline for (?page_size)
+TIMELINE_MAX_PAGE_SIZE = int(os.getenv('TIMELINE_MAX_PAGE_SIZE', '100'))
+
+# Rows removed per statement when deleted vehicles and accounts are purged in the background
+DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', '500'))
+
+# Bulk vehicle import (/api/vehicles/import/): rows per upsert statement and per request
+VEHICLE_IMPORT_CHUNK_SIZE = int(os.getenv('VEHICLE_IMPORT_CHUNK_SIZE', '500'))
+VEHICLE_IMPORT_MAX_ROWS = int(os.getenv('VEHICLE_IMPORT_MAX_ROWS', '10000'))
+
+# Completed maintenance records older than this move to the archive (archive_maintenance_records)
+MAINTENANCE_ARCHIVE_AFTER_DAYS = int(os.getenv('MAINTENANCE_ARCHIVE_AFTER_DAYS', str(3 * 365)))
+
+# Outbox events (reminder and mileage side effects of record writes) applied per transaction
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '500'))
+# Failed dispatches after which an event is quarantined (dispatch_outbox --retry-failed requeues it)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+
+# Query time budget of a request in ms (0: none), and of the expensive routes, which also
+# admit only so many requests at a time per process; see common.deadlines
+REQUEST_DEADLINE_MS = int(os.getenv('REQUEST_DEADLINE_MS', '30000'))
+EXPENSIVE_ROUTES = os.getenv(
+    'EXPENSIVE_ROUTES',
+    'maintenance:maintenance-record-list,maintenance:reminder-list,'
+    'maintenance:maintenance-type-cost-benchmark,vehicles:vehicle-timeline,sync:sync,batch'
+).split(',')
+EXPENSIVE_ROUTE_DEADLINE_MS = int(os.getenv('EXPENSIVE_ROUTE_DEADLINE_MS', '5000'))
+EXPENSIVE_ROUTE_MAX_IN_FLIGHT = int(os.getenv('EXPENSIVE_ROUTE_MAX_IN_FLIGHT', '4'))
+# Retry-After (seconds) of the 503s sent when a request is shed or runs out of time
+LOAD_SHED_RETRY_AFTER_SECONDS = int(os.getenv('LOAD_SHED_RETRY_AFTER_SECONDS', '5'))
+
+# Batch endpoint settings
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+
+# Background work run on in-process worker threads after commit
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', '2'))
+
+# Next due recomputation when maintenance type intervals change
+NEXT_DUE_RECOMPUTE_BATCH_SIZE = int(os.getenv('NEXT_DUE_RECOMPUTE_BATCH_SIZE', '500'))
+
+# Cost benchmark settings (t-digest compression; higher is more accurate and larger)
+COST_SKETCH_COMPRESSION = int(os.getenv('COST_SKETCH_COMPRESSION', '100'))
+
+# Endpoint benchmark suite (manage.py benchmark_endpoints)
+BENCHMARK_BASELINE_DIR = BASE_DIR / 'benchmarks' / 'baselines'
+# Fractional slowdown or memory growth over the baseline that fails the run
+BENCHMARK_REGRESSION_THRESHOLD = float(os.getenv('BENCHMARK_REGRESSION_THRESHOLD', '0.25'))
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 CORS_ALLOWED_ORIGINS = os.getenv(
@@ -1,33 +1,59 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-# Schema view for API documentation
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Vehicle Maintenance Tracker API",
-      default_version='v1',
-      description="API for tracking vehicle maintenance schedules and reminders",
-      terms_of_service="https://www.example.com/terms/",
-      contact=openapi.Contact(email="contact@maintenancetracker.com"),
-      license=openapi.License(name="MIT License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
+from common.views import (
+    BatchView,
+    ProfileDownloadView,
+    ProfileListView,
+    SlowQueryView,
+    docs_view,
+    metrics_view,
+    schema_view,
 )
 
-urlpatterns = [
+
+def api_include(module, app_name):
+    """
+    ``include()`` that, with LAZY_URLCONF, leaves ``module`` unimported until
+    a request is routed under its prefix (or something reverses a URL).
+    """
+    if settings.LAZY_URLCONF:
+        return (module, app_name, app_name)
+    return include(module)
+
+
+urlpatterns = []
+
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+
     # Admin site
-    path('admin/', admin.site.urls),
-    
-    # API Documentation
-    path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.ENABLE_API_DOCS:
+    # API Documentation (precomputed by `manage.py generate_schema`)
+    urlpatterns += [
+        path('api/schema.json', schema_view, {'fmt': 'json'}, name='schema-json'),
+        path('api/schema.yaml', schema_view, {'fmt': 'yaml'}, name='schema-yaml'),
+        path('api/docs/', docs_view, {'ui': 'swagger'}, name='schema-swagger-ui'),
+        path('api/redoc/', docs_view, {'ui': 'redoc'}, name='schema-redoc'),
+    ]
+
+urlpatterns += [
     # API endpoints
-    path('api/auth/', include('users.urls')),
-    path('api/vehicles/', include('vehicles.urls')),
-    path('api/maintenance/', include('maintenance.urls')),
+    path('api/auth/', api_include('users.urls', 'users')),
+    path('api/vehicles/', api_include('vehicles.urls', 'vehicles')),
+    path('api/maintenance/', api_include('maintenance.urls', 'maintenance')),
+    path('api/sync/', api_include('sync.urls', 'sync')),
+    path('api/exports/', api_include('exports.urls', 'exports')),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+
+    # Monitoring
+    path('metrics', metrics_view, name='metrics'),
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path(
+        'api/profiles/<str:artifact_id>.<str:suffix>',
+        ProfileDownloadView.as_view(),
+        name='profile-download'
+    ),
+    path('api/slow-queries/', SlowQueryView.as_view(), name='slow-queries'),
 ]
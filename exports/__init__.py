@@ -0,0 +1,2 @@
+# This file makes Python treat the directory as a Python package.
+default_app_config = 'exports.apps.ExportsConfig'
\ No newline at end of file
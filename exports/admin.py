@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import ExportJob
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'vehicle_id', 'format', 'status', 'row_count', 'file_size', 'created_at')
+    list_filter = ('status', 'format')
+    list_select_related = ('user',)
+    search_fields = ('user__email',)
+    readonly_fields = (
+        'user', 'vehicle_id', 'format', 'status', 'row_count', 'file_name', 'file_size',
+        'error', 'started_at', 'finished_at', 'expires_at', 'created_at', 'updated_at'
+    )
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class ExportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'exports'
+
+    def ready(self):
+        # Import signals to register them
+        import exports.signals  # noqa
@@ -0,0 +1,245 @@
+"""
+Export job runner. Rows are streamed from the database with
+``.iterator(chunk_size=EXPORT_CHUNK_SIZE)`` straight into the output file, so
+memory use does not grow with the size of the history.
+"""
+import csv
+import gzip
+import heapq
+import json
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from common.sharding import shard_for_user, use_shard
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# (column name, queryset lookup)
+COLUMNS = [
+    ('record_id', 'id'),
+    ('date_performed', 'date_performed'),
+    ('status', 'status'),
+    ('maintenance_type', 'maintenance_type__name'),
+    ('vehicle_id', 'vehicle_id'),
+    ('make', 'vehicle__make'),
+    ('model', 'vehicle__model_name'),
+    ('registration_number', 'vehicle__registration_number'),
+    ('vin_number', 'vehicle__vin_number'),
+    ('mileage_at_service', 'mileage_at_service'),
+    ('cost', 'cost'),
+    ('service_provider', 'service_provider'),
+    ('notes', 'notes'),
+    ('next_due_date', 'next_due_date'),
+    ('next_due_mileage', 'next_due_mileage'),
+    ('reminder_count', 'reminder_count'),
+    ('next_reminder_due_date', 'next_reminder_due_date'),
+]
+
+
+# Position of the (vehicle_id, date_performed, record_id) sort key in a row
+SORT_KEY = [[name for name, _ in COLUMNS].index(name) for name in ('vehicle_id', 'date_performed', 'record_id')]
+
+
+def history_rows(job):
+    """
+    Yield the job's maintenance records, live and archived, as tuples in
+    ``COLUMNS`` order.
+    """
+    return heapq.merge(
+        live_history_rows(job),
+        archived_history_rows(job),
+        key=lambda row: tuple(row[index] for index in SORT_KEY)
+    )
+
+
+def job_records(model, job):
+    records = model.objects.filter(
+        vehicle__user_id=job.user_id,
+        vehicle__pending_delete_at__isnull=True
+    )
+    if job.vehicle_id:
+        records = records.filter(vehicle_id=job.vehicle_id)
+    return records.order_by('vehicle_id', 'date_performed', 'pk')
+
+
+def live_history_rows(job):
+    reminders = Reminder.objects.filter(maintenance_record=OuterRef('pk')).order_by()
+    records = job_records(MaintenanceRecord, job).annotate(
+        reminder_count=Coalesce(
+            Subquery(
+                reminders.values('maintenance_record').annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField()
+            ),
+            0
+        ),
+        next_reminder_due_date=Subquery(
+            reminders.filter(is_completed=False).order_by('due_date').values('due_date')[:1]
+        ),
+    )
+    return records.values_list(*[lookup for _, lookup in COLUMNS]).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+
+
+def archived_history_rows(job):
+    """Archived records in the same layout; their reminders are counted from the stored JSON."""
+    lookups = [lookup for _, lookup in COLUMNS[:-2]] + ['reminders']
+    rows = job_records(ArchivedMaintenanceRecord, job).values_list(*lookups)
+    for row in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        reminders = row[-1]
+        # Only records without open reminders are archived
+        yield row[:-1] + (len(reminders), None)
+
+
+def write_csv(path, rows):
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in COLUMNS])
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_jsonl(path, rows):
+    names = [name for name, _ in COLUMNS]
+    encoder = DjangoJSONEncoder()
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(encoder.encode(dict(zip(names, row))))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def write_xlsx(path, rows):
+    # Write-only workbooks stream rows to disk instead of keeping them
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Maintenance history')
+    sheet.append([name for name, _ in COLUMNS])
+    count = 0
+    for row in rows:
+        sheet.append(list(row))
+        count += 1
+    workbook.save(path)
+    return count
+
+
+WRITERS = {
+    ExportJob.Format.CSV: write_csv,
+    ExportJob.Format.JSONL: write_jsonl,
+    ExportJob.Format.XLSX: write_xlsx,
+}
+
+
+def xlsx_available():
+    try:
+        import openpyxl  # noqa
+    except ImportError:
+        return False
+    return True
+
+
+def fail_stalled_jobs(**filters):
+    """
+    Fail the jobs a lost worker will never finish, so they stop counting
+    toward the per-user limit: PENDING jobs not picked up within
+    EXPORT_PENDING_TIMEOUT_MINUTES (the queue is in-process and dies with a
+    restart) and RUNNING jobs older than EXPORT_RUNNING_TIMEOUT_MINUTES.
+    """
+    now = timezone.now()
+    never_started = ExportJob.objects.filter(
+        status=ExportJob.Status.PENDING,
+        created_at__lt=now - timedelta(minutes=settings.EXPORT_PENDING_TIMEOUT_MINUTES),
+        **filters
+    ).update(
+        status=ExportJob.Status.FAILED,
+        error='The export was never started.',
+        finished_at=now,
+        updated_at=now
+    )
+    stalled = list(ExportJob.objects.filter(
+        status=ExportJob.Status.RUNNING,
+        started_at__lt=now - timedelta(minutes=settings.EXPORT_RUNNING_TIMEOUT_MINUTES),
+        **filters
+    ).values_list('pk', 'format'))
+    timed_out = 0
+    if stalled:
+        timed_out = ExportJob.objects.filter(
+            pk__in=[pk for pk, _ in stalled], status=ExportJob.Status.RUNNING
+        ).update(
+            status=ExportJob.Status.FAILED,
+            error='The export did not finish in time.',
+            finished_at=now,
+            updated_at=now
+        )
+        directory = Path(settings.EXPORTS_DIR)
+        for pk, export_format in stalled:
+            (directory / f".{pk}.{ExportJob.EXTENSIONS[export_format]}.tmp").unlink(missing_ok=True)
+    if never_started or timed_out:
+        logger.warning(
+            "Failed %d export job(s) never started and %d left running by a lost worker",
+            never_started, timed_out
+        )
+    return never_started + timed_out
+
+
+def run_export(job_id):
+    """Write the export file for a pending job and record the outcome."""
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING,
+        started_at=timezone.now(),
+        updated_at=timezone.now()
+    )
+    if not claimed:
+        return
+    job = ExportJob.objects.get(pk=job_id)
+
+    directory = Path(settings.EXPORTS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    file_name = f"{job.pk}.{ExportJob.EXTENSIONS[job.format]}"
+    tmp_path = directory / f".{file_name}.tmp"
+    try:
+        with use_shard(shard_for_user(job.user_id)):
+            row_count = WRITERS[job.format](tmp_path, history_rows(job))
+        os.replace(tmp_path, directory / file_name)
+    except Exception as e:
+        logger.exception("Export job %s failed", job.pk)
+        tmp_path.unlink(missing_ok=True)
+        ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.RUNNING).update(
+            status=ExportJob.Status.FAILED,
+            error=str(e)[:1000],
+            finished_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+        return
+
+    finished = timezone.now()
+    # A job that outran its timeout has been failed already; keep it that way
+    completed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.RUNNING).update(
+        status=ExportJob.Status.COMPLETED,
+        row_count=row_count,
+        file_name=file_name,
+        file_size=(directory / file_name).stat().st_size,
+        finished_at=finished,
+        expires_at=finished + timedelta(hours=settings.EXPORT_RETENTION_HOURS),
+        updated_at=finished
+    )
+    if not completed:
+        (directory / file_name).unlink(missing_ok=True)
+        return
+    logger.info("Export job %s wrote %d rows", job.pk, row_count)
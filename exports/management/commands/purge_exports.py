@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from exports.exporters import fail_stalled_jobs
+from exports.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = 'Fail exports lost by a dead worker, then delete expired export jobs and their files, plus jobs that never completed'
+
+    def handle(self, *args, **options):
+        stalled_count = fail_stalled_jobs()
+        now = timezone.now()
+        stale = now - timedelta(hours=settings.EXPORT_RETENTION_HOURS)
+        # Deleting through the ORM fires the signal that removes each file
+        deleted_count, _ = ExportJob.objects.filter(
+            Q(expires_at__lt=now) | Q(expires_at__isnull=True, created_at__lt=stale)
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Failed {stalled_count} stalled and deleted {deleted_count} export job(s)"
+        ))
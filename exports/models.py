@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from common.models import BaseModel
+
+
+class ExportJob(BaseModel):
+    """Maintenance history export written to a file off the request thread"""
+
+    class Format(models.TextChoices):
+        CSV = 'csv', _('CSV')
+        JSONL = 'jsonl', _('JSON Lines')
+        XLSX = 'xlsx', _('Excel workbook')
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    # Compressed text formats; xlsx files are zip archives already
+    EXTENSIONS = {
+        Format.CSV: 'csv.gz',
+        Format.JSONL: 'jsonl.gz',
+        Format.XLSX: 'xlsx',
+    }
+    CONTENT_TYPES = {
+        Format.CSV: 'application/gzip',
+        Format.JSONL: 'application/gzip',
+        Format.XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name=_('user')
+    )
+    # Plain id: vehicles may live on another database shard
+    vehicle_id = models.BigIntegerField(
+        _('vehicle id'),
+        null=True,
+        blank=True,
+        help_text=_('Export a single vehicle; leave empty for the whole fleet')
+    )
+    format = models.CharField(_('format'), max_length=10, choices=Format.choices, default=Format.CSV)
+    status = models.CharField(_('status'), max_length=20, choices=Status.choices, default=Status.PENDING)
+    row_count = models.PositiveIntegerField(_('row count'), default=0)
+    file_name = models.CharField(_('file name'), max_length=100, blank=True)
+    file_size = models.PositiveBigIntegerField(_('file size'), null=True, blank=True)
+    error = models.TextField(_('error'), blank=True)
+    started_at = models.DateTimeField(_('started at'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+    expires_at = models.DateTimeField(_('expires at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('export job')
+        verbose_name_plural = _('export jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='export_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} export {self.pk} ({self.status})"
+
+    @property
+    def path(self):
+        return Path(settings.EXPORTS_DIR) / self.file_name if self.file_name else None
+
+    @property
+    def download_name(self):
+        scope = f"vehicle-{self.vehicle_id}" if self.vehicle_id else 'fleet'
+        return f"maintenance-history-{scope}-{self.pk}.{self.EXTENSIONS[self.format]}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= timezone.now()
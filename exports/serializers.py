@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import serializers
+
+from vehicles.models import Vehicle
+from .exporters import fail_stalled_jobs, xlsx_available
+from .models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'vehicle_id', 'format', 'status', 'row_count', 'file_size',
+            'error', 'created_at', 'started_at', 'finished_at', 'expires_at',
+            'download_url'
+        ]
+        read_only_fields = [
+            'id', 'status', 'row_count', 'file_size', 'error', 'created_at',
+            'started_at', 'finished_at', 'expires_at'
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.Status.COMPLETED or obj.is_expired:
+            return None
+        url = reverse('exports:export-job-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate_vehicle_id(self, value):
+        if value is not None:
+            user = self.context['request'].user
+            if not Vehicle.objects.filter(pk=value, user=user, pending_delete_at__isnull=True).exists():
+                raise serializers.ValidationError('Vehicle not found.')
+        return value
+
+    def validate_format(self, value):
+        if value == ExportJob.Format.XLSX and not xlsx_available():
+            raise serializers.ValidationError('XLSX exports require the openpyxl package.')
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        fail_stalled_jobs(user=user)
+        active = ExportJob.objects.filter(
+            user=user,
+            status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING]
+        ).count()
+        if active >= settings.EXPORT_MAX_ACTIVE_PER_USER:
+            raise serializers.ValidationError(
+                f"You already have {active} exports in progress. Wait for one to finish."
+            )
+        return attrs
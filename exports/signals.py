@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ExportJob
+
+
+@receiver(post_delete, sender=ExportJob)
+def delete_export_file(sender, instance, **kwargs):
+    """Remove the export file with its job (also on account deletion)."""
+    if instance.path is not None:
+        instance.path.unlink(missing_ok=True)
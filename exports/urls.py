@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+app_name = 'exports'
+
+router = DefaultRouter()
+router.register(r'', views.ExportJobViewSet, basename='export-job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,118 @@
+import re
+
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import mixins, renderers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from common.mixins import ShardRoutingMixin
+from common.tasks import run_in_background
+from .exporters import run_export
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """Accept any media type for downloads; the view builds the response itself"""
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single ``bytes=`` range, ``None``
+    to send the whole file, or raise ``ValueError`` when it can't be satisfied.
+    Multiple ranges are answered with the whole file, which RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def read_file(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class ExportJobViewSet(ShardRoutingMixin, mixins.CreateModelMixin, mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Start maintenance history exports (CSV, JSON Lines or XLSX) for the whole
+    fleet or one vehicle, poll their status and download the finished files.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ExportJob.objects.none()
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(user=request.user)
+        transaction.on_commit(lambda: run_in_background(run_export, job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], renderer_classes=[renderers.JSONRenderer, PassthroughRenderer])
+    def download(self, request, pk=None):
+        """Download the export file; supports single-range ``Range`` requests."""
+        job = self.get_object()
+        if job.status != ExportJob.Status.COMPLETED:
+            return Response({'detail': f"Export is {job.status}."}, status=status.HTTP_409_CONFLICT)
+        if job.is_expired or not job.path.exists():
+            return Response({'detail': 'Export has expired.'}, status=status.HTTP_410_GONE)
+
+        size = job.file_size
+        etag = f'"export-{job.pk}-{size}-{int(job.finished_at.timestamp())}"'
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        # If-Range: only honour the range when the client has the same file
+        if range_header and request.META.get('HTTP_IF_RANGE', etag) == etag:
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f"bytes */{size}"
+                return response
+
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            read_file(job.path, start, end - start + 1),
+            status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            content_type=ExportJob.CONTENT_TYPES[job.format]
+        )
+        response['Content-Length'] = str(end - start + 1 if size else 0)
+        if byte_range:
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Content-Disposition'] = f'attachment; filename="{job.download_name}"'
+        return response
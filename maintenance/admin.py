@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import MaintenanceType, MaintenanceRecord, Reminder
+from django.db import transaction
+from django.utils import timezone
+from common.admin import ScaleModeAdminMixin
+from .benchmarks import record_costs
+from .caching import invalidate_users
+from .models import ArchivedMaintenanceRecord, MaintenanceType, MaintenanceRecord, Reminder, CostSketch
+from .rollups import refresh_rollups_for_records
 
 @admin.register(MaintenanceType)
 class MaintenanceTypeAdmin(admin.ModelAdmin):
@@ -8,10 +14,13 @@ class MaintenanceTypeAdmin(admin.ModelAdmin):
     list_filter = ('recommended_interval_km', 'recommended_interval_months')
 
 @admin.register(MaintenanceRecord)
-class MaintenanceRecordAdmin(admin.ModelAdmin):
+class MaintenanceRecordAdmin(ScaleModeAdminMixin, admin.ModelAdmin):
     list_display = ('vehicle', 'maintenance_type', 'date_performed', 'status', 'cost')
     list_filter = ('status', 'maintenance_type', 'date_performed')
+    list_select_related = ('vehicle', 'maintenance_type')
     search_fields = ('vehicle__make', 'vehicle__model_name', 'notes', 'service_provider')
+    autocomplete_fields = ('vehicle', 'maintenance_type')
+    actions = ('mark_completed', 'mark_cancelled')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date_performed'
     fieldsets = (
@@ -34,10 +43,88 @@ class MaintenanceRecordAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Mark selected records as completed')
+    def mark_completed(self, request, queryset):
+        owners = list(queryset.values_list('vehicle__user_id', flat=True).distinct())
+        # update() sends no signals, so refresh the vehicle rollups and feed
+        # the newly completed costs to the benchmark sketches here
+        with transaction.atomic(using=queryset.db):
+            costs = list(queryset.exclude(status=MaintenanceRecord.Status.COMPLETED).filter(
+                cost__gt=0
+            ).values_list('maintenance_type_id', 'service_provider', 'cost'))
+            transaction.on_commit(lambda: record_costs(costs), using=queryset.db)
+            updated = queryset.update(
+                status=MaintenanceRecord.Status.COMPLETED,
+                updated_at=timezone.now()
+            )
+            refresh_rollups_for_records(queryset.values('pk'), using=queryset.db)
+        invalidate_users(owners, using=queryset.db)
+        self.message_user(request, f"{updated} record(s) marked as completed.")
+
+    @admin.action(description='Mark selected records as cancelled')
+    def mark_cancelled(self, request, queryset):
+        owners = list(queryset.values_list('vehicle__user_id', flat=True).distinct())
+        # update() sends no signals, so refresh the vehicle rollups here
+        with transaction.atomic(using=queryset.db):
+            updated = queryset.update(
+                status=MaintenanceRecord.Status.CANCELLED,
+                updated_at=timezone.now()
+            )
+            refresh_rollups_for_records(queryset.values('pk'), using=queryset.db)
+        invalidate_users(owners, using=queryset.db)
+        self.message_user(request, f"{updated} record(s) marked as cancelled.")
+
 @admin.register(Reminder)
-class ReminderAdmin(admin.ModelAdmin):
+class ReminderAdmin(ScaleModeAdminMixin, admin.ModelAdmin):
     list_display = ('maintenance_record', 'due_date', 'is_completed')
     list_filter = ('is_completed', 'due_date')
+    list_select_related = (
+        'maintenance_record__vehicle',
+        'maintenance_record__maintenance_type',
+    )
     search_fields = ('maintenance_record__vehicle__make', 'maintenance_record__vehicle__model_name', 'notes')
+    autocomplete_fields = ('maintenance_record',)
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'due_date'
+    actions = ('mark_completed', 'mark_uncompleted')
+
+    @admin.action(description='Mark selected reminders as completed')
+    def mark_completed(self, request, queryset):
+        owners = list(queryset.values_list('maintenance_record__vehicle__user_id', flat=True).distinct())
+        # update() sends no signals, so refresh the vehicle rollups here
+        with transaction.atomic(using=queryset.db):
+            updated = queryset.update(is_completed=True, updated_at=timezone.now())
+            refresh_rollups_for_records(queryset.values('maintenance_record_id'), using=queryset.db)
+        invalidate_users(owners, using=queryset.db)
+        self.message_user(request, f"{updated} reminder(s) marked as completed.")
+
+    @admin.action(description='Mark selected reminders as uncompleted')
+    def mark_uncompleted(self, request, queryset):
+        owners = list(queryset.values_list('maintenance_record__vehicle__user_id', flat=True).distinct())
+        # update() sends no signals, so refresh the vehicle rollups here
+        with transaction.atomic(using=queryset.db):
+            updated = queryset.update(is_completed=False, updated_at=timezone.now())
+            refresh_rollups_for_records(queryset.values('maintenance_record_id'), using=queryset.db)
+        invalidate_users(owners, using=queryset.db)
+        self.message_user(request, f"{updated} reminder(s) marked as uncompleted.")
+
+@admin.register(CostSketch)
+class CostSketchAdmin(admin.ModelAdmin):
+    list_display = ('maintenance_type', 'service_provider', 'count', 'updated_at')
+    list_filter = ('maintenance_type',)
+    search_fields = ('service_provider',)
+    readonly_fields = ('maintenance_type', 'service_provider', 'count', 'digest', 'updated_at')
+
+@admin.register(ArchivedMaintenanceRecord)
+class ArchivedMaintenanceRecordAdmin(ScaleModeAdminMixin, admin.ModelAdmin):
+    list_display = ('vehicle', 'maintenance_type', 'date_performed', 'cost', 'archived_at')
+    list_filter = ('maintenance_type',)
+    list_select_related = ('vehicle', 'maintenance_type')
+    search_fields = ('vehicle__registration_number', 'notes', 'service_provider')
+    date_hierarchy = 'date_performed'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,152 @@
+"""
+Archival tier for old maintenance history.
+
+Completed records performed more than ``MAINTENANCE_ARCHIVE_AFTER_DAYS``
+ago, with no open reminder and no next due date still ahead, are moved to
+``ArchivedMaintenanceRecord``: one narrow-indexed row per record with its
+reminders folded in as JSON, on the same shard. The live tables (and the
+indexes every ``vehicle__user`` scan walks) keep only the history that is
+still read and written. Archived records keep their ids and still count
+towards the vehicle rollups, the record list and detail, the timeline, sync
+and exports.
+"""
+import functools
+import heapq
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from .projections import ReminderProjection
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = [
+    field.attname for field in ArchivedMaintenanceRecord._meta.concrete_fields
+    if field.name not in ('reminders', 'archived_at')
+]
+
+
+def archive_cutoff(days=None):
+    """Records performed before this date may be archived."""
+    days = settings.MAINTENANCE_ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now().date() - timedelta(days=days)
+
+
+def archivable(cutoff, using=None):
+    """Live records old and settled enough to archive."""
+    today = timezone.now().date()
+    open_reminders = Reminder.objects.using(using).filter(
+        maintenance_record=OuterRef('pk'),
+        is_completed=False
+    )
+    return MaintenanceRecord.objects.using(using).filter(
+        Q(next_due_date__isnull=True) | Q(next_due_date__lt=today),
+        status=MaintenanceRecord.Status.COMPLETED,
+        date_performed__lt=cutoff,
+    ).exclude(Exists(open_reminders))
+
+
+def archive_batch(record_ids, cutoff, using):
+    """
+    Move the still archivable records among ``record_ids`` and their
+    reminders to the archive in one transaction. Returns the number moved.
+
+    Rows are copied and removed without model signals: nothing is deleted
+    as far as clients and rollups are concerned.
+    """
+    with transaction.atomic(using=using):
+        records = {
+            row['id']: row for row in archivable(cutoff, using).filter(
+                pk__in=record_ids
+            ).select_for_update().values(*ARCHIVED_FIELDS)
+        }
+        if not records:
+            return 0
+
+        # Read after the lock, so a reminder reopened meanwhile keeps its record live
+        reminders = ReminderProjection()
+        rendered = defaultdict(list)
+        for reminder in reminders.project(reminders.rows(
+            Reminder.objects.using(using).filter(maintenance_record__in=list(records)).order_by('pk')
+        )):
+            rendered[reminder['maintenance_record']].append(reminder)
+        for record_id, record_reminders in list(rendered.items()):
+            if any(not reminder['is_completed'] for reminder in record_reminders):
+                del records[record_id]
+                del rendered[record_id]
+        if not records:
+            return 0
+
+        ArchivedMaintenanceRecord.objects.using(using).bulk_create([
+            ArchivedMaintenanceRecord(reminders=rendered.get(record_id, []), **row)
+            for record_id, row in records.items()
+        ])
+        Reminder._base_manager.using(using).filter(maintenance_record__in=list(records))._raw_delete(using)
+        MaintenanceRecord._base_manager.using(using).filter(pk__in=list(records))._raw_delete(using)
+    return len(records)
+
+
+def archive_shard(using, cutoff, batch_size):
+    """Archive every archivable record on ``using`` in keyset-ordered batches."""
+    candidates = archivable(cutoff, using).order_by('pk').values_list('pk', flat=True)
+    archived = 0
+    last_pk = 0
+    while True:
+        batch = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        archived += archive_batch(batch, cutoff, using)
+    logger.info("Archived %s maintenance record(s) on %s", archived, using)
+    return archived
+
+
+class MergedRows:
+    """
+    The rows of a live and an archived queryset, sorted the same way, read
+    as one sorted sequence: enough of a queryset for pagination (``count()``
+    and slicing) and streaming (``iterator()``). A page reads at most as far
+    as its end from each table.
+    """
+
+    def __init__(self, querysets, key):
+        self.querysets = querysets
+        self.key = key
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('MergedRows only supports slices')
+        start, stop = index.start or 0, index.stop
+        merged = heapq.merge(*(queryset[:stop] for queryset in self.querysets), key=self.key)
+        return list(merged)[start:stop]
+
+    def iterator(self, chunk_size=None):
+        return heapq.merge(*(queryset.iterator(chunk_size=chunk_size) for queryset in self.querysets), key=self.key)
+
+
+def sort_key(ordering, columns):
+    """
+    ``heapq.merge`` key sorting rows the way ``order_by(*ordering)`` sorts
+    them, given where each ordering field sits in the row (``columns``).
+    """
+    fields = [(columns[field.lstrip('-')], field.startswith('-')) for field in ordering]
+
+    def compare(left, right):
+        for index, descending in fields:
+            if left[index] != right[index]:
+                result = -1 if left[index] < right[index] else 1
+                return -result if descending else result
+        return 0
+    return functools.cmp_to_key(compare)
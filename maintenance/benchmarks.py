@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import CostSketch
+from .sketches import TDigest
+
+
+def sketch_keys(service_provider):
+    """Sketch keys a record contributes to: the fleet and, if named, its provider."""
+    provider = CostSketch.normalize_provider(service_provider)
+    return [''] + ([provider] if provider else [])
+
+
+def record_cost(maintenance_type_id, service_provider, cost):
+    """Add one completed maintenance cost to the fleet and provider sketches."""
+    record_costs([(maintenance_type_id, service_provider, cost)])
+
+
+def record_costs(rows):
+    """
+    Add completed maintenance costs, as ``(maintenance_type_id,
+    service_provider, cost)`` rows, to their sketches; each sketch is locked
+    and saved once however many rows it takes.
+    """
+    costs = {}
+    for maintenance_type_id, service_provider, cost in rows:
+        for key in sketch_keys(service_provider):
+            costs.setdefault((maintenance_type_id, key), []).append(cost)
+    for (maintenance_type_id, key), values in costs.items():
+        with transaction.atomic():
+            sketch, _ = CostSketch.objects.select_for_update().get_or_create(
+                maintenance_type_id=maintenance_type_id,
+                service_provider=key
+            )
+            digest = TDigest.from_dict(
+                sketch.digest,
+                compression=settings.COST_SKETCH_COMPRESSION
+            )
+            for value in values:
+                digest.add(value)
+            sketch.digest = digest.to_dict()
+            sketch.count = digest.count
+            sketch.save(update_fields=['digest', 'count', 'updated_at'])
@@ -0,0 +1,113 @@
+"""
+Read-through cache for the upcoming records and reminders endpoints.
+
+Responses are cached per user under a key that includes the user's cache
+version, a global version and today's date. Writes invalidate by bumping a
+version once their transaction commits, which is O(1) however many pages
+and endpoints the user has cached; orphaned entries simply expire. Entries
+live until the next midnight, when "today" (and so the answer) changes.
+
+Versions only work when every worker sees the same cache, so the cache is
+off unless ``CACHES['default']`` is a shared backend; per-process
+``LocMemCache`` would let one worker keep serving what another invalidated.
+Misses are built from the primary, so a lagging replica cannot store data
+from before a write under the version that write created.
+"""
+import hashlib
+import time
+from datetime import datetime, time as datetime_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.db_routers import use_read_alias
+from common.metrics import registry
+
+GLOBAL_VERSION_KEY = 'upcoming:version'
+
+
+def _user_version_key(user_id):
+    return f"upcoming:version:{user_id}"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # A fresh, never-before-used version, so entries written under a
+        # version that was evicted can't come back to life.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_user(user_id, using=None):
+    """Drop the user's cached responses once the current transaction commits."""
+    if user_id is not None:
+        transaction.on_commit(lambda: _bump(_user_version_key(user_id)), using=using)
+
+
+def invalidate_all(using=None):
+    """Drop every user's cached responses once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(GLOBAL_VERSION_KEY), using=using)
+
+
+def invalidate_users(user_ids, using=None):
+    """``invalidate_user`` for each of ``user_ids``, e.g. the owners touched by a bulk update."""
+    for user_id in set(user_ids):
+        invalidate_user(user_id, using=using)
+
+
+def is_enabled():
+    """Whether responses are cached: only with a backend every worker shares."""
+    return settings.UPCOMING_CACHE_ENABLED and not isinstance(caches['default'], LocMemCache)
+
+
+def seconds_until_midnight(now):
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime_time.min, tzinfo=now.tzinfo)
+    return max(1, int((tomorrow - now).total_seconds()))
+
+
+def cached_response(request, endpoint, build):
+    """
+    ``build()``'s response for ``request``, served from the cache when the
+    user has not written anything since it was stored today.
+    """
+    if not is_enabled():
+        return build()
+
+    now = timezone.now()
+    # Versions are read before the data so a write racing this request
+    # leaves its result under a version that is already dead.
+    key = 'upcoming:{}:{}:{}:{}:{}:{}'.format(
+        endpoint,
+        request.user.pk,
+        _get_version(_user_version_key(request.user.pk)),
+        _get_version(GLOBAL_VERSION_KEY),
+        now.date().isoformat(),
+        # Query string and host both end up in the payload (pages, links)
+        hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    )
+    data = cache.get(key)
+    labels = (('endpoint', endpoint),)
+    if data is not None:
+        registry.inc('upcoming_cache_requests_total', labels + (('result', 'hit'),))
+        return Response(data)
+
+    registry.inc('upcoming_cache_requests_total', labels + (('result', 'miss'),))
+    with use_read_alias(None):
+        response = build()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, seconds_until_midnight(now))
+    return response
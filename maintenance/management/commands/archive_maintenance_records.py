@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from common.sharding import use_shard
+from maintenance.archive import archivable, archive_cutoff, archive_shard
+
+
+class Command(BaseCommand):
+    help = (
+        'Move completed maintenance records older than the archive cutoff, and their reminders, '
+        'out of the live tables into the archive'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Archive records performed more than this many days ago (default MAINTENANCE_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Records moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Count the archivable records without moving them')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['older_than_days'])
+        total = 0
+        for alias in settings.DATABASE_SHARDS:
+            with use_shard(alias):
+                if options['dry_run']:
+                    count = archivable(cutoff, alias).count()
+                else:
+                    count = archive_shard(alias, cutoff, options['batch_size'])
+            total += count
+            self.stdout.write(f"  {alias}: {count} record(s)")
+
+        if options['dry_run']:
+            self.stdout.write(f"{total} record(s) performed before {cutoff} can be archived (dry run)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} record(s) performed before {cutoff}"))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from maintenance.outbox import dispatch, requeue_failed
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the outbox events left behind on every shard, e.g. after a worker died '
+        'between a commit and its dispatch (safe to run at any time)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Events applied per transaction')
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Requeue the events quarantined after OUTBOX_MAX_ATTEMPTS failures first'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for alias in settings.DATABASE_SHARDS:
+            if options['retry_failed']:
+                self.stdout.write(f"  {alias}: requeued {requeue_failed(alias)} failed event(s)")
+            handled = dispatch(alias, options['batch_size'])
+            total += handled
+            self.stdout.write(f"  {alias}: {handled} event(s)")
+        self.stdout.write(self.style.SUCCESS(f"Applied {total} outbox event(s)"))
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from maintenance.models import ArchivedMaintenanceRecord, CostSketch, MaintenanceRecord
+from maintenance.sketches import TDigest
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cost benchmark sketches from completed maintenance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        compression = settings.COST_SKETCH_COMPRESSION
+        provider_digests = defaultdict(lambda: TDigest(compression=compression))
+        unattributed = defaultdict(lambda: TDigest(compression=compression))
+
+        rows = chain.from_iterable(
+            model.objects.filter(
+                status=MaintenanceRecord.Status.COMPLETED,
+                cost__gt=0
+            ).values_list('maintenance_type_id', 'service_provider', 'cost').iterator(
+                chunk_size=options['chunk_size']
+            )
+            for model in (MaintenanceRecord, ArchivedMaintenanceRecord)
+        )
+        for type_id, provider, cost in rows:
+            provider = CostSketch.normalize_provider(provider)
+            if provider:
+                provider_digests[(type_id, provider)].add(cost)
+            else:
+                unattributed[type_id].add(cost)
+
+        # Fleet-wide sketches are the merge of every provider sketch plus the
+        # records without a provider.
+        fleet_digests = defaultdict(lambda: TDigest(compression=compression))
+        for (type_id, _), digest in provider_digests.items():
+            fleet_digests[type_id].merge(digest)
+        for type_id, digest in unattributed.items():
+            fleet_digests[type_id].merge(digest)
+
+        sketches = [
+            CostSketch(
+                maintenance_type_id=type_id,
+                service_provider=provider,
+                count=digest.count,
+                digest=digest.to_dict()
+            )
+            for (type_id, provider), digest in provider_digests.items()
+        ] + [
+            CostSketch(
+                maintenance_type_id=type_id,
+                service_provider='',
+                count=digest.count,
+                digest=digest.to_dict()
+            )
+            for type_id, digest in fleet_digests.items()
+        ]
+
+        with transaction.atomic():
+            CostSketch.objects.all().delete()
+            CostSketch.objects.bulk_create(sketches, batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(sketches)} cost sketch(es) for {len(fleet_digests)} maintenance type(s)"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from maintenance.models import MaintenanceType
+from maintenance.scheduling import recompute_next_due
+
+
+class Command(BaseCommand):
+    help = 'Re-derive next due dates/mileage from maintenance type intervals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            type=int,
+            action='append',
+            dest='type_ids',
+            help='Maintenance type id to recompute (repeatable; default: all with intervals)'
+        )
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        types = MaintenanceType.objects.filter(
+            Q(recommended_interval_months__isnull=False) | Q(recommended_interval_km__isnull=False)
+        )
+        if options['type_ids']:
+            types = types.filter(pk__in=options['type_ids'])
+
+        total = 0
+        for type_id in types.values_list('pk', flat=True):
+            total += recompute_next_due(type_id, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated {total} maintenance record(s)"))
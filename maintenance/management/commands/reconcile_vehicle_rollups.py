@@ -0,0 +1,55 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from common.sharding import use_shard
+from maintenance.rollups import find_drift, refresh_rollups
+from vehicles.models import Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the maintenance rollups stored on vehicles with their records and reminders '
+        'and repair the ones that drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Vehicles checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = 0
+        drifted = 0
+        drifted_fields = Counter()
+        repaired = 0
+        for alias in settings.DATABASE_SHARDS:
+            with use_shard(alias):
+                vehicles = Vehicle.objects.using(alias).order_by('pk')
+                last_pk = 0
+                while True:
+                    batch = list(vehicles.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+                    if not batch:
+                        break
+                    last_pk = batch[-1]
+                    checked += len(batch)
+
+                    drift = find_drift(vehicles.filter(pk__in=batch))
+                    drifted += len(drift)
+                    for fields in drift.values():
+                        drifted_fields.update(fields)
+                    if drift and not options['dry_run']:
+                        # Recomputed in the UPDATE itself, so writes since the check are not undone
+                        with transaction.atomic(using=alias):
+                            repaired += refresh_rollups(list(drift), using=alias)
+
+        for field, count in sorted(drifted_fields.items()):
+            self.stdout.write(f"  {field}: {count} vehicle(s)")
+        if options['dry_run']:
+            self.stdout.write(f"Checked {checked} vehicle(s); {drifted} drifted (dry run, nothing repaired)")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Checked {checked} vehicle(s); {drifted} drifted, repaired {repaired}"
+            ))
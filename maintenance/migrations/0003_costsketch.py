@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0002_maintenancerecord_record_updated_at_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_provider', models.CharField(blank=True, help_text='Normalized provider name; blank for the fleet-wide sketch', max_length=200, verbose_name='service provider')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('digest', models.JSONField(default=dict, verbose_name='digest')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('maintenance_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_sketches', to='maintenance.maintenancetype', verbose_name='maintenance type')),
+            ],
+            options={
+                'verbose_name': 'cost sketch',
+                'verbose_name_plural': 'cost sketches',
+                'unique_together': {('maintenance_type', 'service_provider')},
+            },
+        ),
+    ]
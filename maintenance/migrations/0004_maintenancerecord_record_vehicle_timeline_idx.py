@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0003_costsketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerecord',
+            index=models.Index(fields=['vehicle', '-date_performed', '-id'], name='record_vehicle_timeline_idx'),
+        ),
+    ]
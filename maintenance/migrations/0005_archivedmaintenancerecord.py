@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0006_vehicle_pending_delete_at'),
+        ('maintenance', '0004_maintenancerecord_record_vehicle_timeline_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMaintenanceRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date_performed', models.DateField(verbose_name='date performed')),
+                ('mileage_at_service', models.PositiveIntegerField(verbose_name='mileage at service')),
+                ('cost', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, verbose_name='cost')),
+                ('service_provider', models.CharField(blank=True, max_length=200, verbose_name='service provider')),
+                ('notes', models.TextField(blank=True, verbose_name='notes')),
+                ('next_due_date', models.DateField(blank=True, null=True, verbose_name='next due date')),
+                ('next_due_mileage', models.PositiveIntegerField(blank=True, null=True, verbose_name='next due mileage')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='completed', max_length=20, verbose_name='status')),
+                ('created_at', models.DateTimeField(verbose_name='created at')),
+                ('updated_at', models.DateTimeField(verbose_name='updated at')),
+                ('reminders', models.JSONField(default=list, verbose_name='reminders')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='archived at')),
+                ('maintenance_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_maintenance_records', to='maintenance.maintenancetype', verbose_name='maintenance type')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_maintenance_records', to='vehicles.vehicle', verbose_name='vehicle')),
+            ],
+            options={
+                'verbose_name': 'archived maintenance record',
+                'verbose_name_plural': 'archived maintenance records',
+                'ordering': ['-date_performed', '-created_at'],
+                'indexes': [models.Index(fields=['vehicle', '-date_performed', '-id'], name='archived_vehicle_timeline_idx')],
+            },
+        ),
+    ]
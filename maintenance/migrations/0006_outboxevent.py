@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0005_archivedmaintenancerecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('record_saved', 'Record saved')], max_length=20, verbose_name='kind')),
+                ('vehicle_id', models.BigIntegerField(verbose_name='vehicle id')),
+                ('record_id', models.BigIntegerField(blank=True, null=True, verbose_name='record id')),
+                ('mileage', models.PositiveIntegerField(blank=True, null=True, verbose_name='mileage')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'outbox event',
+                'verbose_name_plural': 'outbox events',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
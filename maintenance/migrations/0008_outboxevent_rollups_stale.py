@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0007_outboxevent_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='kind',
+            field=models.CharField(choices=[('record_saved', 'Record saved'), ('rollups_stale', 'Rollups stale')], max_length=20, verbose_name='kind'),
+        ),
+    ]
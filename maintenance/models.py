@@ -1,9 +1,10 @@
+from dateutil.relativedelta import relativedelta
 from django.utils.translation import gettext_lazy as _
 from vehicles.models import Vehicle
-from common.models import BaseModel
-from django.db import models
+from common.models import BaseModel, LoadedValuesMixin
+from django.db import models, router, transaction
 
-class MaintenanceType(BaseModel):
+class MaintenanceType(LoadedValuesMixin, BaseModel):
     name = models.CharField(_('name'), max_length=100, unique=True)
     description = models.TextField(_('description'), blank=True)
     recommended_interval_km = models.PositiveIntegerField(
@@ -26,8 +27,24 @@ class MaintenanceType(BaseModel):
     def __str__(self):
         return self.name
 
+    def next_due(self, date_performed, mileage_at_service):
+        """
+        Next due date and mileage for a service performed at the given date and
+        mileage, or None for intervals this type does not define.
+        """
+        return {
+            'date': (
+                date_performed + relativedelta(months=self.recommended_interval_months)
+                if self.recommended_interval_months and date_performed else None
+            ),
+            'mileage': (
+                mileage_at_service + self.recommended_interval_km
+                if self.recommended_interval_km and mileage_at_service is not None else None
+            ),
+        }
 
-class MaintenanceRecord(models.Model):
+
+class MaintenanceRecord(LoadedValuesMixin, models.Model):
     """Model for tracking maintenance activities performed on vehicles"""
     
     class Status(models.TextChoices):
@@ -87,9 +104,73 @@ class MaintenanceRecord(models.Model):
         verbose_name = _('maintenance record')
         verbose_name_plural = _('maintenance records')
         ordering = ['-date_performed', '-created_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='record_updated_at_idx'),
+            # Vehicle timeline scans records newest first
+            models.Index(fields=['vehicle', '-date_performed', '-id'], name='record_vehicle_timeline_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.maintenance_type} - {self.vehicle} ({self.date_performed})"
+        return self.format_label(self.maintenance_type, self.vehicle, self.date_performed)
+
+    @staticmethod
+    def format_label(maintenance_type, vehicle, date_performed):
+        """The ``str()`` of a record, from its type's and vehicle's labels."""
+        return f"{maintenance_type} - {vehicle} ({date_performed})"
+
+    def save(self, *args, **kwargs):
+        self.derive_next_due()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'next_due_date', 'next_due_mileage'}
+        # post_save appends the record's outbox event, which must commit or roll back with it
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def derive_next_due(self):
+        """Derive the next due date and mileage from the maintenance type's intervals."""
+        next_due = self.maintenance_type.next_due(self.date_performed, self.mileage_at_service)
+        if next_due['date'] is not None:
+            self.next_due_date = next_due['date']
+        if next_due['mileage'] is not None:
+            self.next_due_mileage = next_due['mileage']
+
+    @property
+    def counts_towards_cost_benchmark(self):
+        return self.status == self.Status.COMPLETED and bool(self.cost) and self.cost > 0
+
+
+class CostSketch(models.Model):
+    """Persisted t-digest of completed maintenance costs for one maintenance type"""
+    maintenance_type = models.ForeignKey(
+        MaintenanceType,
+        on_delete=models.CASCADE,
+        related_name='cost_sketches',
+        verbose_name=_('maintenance type')
+    )
+    service_provider = models.CharField(
+        _('service provider'),
+        max_length=200,
+        blank=True,
+        help_text=_('Normalized provider name; blank for the fleet-wide sketch')
+    )
+    count = models.PositiveIntegerField(_('count'), default=0)
+    digest = models.JSONField(_('digest'), default=dict)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('cost sketch')
+        verbose_name_plural = _('cost sketches')
+        unique_together = ['maintenance_type', 'service_provider']
+
+    def __str__(self):
+        return f"{self.maintenance_type} - {self.service_provider or 'fleet'} ({self.count})"
+
+    @staticmethod
+    def normalize_provider(name):
+        """Collapse whitespace and case so provider spellings share a sketch."""
+        return ' '.join((name or '').split()).casefold()
 
 
 class Reminder(models.Model):
@@ -110,6 +191,90 @@ class Reminder(models.Model):
         verbose_name = _('reminder')
         verbose_name_plural = _('reminders')
         ordering = ['due_date', '-is_completed']
+        indexes = [
+            models.Index(fields=['updated_at'], name='reminder_updated_at_idx'),
+        ]
     
     def __str__(self):
         return f"Reminder for {self.maintenance_record} - Due: {self.due_date}"
+
+
+class ArchivedMaintenanceRecord(models.Model):
+    """
+    A completed maintenance record moved out of the live table by
+    ``archive_maintenance_records``, with its reminders folded in as JSON.
+    Keeps the record's id, so links and sync clients see the same record.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name='archived_maintenance_records',
+        verbose_name=_('vehicle')
+    )
+    maintenance_type = models.ForeignKey(
+        MaintenanceType,
+        on_delete=models.PROTECT,
+        related_name='archived_maintenance_records',
+        verbose_name=_('maintenance type')
+    )
+    date_performed = models.DateField(_('date performed'))
+    mileage_at_service = models.PositiveIntegerField(_('mileage at service'))
+    cost = models.DecimalField(_('cost'), max_digits=10, decimal_places=2, default=0.00)
+    service_provider = models.CharField(_('service provider'), max_length=200, blank=True)
+    notes = models.TextField(_('notes'), blank=True)
+    next_due_date = models.DateField(_('next due date'), null=True, blank=True)
+    next_due_mileage = models.PositiveIntegerField(_('next due mileage'), null=True, blank=True)
+    status = models.CharField(
+        _('status'),
+        max_length=20,
+        choices=MaintenanceRecord.Status.choices,
+        default=MaintenanceRecord.Status.COMPLETED
+    )
+    created_at = models.DateTimeField(_('created at'))
+    updated_at = models.DateTimeField(_('updated at'))
+    # The reminders as ReminderSerializer rendered them when the record was archived
+    reminders = models.JSONField(_('reminders'), default=list)
+    archived_at = models.DateTimeField(_('archived at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('archived maintenance record')
+        verbose_name_plural = _('archived maintenance records')
+        ordering = ['-date_performed', '-created_at']
+        indexes = [
+            # The only access path: one vehicle's (or user's) history, newest first
+            models.Index(fields=['vehicle', '-date_performed', '-id'], name='archived_vehicle_timeline_idx'),
+        ]
+
+    def __str__(self):
+        return MaintenanceRecord.format_label(self.maintenance_type, self.vehicle, self.date_performed)
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect of a write, appended in the writing transaction and applied
+    after the commit by ``maintenance.outbox`` (at least once).
+    """
+
+    class Kind(models.TextChoices):
+        # Refresh the record's reminder and raise its vehicle's mileage
+        RECORD_SAVED = 'record_saved', _('Record saved')
+        # Refresh the vehicle's maintenance rollups after a record left it
+        ROLLUPS_STALE = 'rollups_stale', _('Rollups stale')
+
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices)
+    vehicle_id = models.BigIntegerField(_('vehicle id'))
+    record_id = models.BigIntegerField(_('record id'), null=True, blank=True)
+    mileage = models.PositiveIntegerField(_('mileage'), null=True, blank=True)
+    attempts = models.PositiveIntegerField(_('failed attempts'), default=0)
+    # Set once the event failed OUTBOX_MAX_ATTEMPTS times; dispatch skips it from then on
+    failed_at = models.DateTimeField(_('failed at'), null=True, blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('outbox event')
+        verbose_name_plural = _('outbox events')
+        ordering = ['pk']
+
+    def __str__(self):
+        return f"{self.kind} (vehicle {self.vehicle_id}, record {self.record_id})"
@@ -0,0 +1,253 @@
+"""
+Transactional outbox for the side effects of maintenance record writes.
+
+Saving or deleting a record only appends a compact ``OutboxEvent`` row in
+the same transaction (``MaintenanceRecord.save`` opens one, on the same
+shard), so the request holds no locks on its reminders or vehicle. Once the
+transaction commits, a dispatcher drains the outbox ``OUTBOX_BATCH_SIZE``
+events at a time: it coalesces the batch per record and per vehicle, upserts
+the reminders, raises the vehicle mileages and refreshes the vehicle rollups
+with a handful of set-based statements, and deletes the events in the same
+transaction. A batch that fails is rolled back and its events are
+retried one at a time, so one bad event cannot hold up the rest; events
+that keep failing are quarantined after ``OUTBOX_MAX_ATTEMPTS`` dispatches
+(``dispatch_outbox --retry-failed`` requeues them). ``dispatch_outbox``
+also sweeps up after crashes, so every effect is applied at least once and
+is written to be idempotent.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from common.metrics import registry
+from common.sharding import use_shard
+from common.tasks import run_in_background
+from sync.models import DeletionLog
+from vehicles.models import Vehicle
+from .caching import invalidate_user
+from .models import MaintenanceRecord, OutboxEvent, Reminder
+from .rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+
+def record_saved(record, using, moved_from=None):
+    """
+    Queue the reminder, mileage and rollup side effects of saving ``record``,
+    and the rollups of the vehicle ``moved_from`` it was moved away from.
+    """
+    events = [OutboxEvent(
+        kind=OutboxEvent.Kind.RECORD_SAVED,
+        vehicle_id=record.vehicle_id,
+        record_id=record.pk,
+        mileage=record.mileage_at_service
+    )]
+    if moved_from is not None and moved_from != record.vehicle_id:
+        events.append(OutboxEvent(kind=OutboxEvent.Kind.ROLLUPS_STALE, vehicle_id=moved_from, record_id=record.pk))
+    OutboxEvent.objects.using(using).bulk_create(events)
+    transaction.on_commit(lambda: schedule_dispatch(using), using=using)
+
+
+def record_deleted(record, using):
+    """Queue the rollup refresh of the vehicle ``record`` was deleted from."""
+    OutboxEvent.objects.using(using).create(
+        kind=OutboxEvent.Kind.ROLLUPS_STALE,
+        vehicle_id=record.vehicle_id,
+        record_id=record.pk
+    )
+    transaction.on_commit(lambda: schedule_dispatch(using), using=using)
+
+
+def schedule_dispatch(using):
+    """Drain the outbox on ``using`` in the background, unless a drain is already queued."""
+    with _scheduled_lock:
+        if using in _scheduled:
+            return
+        _scheduled.add(using)
+    run_in_background(_scheduled_dispatch, using)
+
+
+def _scheduled_dispatch(using):
+    # Events committed from here on schedule a new drain
+    with _scheduled_lock:
+        _scheduled.discard(using)
+    dispatch(using)
+
+
+def dispatch(using, batch_size=None):
+    """
+    Apply and delete the events on ``using``, oldest first, each at most once
+    per call. Returns the number applied.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    handled = 0
+    last_pk = 0
+    with use_shard(using):
+        while True:
+            events = []
+            try:
+                with transaction.atomic(using=using):
+                    events = list(
+                        OutboxEvent.objects.using(using).filter(
+                            pk__gt=last_pk,
+                            failed_at__isnull=True
+                        ).select_for_update(skip_locked=True)[:batch_size]
+                    )
+                    if not events:
+                        break
+                    apply_events(events, using)
+                    OutboxEvent.objects.using(using).filter(pk__in=[event.pk for event in events]).delete()
+                applied = len(events)
+            except Exception:
+                logger.exception(
+                    "Outbox dispatch of %s event(s) on %s failed; retrying them one by one", len(events), using
+                )
+                if not events:
+                    break
+                # Isolate the events that fail so they don't hold up the rest of the outbox
+                applied = apply_one_by_one(events, using)
+            last_pk = events[-1].pk
+            handled += applied
+            registry.inc('outbox_events_total', (('result', 'applied'),), applied)
+    return handled
+
+
+def apply_one_by_one(events, using):
+    """Apply ``events`` in a transaction each, recording the failures. Returns the number applied."""
+    applied = 0
+    for event in events:
+        try:
+            with transaction.atomic(using=using):
+                locked = OutboxEvent.objects.using(using).filter(
+                    pk=event.pk,
+                    failed_at__isnull=True
+                ).select_for_update(skip_locked=True).first()
+                if locked is None:
+                    continue
+                apply_events([locked], using)
+                locked.delete()
+            applied += 1
+        except Exception:
+            logger.exception("Outbox event %s on %s failed", event.pk, using)
+            record_failure(event.pk, using)
+    return applied
+
+
+def record_failure(event_pk, using):
+    """Count a failed attempt at an event; quarantine it after OUTBOX_MAX_ATTEMPTS."""
+    events = OutboxEvent.objects.using(using).filter(pk=event_pk)
+    events.update(attempts=F('attempts') + 1)
+    registry.inc('outbox_events_total', (('result', 'failed'),))
+    if events.filter(attempts__gte=settings.OUTBOX_MAX_ATTEMPTS).update(failed_at=timezone.now()):
+        logger.error(
+            "Outbox event %s on %s quarantined after %s failed attempts",
+            event_pk, using, settings.OUTBOX_MAX_ATTEMPTS
+        )
+        registry.inc('outbox_events_total', (('result', 'quarantined'),))
+
+
+def requeue_failed(using):
+    """Give quarantined events on ``using`` a fresh set of attempts. Returns the number requeued."""
+    return OutboxEvent.objects.using(using).filter(failed_at__isnull=False).update(failed_at=None, attempts=0)
+
+
+def apply_events(events, using):
+    """Apply a batch of events, once per record and once per vehicle however many events each has."""
+    mileages = {}
+    record_ids = set()
+    stale_vehicle_ids = set()
+    for event in events:
+        if event.kind == OutboxEvent.Kind.RECORD_SAVED:
+            record_ids.add(event.record_id)
+            if event.mileage is not None:
+                mileages[event.vehicle_id] = max(event.mileage, mileages.get(event.vehicle_id, 0))
+        elif event.kind == OutboxEvent.Kind.ROLLUPS_STALE:
+            stale_vehicle_ids.add(event.vehicle_id)
+
+    user_ids = raise_mileages(mileages, using)
+    vehicle_ids, reminder_user_ids = sync_reminders(record_ids, using)
+    if stale_vehicle_ids - vehicle_ids:
+        user_ids |= set(Vehicle.objects.using(using).filter(
+            pk__in=stale_vehicle_ids - vehicle_ids
+        ).values_list('user_id', flat=True))
+    vehicle_ids |= stale_vehicle_ids
+    if vehicle_ids:
+        refresh_rollups(vehicle_ids, using=using)
+    for user_id in user_ids | reminder_user_ids:
+        invalidate_user(user_id, using=using)
+
+
+def raise_mileages(mileages, using):
+    """Raise each vehicle's mileage to the given value if it is lower; returns the owners touched."""
+    now = timezone.now()
+    vehicles = Vehicle.objects.using(using)
+    raised = set()
+    for vehicle_id, mileage in mileages.items():
+        if vehicles.filter(pk=vehicle_id, current_mileage__lt=mileage).update(
+            current_mileage=mileage,
+            updated_at=now
+        ):
+            raised.add(vehicle_id)
+    if raised:
+        logger.info("Raised the mileage of %s vehicle(s)", len(raised))
+    return set(vehicles.filter(pk__in=raised).values_list('user_id', flat=True))
+
+
+def reminder_notes(type_name, *vehicle_label):
+    """Notes of the reminder of a record, from its type's name and its vehicle's label fields."""
+    return f"Upcoming maintenance for {Vehicle.format_label(*vehicle_label)} - {type_name}"
+
+
+def sync_reminders(record_ids, using):
+    """
+    Bring the reminders of ``record_ids`` in line with the records' next due
+    dates: upsert an open reminder where there is one, delete them where there
+    is none. Returns the vehicles and owners touched.
+    """
+    records = MaintenanceRecord.objects.using(using).filter(pk__in=record_ids).values_list(
+        'pk', 'next_due_date', 'vehicle_id', 'vehicle__user_id', 'maintenance_type__name',
+        'vehicle__year', 'vehicle__make', 'vehicle__model_name', 'vehicle__registration_number'
+    )
+    due = {}
+    cleared = []
+    vehicle_ids = set()
+    owners = {}
+    for pk, next_due_date, vehicle_id, user_id, type_name, *vehicle_label in records:
+        vehicle_ids.add(vehicle_id)
+        owners[pk] = user_id
+        if next_due_date:
+            due[pk] = (next_due_date, reminder_notes(type_name, *vehicle_label))
+        else:
+            cleared.append(pk)
+
+    reminders = Reminder.objects.using(using)
+    now = timezone.now()
+    existing = list(reminders.filter(maintenance_record__in=list(due)).only('pk', 'maintenance_record_id'))
+    for reminder in existing:
+        reminder.due_date, reminder.notes = due[reminder.maintenance_record_id]
+        reminder.is_completed = False
+        reminder.updated_at = now
+    if existing:
+        reminders.bulk_update(existing, ['due_date', 'notes', 'is_completed', 'updated_at'])
+    have_reminder = {reminder.maintenance_record_id for reminder in existing}
+    reminders.bulk_create([
+        Reminder(maintenance_record_id=pk, due_date=due_date, notes=notes, is_completed=False)
+        for pk, (due_date, notes) in due.items() if pk not in have_reminder
+    ])
+
+    stale = list(reminders.filter(maintenance_record__in=cleared).values_list('pk', 'maintenance_record_id'))
+    if stale:
+        DeletionLog.objects.bulk_create([
+            DeletionLog(user_id=owners[record_id], kind=DeletionLog.Kind.REMINDER, object_id=pk)
+            for pk, record_id in stale
+        ])
+        Reminder._base_manager.using(using).filter(pk__in=[pk for pk, _ in stale])._raw_delete(using)
+        logger.info("Deleted %s reminder(s) of records without a next due date", len(stale))
+    return vehicle_ids, set(owners.values())
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from common.projections import Projection
+from vehicles.models import Vehicle
+from vehicles.projections import VehicleListProjection
+from .models import MaintenanceRecord, Reminder
+from .serializers import (
+    MaintenanceTypeSerializer,
+    MaintenanceRecordSerializer,
+    MaintenanceRecordListSerializer,
+    ReminderSerializer,
+    ReminderListSerializer
+)
+
+VEHICLE_LABEL_LOOKUPS = ('year', 'make', 'model_name', 'registration_number')
+
+
+def vehicle_label(projection, row, prefix):
+    return Vehicle.format_label(*(projection.value(row, prefix + lookup) for lookup in VEHICLE_LABEL_LOOKUPS))
+
+
+class MaintenanceTypeProjection(Projection):
+    """Projection of ``MaintenanceTypeSerializer``"""
+    serializer_class = MaintenanceTypeSerializer
+
+
+class MaintenanceRecordListProjection(Projection):
+    """Projection of ``MaintenanceRecordListSerializer``"""
+    serializer_class = MaintenanceRecordListSerializer
+    nested = {'maintenance_type': MaintenanceTypeProjection}
+    # created_at is an ordering field, read to merge live and archived rows
+    extra_lookups = tuple(f"vehicle__{lookup}" for lookup in VEHICLE_LABEL_LOOKUPS) + ('created_at',)
+
+    def project_vehicle(self, row):
+        return vehicle_label(self, row, 'vehicle__')
+
+
+class ReminderProjection(Projection):
+    """Projection of ``ReminderSerializer``"""
+    serializer_class = ReminderSerializer
+
+
+class MaintenanceRecordProjection(Projection):
+    """Projection of ``MaintenanceRecordSerializer``; reminders are fetched per batch of records"""
+    serializer_class = MaintenanceRecordSerializer
+    nested = {
+        'vehicle': VehicleListProjection,
+        'maintenance_type': MaintenanceTypeProjection,
+    }
+
+    def prepare(self, rows):
+        reminders = ReminderProjection(self.context)
+        queryset = Reminder.objects.using(self.db).filter(
+            maintenance_record__in=[self.value(row, 'id') for row in rows]
+        )
+        self.reminders = defaultdict(list)
+        for reminder in reminders.project(reminders.rows(queryset)):
+            self.reminders[reminder['maintenance_record']].append(reminder)
+
+    def project_reminders(self, row):
+        return self.reminders.get(self.value(row, 'id'), [])
+
+
+class ReminderListProjection(Projection):
+    """Projection of ``ReminderListSerializer``"""
+    serializer_class = ReminderListSerializer
+    extra_lookups = (
+        'maintenance_record__maintenance_type__name',
+        'maintenance_record__date_performed',
+    ) + tuple(f"maintenance_record__vehicle__{lookup}" for lookup in VEHICLE_LABEL_LOOKUPS)
+
+    def project_maintenance_record(self, row):
+        return MaintenanceRecord.format_label(
+            self.value(row, 'maintenance_record__maintenance_type__name'),
+            vehicle_label(self, row, 'maintenance_record__vehicle__'),
+            self.value(row, 'maintenance_record__date_performed')
+        )
+
+
+class ArchivedMaintenanceRecordProjection(MaintenanceRecordProjection):
+    """``MaintenanceRecordProjection`` of an archived record; its reminders are stored with it"""
+    extra_lookups = ('reminders',)
+
+    def prepare(self, rows):
+        pass
+
+    def project_reminders(self, row):
+        return self.value(row, 'reminders')
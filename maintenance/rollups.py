@@ -0,0 +1,87 @@
+"""
+Per-vehicle maintenance rollups (``Vehicle.ROLLUP_FIELDS``). The affected
+vehicles are refreshed with one set-based UPDATE that recomputes the rollups
+from correlated subqueries: after the commit, through the outbox, for record
+writes, and inside the writing transaction for reminder writes. Writes that
+bypass signals call ``refresh_rollups`` themselves; ``reconcile_vehicle_rollups`` repairs whatever drift remains.
+Archived records still count towards the service rollups.
+"""
+import logging
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from vehicles.models import Vehicle
+from .models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_expressions(vehicle_ref='pk'):
+    """Expressions computing each rollup for the vehicle whose id is ``OuterRef(vehicle_ref)``."""
+    services = MaintenanceRecord.objects.filter(
+        vehicle_id=OuterRef(vehicle_ref),
+        status=MaintenanceRecord.Status.COMPLETED
+    ).order_by().values('vehicle_id')
+    archived = ArchivedMaintenanceRecord.objects.filter(
+        vehicle_id=OuterRef(vehicle_ref),
+        status=MaintenanceRecord.Status.COMPLETED
+    ).order_by().values('vehicle_id')
+    last_service = Subquery(services.annotate(value=Max('date_performed')).values('value'))
+    last_archived = Subquery(archived.annotate(value=Max('date_performed')).values('value'))
+    money = DecimalField(max_digits=12, decimal_places=2)
+    open_reminders = Reminder.objects.filter(
+        maintenance_record__vehicle_id=OuterRef(vehicle_ref),
+        is_completed=False
+    ).order_by().values('maintenance_record__vehicle_id')
+    return {
+        # GREATEST() of a date and NULL is NULL on some backends, hence the Coalesces
+        'last_service_date': Greatest(
+            Coalesce(last_service, last_archived),
+            Coalesce(last_archived, last_service)
+        ),
+        'next_due_date': Subquery(open_reminders.annotate(value=Min('due_date')).values('value')),
+        'total_spent': Coalesce(
+            Subquery(services.annotate(value=Sum('cost')).values('value')),
+            Value(Decimal('0')),
+            output_field=money
+        ) + Coalesce(
+            Subquery(archived.annotate(value=Sum('cost')).values('value')),
+            Value(Decimal('0')),
+            output_field=money
+        ),
+        'open_reminders': Coalesce(
+            Subquery(open_reminders.annotate(value=Count('pk')).values('value'), output_field=IntegerField()),
+            0
+        ),
+    }
+
+
+def refresh_rollups(vehicle_ids, using=None):
+    """
+    Recompute the rollups of ``vehicle_ids`` (ids or a values() subquery) in
+    one UPDATE on ``using``.
+    """
+    return Vehicle.objects.using(using).filter(pk__in=vehicle_ids).update(**rollup_expressions())
+
+
+def refresh_rollups_for_records(record_ids, using=None):
+    """Refresh the vehicles owning ``record_ids`` (ids or a values() subquery)."""
+    vehicle_ids = MaintenanceRecord.objects.using(using).filter(pk__in=record_ids).values('vehicle_id')
+    return refresh_rollups(vehicle_ids, using=using)
+
+
+def find_drift(vehicles):
+    """
+    ``{vehicle id: [drifted field names]}`` for the vehicles of the
+    ``vehicles`` queryset whose stored rollups differ from the recomputed ones.
+    """
+    expected = {f"expected_{name}": expression for name, expression in rollup_expressions().items()}
+    columns = ['pk'] + list(Vehicle.ROLLUP_FIELDS) + list(expected)
+    drift = {}
+    for row in vehicles.annotate(**expected).values(*columns):
+        fields = [name for name in Vehicle.ROLLUP_FIELDS if row[name] != row[f"expected_{name}"]]
+        if fields:
+            drift[row['pk']] = fields
+    return drift
@@ -0,0 +1,130 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from common.sharding import use_shard
+from .caching import invalidate_all
+from .models import MaintenanceType, MaintenanceRecord, Reminder
+from .outbox import reminder_notes
+from .rollups import refresh_rollups_for_records
+
+logger = logging.getLogger(__name__)
+
+
+def latest_records(maintenance_type_id):
+    """The most recent record of the given type for every vehicle."""
+    latest = MaintenanceRecord.objects.filter(
+        maintenance_type_id=maintenance_type_id,
+        vehicle_id=OuterRef('vehicle_id')
+    ).order_by('-date_performed', '-created_at', '-pk').values('pk')[:1]
+    return MaintenanceRecord.objects.filter(
+        maintenance_type_id=maintenance_type_id,
+        pk=Subquery(latest)
+    )
+
+
+def recompute_next_due(maintenance_type_id, batch_size=None):
+    """
+    Re-derive next due date/mileage for the latest record per vehicle of a
+    maintenance type after its intervals changed, and move the matching
+    reminders along. Works shard by shard in keyset-ordered batches, each
+    written with one UPDATE for the records and one for the reminders,
+    bypassing model signals (the vehicle rollups are refreshed explicitly).
+
+    Returns the number of records updated.
+    """
+    batch_size = batch_size or settings.NEXT_DUE_RECOMPUTE_BATCH_SIZE
+    maintenance_type = MaintenanceType.objects.get(pk=maintenance_type_id)
+    if not (maintenance_type.recommended_interval_months or maintenance_type.recommended_interval_km):
+        return 0
+
+    updated = 0
+    for alias in settings.DATABASE_SHARDS:
+        with use_shard(alias):
+            updated += _recompute_shard(maintenance_type, alias, batch_size)
+
+    if updated:
+        # The bulk updates bypass the signals that invalidate cached responses
+        invalidate_all()
+    logger.info(
+        "Recomputed next due values for %s record(s) of maintenance type %s",
+        updated, maintenance_type_id
+    )
+    return updated
+
+
+def _recompute_shard(maintenance_type, alias, batch_size):
+    maintenance_type_id = maintenance_type.pk
+    records = latest_records(maintenance_type_id).order_by('pk').values(
+        'pk', 'date_performed', 'mileage_at_service', 'next_due_date', 'next_due_mileage'
+    )
+    last_pk = 0
+    updated = 0
+    while True:
+        batch = list(records.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]['pk']
+
+        now = timezone.now()
+        changed = []
+        for row in batch:
+            next_due = maintenance_type.next_due(row['date_performed'], row['mileage_at_service'])
+            next_due_date = next_due['date'] or row['next_due_date']
+            next_due_mileage = next_due['mileage'] or row['next_due_mileage']
+            if (next_due_date, next_due_mileage) != (row['next_due_date'], row['next_due_mileage']):
+                changed.append(MaintenanceRecord(
+                    pk=row['pk'],
+                    next_due_date=next_due_date,
+                    next_due_mileage=next_due_mileage,
+                    updated_at=now
+                ))
+        if not changed:
+            continue
+
+        with transaction.atomic(using=alias):
+            MaintenanceRecord.objects.bulk_update(
+                changed, ['next_due_date', 'next_due_mileage', 'updated_at']
+            )
+            changed_ids = [record.pk for record in changed]
+            if maintenance_type.recommended_interval_months:
+                Reminder.objects.filter(
+                    maintenance_record_id__in=changed_ids
+                ).update(
+                    due_date=Subquery(
+                        MaintenanceRecord.objects.filter(
+                            pk=OuterRef('maintenance_record_id')
+                        ).values('next_due_date')[:1]
+                    ),
+                    updated_at=now
+                )
+                # Records that only now have a next due date get the reminder a save would give them
+                _create_missing_reminders(changed_ids)
+                # The bulk statements bypass the reminder signals
+                refresh_rollups_for_records(changed_ids, using=alias)
+        updated += len(changed)
+    return updated
+
+
+def _create_missing_reminders(record_ids):
+    records = MaintenanceRecord.objects.filter(
+        pk__in=record_ids,
+        next_due_date__isnull=False
+    ).exclude(
+        Exists(Reminder.objects.filter(maintenance_record=OuterRef('pk')))
+    ).values_list(
+        'pk', 'next_due_date', 'maintenance_type__name',
+        'vehicle__year', 'vehicle__make', 'vehicle__model_name', 'vehicle__registration_number'
+    )
+    Reminder.objects.bulk_create([
+        Reminder(
+            maintenance_record_id=pk,
+            due_date=next_due_date,
+            notes=reminder_notes(type_name, *vehicle_label),
+            is_completed=False
+        )
+        for pk, next_due_date, type_name, *vehicle_label in records
+    ])
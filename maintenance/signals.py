@@ -1,67 +1,149 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save, pre_delete
 from django.dispatch import receiver
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.utils import timezone
 import logging
 
-from .models import MaintenanceRecord, Reminder
+from common.sharding import is_sharded, mirror_reference_row
+from common.tasks import run_in_background
+from vehicles.models import Vehicle, VehicleImage
+from . import outbox
+from .benchmarks import record_cost
+from .caching import invalidate_all, invalidate_user
+from .models import MaintenanceType, MaintenanceRecord, Reminder
+from .rollups import refresh_rollups_for_records
+from .scheduling import recompute_next_due
 
 logger = logging.getLogger(__name__)
 
+@receiver(pre_save, sender=MaintenanceRecord)
+def validate_mileage(sender, instance, **kwargs):
+    """Refuse negative mileage before anything is written."""
+    if instance.mileage_at_service is not None and instance.mileage_at_service < 0:
+        raise ValidationError({
+            'mileage_at_service': 'Mileage cannot be negative.'
+        })
+
 @receiver(post_save, sender=MaintenanceRecord)
-def create_or_update_reminder(sender, instance, created, **kwargs):
+def queue_record_side_effects(sender, instance, using, **kwargs):
     """
-    Create, update, or delete a reminder when a maintenance record is saved.
+    Queue the record's reminder upsert, vehicle mileage update and vehicle
+    rollups in the outbox; they are applied after the commit
+    (maintenance.outbox).
     """
-    try:
-        with transaction.atomic():
-            if instance.next_due_date:
-                # Create or update the reminder
-                Reminder.objects.update_or_create(
-                    maintenance_record=instance,
-                    defaults={
-                        'due_date': instance.next_due_date,
-                        'is_completed': False,
-                        'notes': f"Upcoming maintenance for {instance.vehicle} - {instance.maintenance_type}"
-                    }
-                )
-                logger.info(f"Updated/created reminder for maintenance record {instance.id}")
-            else:
-                # Delete any existing reminders if next_due_date is removed
-                deleted_count, _ = instance.reminders.all().delete()
-                if deleted_count:
-                    logger.info(f"Deleted {deleted_count} reminder(s) for maintenance record {instance.id}")
-    except Exception as e:
-        logger.error(f"Error in create_or_update_reminder for maintenance record {instance.id}: {str(e)}")
-        # Re-raise the exception to ensure the transaction is rolled back
-        raise
+    outbox.record_saved(instance, using, moved_from=instance.get_loaded_value('vehicle_id'))
+    instance.refresh_loaded_values('vehicle_id')
 
-@receiver(pre_save, sender=MaintenanceRecord)
-def update_vehicle_mileage(sender, instance, **kwargs):
+@receiver(post_delete, sender=MaintenanceRecord)
+def queue_record_deletion_side_effects(sender, instance, using, **kwargs):
+    """Queue the rollup refresh of the deleted record's vehicle in the outbox."""
+    outbox.record_deleted(instance, using)
+
+@receiver(post_save, sender=MaintenanceRecord)
+def update_cost_sketches(sender, instance, created, **kwargs):
+    """
+    Feed the cost of a newly completed record into the cost benchmark sketches.
+    Sketches cannot forget values, so later edits are picked up by
+    ``rebuild_cost_sketches`` rather than here.
+    """
+    was_counted = (
+        instance.get_loaded_value('status') == MaintenanceRecord.Status.COMPLETED
+        and (instance.get_loaded_value('cost') or 0) > 0
+    )
+    # Later saves of this same instance compare against what was just written
+    instance.refresh_loaded_values('status', 'cost')
+    if was_counted or not instance.counts_towards_cost_benchmark:
+        return
+
+    type_id, provider, cost = instance.maintenance_type_id, instance.service_provider, instance.cost
+    transaction.on_commit(lambda: record_cost(type_id, provider, cost))
+
+
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def refresh_reminder_vehicle_rollups(sender, instance, using, **kwargs):
+    """Recompute the maintenance rollups of the reminder's vehicle."""
+    refresh_rollups_for_records([instance.maintenance_record_id], using=using)
+
+
+def _vehicle_owner(vehicle_id, using):
+    return Vehicle.objects.using(using).filter(pk=vehicle_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=MaintenanceRecord)
+@receiver(post_delete, sender=MaintenanceRecord)
+def invalidate_record_owner_cache(sender, instance, using, **kwargs):
+    """Drop the owner's cached upcoming responses."""
+    if MaintenanceRecord.vehicle.is_cached(instance):
+        user_id = instance.vehicle.user_id
+    else:
+        user_id = _vehicle_owner(instance.vehicle_id, using)
+    invalidate_user(user_id, using=using)
+
+
+@receiver(post_save, sender=Reminder)
+@receiver(post_delete, sender=Reminder)
+def invalidate_reminder_owner_cache(sender, instance, using, **kwargs):
+    """Drop the owner's cached upcoming responses."""
+    user_id = MaintenanceRecord.objects.using(using).filter(
+        pk=instance.maintenance_record_id
+    ).values_list('vehicle__user_id', flat=True).first()
+    invalidate_user(user_id, using=using)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_vehicle_owner_cache(sender, instance, using, **kwargs):
+    """Upcoming records embed their vehicle, so vehicle changes drop the owner's cache too."""
+    invalidate_user(instance.user_id, using=using)
+
+
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+def invalidate_vehicle_image_owner_cache(sender, instance, using, **kwargs):
+    """Drop the owner's cached upcoming responses, which embed the image URL."""
+    invalidate_user(_vehicle_owner(instance.vehicle_id, using), using=using)
+
+
+@receiver(post_save, sender=MaintenanceType)
+@receiver(post_delete, sender=MaintenanceType)
+def invalidate_cache_for_maintenance_type(sender, instance, using, **kwargs):
+    """Maintenance types are embedded in everyone's upcoming records."""
+    invalidate_all(using=using)
+
+
+@receiver(post_save, sender=MaintenanceType)
+def schedule_next_due_recomputation(sender, instance, created, **kwargs):
+    """
+    When a maintenance type's intervals change, recompute the next due values
+    of the affected records in the background once the change is committed.
+    """
+    interval_fields = ('recommended_interval_months', 'recommended_interval_km')
+    changed = not created and any(
+        instance.get_loaded_value(field) != getattr(instance, field)
+        for field in interval_fields
+    )
+    instance.refresh_loaded_values(*interval_fields)
+    if changed:
+        type_id = instance.pk
+        transaction.on_commit(lambda: run_in_background(recompute_next_due, type_id))
+
+
+@receiver(post_save, sender=MaintenanceType)
+def mirror_maintenance_type(sender, instance, using, **kwargs):
+    """Copy maintenance types to every shard so sharded records can reference them."""
+    if is_sharded() and using == 'default':
+        mirror_reference_row(instance)
+
+
+@receiver(pre_delete, sender=MaintenanceType)
+def delete_mirrored_maintenance_type(sender, instance, using, **kwargs):
     """
-    Update the vehicle's current mileage when a maintenance record is saved.
-    Only updates if the new mileage is higher than the current mileage.
+    Delete the shard copies first so a type still referenced on any shard is
+    protected just like one referenced on the default database.
     """
-    try:
-        if instance.mileage_at_service is not None and instance.vehicle:
-            # Ensure mileage is not negative
-            if instance.mileage_at_service < 0:
-                raise ValidationError({
-                    'mileage_at_service': 'Mileage cannot be negative.'
-                })
-                
-            # Only update if the new mileage is higher than current
-            if instance.mileage_at_service > instance.vehicle.current_mileage:
-                logger.info(
-                    f"Updating vehicle {instance.vehicle.id} mileage from "
-                    f"{instance.vehicle.current_mileage} to {instance.mileage_at_service}"
-                )
-                instance.vehicle.current_mileage = instance.mileage_at_service
-                # Only save if the vehicle isn't being created
-                if not instance.vehicle._state.adding:
-                    instance.vehicle.save(update_fields=['current_mileage'])
-    except Exception as e:
-        logger.error(f"Error in update_vehicle_mileage for maintenance record {instance.id}: {str(e)}")
-        # Re-raise the exception to ensure the transaction is rolled back
-        raise
\ No newline at end of file
+    if is_sharded() and using == 'default':
+        for alias in settings.DATABASE_SHARDS:
+            if alias != 'default':
+                MaintenanceType.objects.using(alias).filter(pk=instance.pk).delete()
@@ -0,0 +1,146 @@
+"""
+Mergeable t-digest used for fleet-wide cost percentiles.
+
+A digest keeps at most a few times ``compression`` centroids no matter how
+many values it has seen, so it can be stored in a single JSON column and
+queried or updated in constant time.
+"""
+import math
+
+
+class TDigest:
+    """Merging t-digest (Dunning & Ertl) with a compact dict serialization"""
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # sorted [mean, weight] pairs
+        self.buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value, weight=1):
+        """Add ``value`` with the given weight."""
+        value = float(value)
+        self.buffer.append([value, weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 4:
+            self.compress()
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        if not other.count:
+            return self
+        self.buffer.extend([mean, weight] for mean, weight in other.centroids)
+        self.buffer.extend([mean, weight] for mean, weight in other.buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compress()
+        return self
+
+    def compress(self):
+        """Merge buffered values into centroids within the size bound."""
+        if not self.buffer:
+            return
+        items = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = self.count
+        merged = [list(items[0])]
+        seen = 0
+        for mean, weight in items[1:]:
+            current = merged[-1]
+            proposed = current[1] + weight
+            q = (seen + proposed / 2) / total
+            if proposed <= max(1, 4 * total * q * (1 - q) / self.compression):
+                current[0] += (mean - current[0]) * weight / proposed
+                current[1] = proposed
+            else:
+                seen += current[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Estimate the value at quantile ``q`` (0..1)."""
+        self.compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1 or q <= 0:
+            return self.min if q <= 0 else self.centroids[0][0]
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        first_mean, first_weight = self.centroids[0]
+        if target < first_weight / 2:
+            return self.min + (first_mean - self.min) * target / (first_weight / 2)
+
+        cumulative = 0
+        for (mean, weight), (next_mean, next_weight) in zip(self.centroids, self.centroids[1:]):
+            left = cumulative + weight / 2
+            right = cumulative + weight + next_weight / 2
+            if target < right:
+                return mean + (next_mean - mean) * (target - left) / (right - left)
+            cumulative += weight
+
+        last_mean, last_weight = self.centroids[-1]
+        tail = target - (self.count - last_weight / 2)
+        return last_mean + (self.max - last_mean) * tail / (last_weight / 2)
+
+    def cdf(self, value):
+        """Estimate the fraction of values at or below ``value``."""
+        self.compress()
+        if not self.centroids:
+            return None
+        value = float(value)
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        first_mean, first_weight = self.centroids[0]
+        if value < first_mean:
+            span = first_mean - self.min
+            fraction = (value - self.min) / span if span else 1.0
+            return fraction * first_weight / 2 / self.count
+
+        cumulative = 0
+        for (mean, weight), (next_mean, next_weight) in zip(self.centroids, self.centroids[1:]):
+            if value < next_mean:
+                left = cumulative + weight / 2
+                right = cumulative + weight + next_weight / 2
+                fraction = (value - mean) / (next_mean - mean)
+                return (left + (right - left) * fraction) / self.count
+            cumulative += weight
+
+        last_mean, last_weight = self.centroids[-1]
+        span = self.max - last_mean
+        fraction = (value - last_mean) / span if span else 1.0
+        return (self.count - last_weight / 2 + fraction * last_weight / 2) / self.count
+
+    def to_dict(self):
+        """Serialize to a compact JSON-friendly dict."""
+        self.compress()
+        return {
+            'compression': self.compression,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'centroids': [[round(mean, 4), weight] for mean, weight in self.centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, data, compression=100):
+        """Rebuild a digest serialized with ``to_dict``."""
+        digest = cls(compression=(data or {}).get('compression', compression))
+        if data and data.get('count'):
+            digest.centroids = [list(centroid) for centroid in data['centroids']]
+            digest.count = data['count']
+            digest.min = data['min']
+            digest.max = data['max']
+        return digest
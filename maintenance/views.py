@@ -1,11 +1,17 @@
+import math
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 
-from .models import MaintenanceType, MaintenanceRecord, Reminder
+from common.mixins import ProjectionListMixin, ReplicaReadMixin, ShardRoutingMixin, StreamingListMixin
+from .archive import MergedRows, sort_key
+from .caching import cached_response
+from .models import ArchivedMaintenanceRecord, MaintenanceType, MaintenanceRecord, Reminder, CostSketch
 from .serializers import (
     MaintenanceTypeSerializer,
     MaintenanceRecordSerializer,
@@ -14,9 +20,17 @@ from .serializers import (
     ReminderSerializer,
     ReminderListSerializer
 )
+from .projections import (
+    ArchivedMaintenanceRecordProjection,
+    MaintenanceRecordListProjection,
+    MaintenanceRecordProjection,
+    ReminderListProjection,
+    ReminderProjection
+)
+from .sketches import TDigest
 from vehicles.models import Vehicle
 
-class MaintenanceTypeViewSet(viewsets.ModelViewSet):
+class MaintenanceTypeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """ViewSet for managing maintenance types"""
     queryset = MaintenanceType.objects.all()
     serializer_class = MaintenanceTypeSerializer
@@ -26,17 +40,111 @@ class MaintenanceTypeViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name']
     ordering = ['name']
 
-class MaintenanceRecordViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing maintenance records"""
+    @action(detail=True, methods=['get'], url_path='cost-benchmark')
+    def cost_benchmark(self, request, pk=None):
+        """
+        Fleet cost percentiles for this maintenance type, optionally for one
+        service provider, and where a given ``cost`` falls among them.
+        """
+        maintenance_type = self.get_object()
+        provider = CostSketch.normalize_provider(request.query_params.get('provider'))
+        try:
+            percentiles = [
+                float(p) for p in request.query_params.get('percentiles', '50,90').split(',')
+            ]
+            cost = request.query_params.get('cost')
+            cost = float(cost) if cost is not None else None
+            # float() accepts nan and inf, which can't be rendered as JSON
+            if not all(math.isfinite(value) for value in percentiles + [cost or 0]):
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'percentiles and cost must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if any(not 0 <= p <= 100 for p in percentiles):
+            return Response(
+                {'error': 'percentiles must be between 0 and 100'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sketch = CostSketch.objects.filter(
+            maintenance_type=maintenance_type,
+            service_provider=provider
+        ).first()
+        digest = TDigest.from_dict(sketch.digest if sketch else None)
+
+        data = {
+            'maintenance_type': maintenance_type.id,
+            'service_provider': provider or None,
+            'count': digest.count,
+            'percentiles': {
+                f"p{p:g}": self._round(digest.quantile(p / 100)) for p in percentiles
+            },
+        }
+        if cost is not None:
+            rank = digest.cdf(cost)
+            data['cost'] = cost
+            data['cost_percentile'] = self._round(rank * 100 if rank is not None else None)
+        return Response(data)
+
+    @staticmethod
+    def _round(value):
+        return round(value, 2) if value is not None else None
+
+class MaintenanceRecordViewSet(StreamingListMixin, ProjectionListMixin, ShardRoutingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for managing maintenance records. The list merges live and
+    archived records in one ordering (``?archived=false`` lists the live ones
+    only, ``?archived=true`` the archived ones); ``?stream=true`` streams it.
+    """
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['vehicle', 'maintenance_type', 'status']
+    filterset_fields = {
+        'vehicle': ['exact'],
+        'maintenance_type': ['exact'],
+        'status': ['exact'],
+        'date_performed': ['gte', 'lte'],
+    }
     search_fields = ['notes', 'service_provider']
     ordering_fields = ['date_performed', 'created_at', 'cost']
     ordering = ['-date_performed']
+    projection_class = MaintenanceRecordListProjection
 
     def get_queryset(self):
-        return MaintenanceRecord.objects.filter(vehicle__user=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation runs without a user
+            return MaintenanceRecord.objects.none()
+        if self.action == 'list' and self.request.query_params.get('archived', '').lower() in ('1', 'true'):
+            return self.get_archived_queryset()
+        return MaintenanceRecord.objects.filter(
+            vehicle__user=self.request.user,
+            vehicle__pending_delete_at__isnull=True
+        )
+
+    def get_archived_queryset(self):
+        return ArchivedMaintenanceRecord.objects.filter(
+            vehicle__user=self.request.user,
+            vehicle__pending_delete_at__isnull=True
+        )
+
+    def list(self, request, *args, **kwargs):
+        if 'archived' in request.query_params:
+            return super().list(request, *args, **kwargs)
+        live = self.filter_queryset(self.get_queryset())
+        archived = self.filter_queryset(self.get_archived_queryset())
+        # Routing is reset before a streamed body is read, so pin the databases
+        live, archived = live.using(live.db), archived.using(archived.db)
+        projection = self.projection_class(self.get_serializer_context())
+        querysets = [projection.rows(live), projection.rows(archived)]
+        ordering = live.query.order_by or MaintenanceRecord._meta.ordering
+        rows = MergedRows(querysets, sort_key(ordering, projection.columns))
+        if self.stream_requested():
+            return StreamingHttpResponse(self.stream_json(rows, projection.project), content_type='application/json')
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.project(page))
+        return Response(projection.project(rows.iterator()))
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -45,32 +153,31 @@ class MaintenanceRecordViewSet(viewsets.ModelViewSet):
             return MaintenanceRecordCreateSerializer
         return MaintenanceRecordSerializer
 
-    def perform_create(self, serializer):
-        serializer.save()
-        # Update vehicle's last maintenance date and mileage
-        vehicle = serializer.validated_data['vehicle']
-        vehicle.last_maintenance_date = serializer.validated_data['date_performed']
-        if 'mileage_at_service' in serializer.validated_data:
-            vehicle.current_mileage = max(
-                vehicle.current_mileage or 0,
-                serializer.validated_data['mileage_at_service']
-            )
-        vehicle.save()
+    def retrieve(self, request, *args, **kwargs):
+        """Get a maintenance record, read through to the archive once it has been archived"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            try:
+                archived = self.get_archived_queryset().filter(pk=kwargs['pk'])
+            except (TypeError, ValueError):
+                raise Http404
+            projection = ArchivedMaintenanceRecordProjection(self.get_serializer_context())
+            data = projection.project(projection.rows(archived))
+            if not data:
+                raise
+            return Response(data[0])
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
-        """Get upcoming maintenance records"""
+        """Get upcoming maintenance records (cached until midnight or the user's next write)"""
+        return cached_response(request, 'records', self.upcoming_response)
+
+    def upcoming_response(self):
         upcoming_records = self.get_queryset().filter(
             next_due_date__gte=timezone.now().date()
         ).order_by('next_due_date')
-        
-        page = self.paginate_queryset(upcoming_records)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = self.get_serializer(upcoming_records, many=True)
-        return Response(serializer.data)
+        return self.projected_list(upcoming_records, MaintenanceRecordProjection)
 
     @action(detail=True, methods=['post'])
     def create_reminder(self, request, pk=None):
@@ -86,18 +193,22 @@ class MaintenanceRecordViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ReminderViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing maintenance reminders"""
+class ReminderViewSet(StreamingListMixin, ProjectionListMixin, ShardRoutingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
+    """ViewSet for managing maintenance reminders (``?stream=true`` streams the full list)"""
     serializer_class = ReminderSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['is_completed']
     ordering_fields = ['due_date', 'created_at']
     ordering = ['due_date']
+    projection_class = ReminderListProjection
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Reminder.objects.none()
         return Reminder.objects.filter(
-            maintenance_record__vehicle__user=self.request.user
+            maintenance_record__vehicle__user=self.request.user,
+            maintenance_record__vehicle__pending_delete_at__isnull=True
         )
 
     def get_serializer_class(self):
@@ -123,16 +234,12 @@ class ReminderViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
-        """Get upcoming reminders"""
+        """Get upcoming reminders (cached until midnight or the user's next write)"""
+        return cached_response(request, 'reminders', self.upcoming_response)
+
+    def upcoming_response(self):
         upcoming_reminders = self.get_queryset().filter(
             is_completed=False,
             due_date__gte=timezone.now().date()
         ).order_by('due_date')
-        
-        page = self.paginate_queryset(upcoming_reminders)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = self.get_serializer(upcoming_reminders, many=True)
-        return Response(serializer.data)
+        return self.projected_list(upcoming_reminders, ReminderProjection)
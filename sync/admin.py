@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import DeletionLog
+
+@admin.register(DeletionLog)
+class DeletionLogAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'user_id', 'deleted_at')
+    list_filter = ('kind',)
+    readonly_fields = ('user_id', 'kind', 'object_id', 'deleted_at')
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sync'
+
+    def ready(self):
+        # Import signals to register them
+        import sync.signals  # noqa
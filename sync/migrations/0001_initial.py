@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(verbose_name='user id')),
+                ('kind', models.CharField(choices=[('vehicle', 'Vehicle'), ('maintenance_record', 'Maintenance record'), ('reminder', 'Reminder')], max_length=30, verbose_name='kind')),
+                ('object_id', models.BigIntegerField(verbose_name='object id')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='deleted at')),
+            ],
+            options={
+                'verbose_name': 'deletion log entry',
+                'verbose_name_plural': 'deletion log',
+                'indexes': [models.Index(fields=['user_id', 'deleted_at'], name='sync_deletion_user_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from django.db import models
+
+
+class DeletionLog(models.Model):
+    """Tombstone recorded when a synced row is deleted"""
+
+    class Kind(models.TextChoices):
+        VEHICLE = 'vehicle', _('Vehicle')
+        MAINTENANCE_RECORD = 'maintenance_record', _('Maintenance record')
+        REMINDER = 'reminder', _('Reminder')
+
+    # Plain id rather than a foreign key so tombstones written while an
+    # account is being cascade-deleted never reference a missing user.
+    user_id = models.BigIntegerField(_('user id'))
+    kind = models.CharField(_('kind'), max_length=30, choices=Kind.choices)
+    object_id = models.BigIntegerField(_('object id'))
+    deleted_at = models.DateTimeField(_('deleted at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('deletion log entry')
+        verbose_name_plural = _('deletion log')
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at'], name='sync_deletion_user_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.deleted_at}"
@@ -0,0 +1,43 @@
+from rest_framework import serializers
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from vehicles.models import Vehicle
+
+
+class SyncVehicleSerializer(serializers.ModelSerializer):
+    """Flat vehicle representation used by the sync endpoint"""
+    class Meta:
+        model = Vehicle
+        fields = [
+            'id', 'make', 'model_name', 'registration_number', 'vehicle_type',
+            'year', 'color', 'vin_number', 'purchase_date', 'current_mileage',
+            'created_at', 'updated_at'
+        ]
+
+
+class SyncMaintenanceRecordSerializer(serializers.ModelSerializer):
+    """Flat maintenance record representation used by the sync endpoint"""
+    class Meta:
+        model = MaintenanceRecord
+        fields = [
+            'id', 'vehicle', 'maintenance_type', 'date_performed',
+            'mileage_at_service', 'cost', 'service_provider', 'notes',
+            'next_due_date', 'next_due_mileage', 'status',
+            'created_at', 'updated_at'
+        ]
+
+
+class SyncArchivedMaintenanceRecordSerializer(serializers.ModelSerializer):
+    """Archived record in the same representation as a live one"""
+    class Meta:
+        model = ArchivedMaintenanceRecord
+        fields = SyncMaintenanceRecordSerializer.Meta.fields
+
+
+class SyncReminderSerializer(serializers.ModelSerializer):
+    """Flat reminder representation used by the sync endpoint"""
+    class Meta:
+        model = Reminder
+        fields = [
+            'id', 'maintenance_record', 'due_date', 'is_completed', 'notes',
+            'created_at', 'updated_at'
+        ]
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+
+from maintenance.models import MaintenanceRecord, Reminder
+from vehicles.models import Vehicle
+from .models import DeletionLog
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Vehicle)
+def log_vehicle_deletion(sender, instance, **kwargs):
+    """Leave a tombstone for a deleted vehicle."""
+    DeletionLog.objects.create(
+        user_id=instance.user_id,
+        kind=DeletionLog.Kind.VEHICLE,
+        object_id=instance.pk
+    )
+
+
+@receiver(post_delete, sender=MaintenanceRecord)
+def log_maintenance_record_deletion(sender, instance, **kwargs):
+    """Leave a tombstone for a deleted maintenance record."""
+    user_id = Vehicle.objects.filter(
+        pk=instance.vehicle_id
+    ).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        DeletionLog.objects.create(
+            user_id=user_id,
+            kind=DeletionLog.Kind.MAINTENANCE_RECORD,
+            object_id=instance.pk
+        )
+
+
+@receiver(post_delete, sender=Reminder)
+def log_reminder_deletion(sender, instance, **kwargs):
+    """Leave a tombstone for a deleted reminder."""
+    user_id = MaintenanceRecord.objects.filter(
+        pk=instance.maintenance_record_id
+    ).values_list('vehicle__user_id', flat=True).first()
+    if user_id is not None:
+        DeletionLog.objects.create(
+            user_id=user_id,
+            kind=DeletionLog.Kind.REMINDER,
+            object_id=instance.pk
+        )
+
+
+@receiver(post_delete, sender=User)
+def purge_user_deletion_log(sender, instance, **kwargs):
+    """Drop the tombstones of a deleted account; nobody is left to sync them."""
+    DeletionLog.objects.filter(user_id=instance.pk).delete()
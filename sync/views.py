@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.mixins import ShardRoutingMixin
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from vehicles.models import Vehicle
+from .models import DeletionLog
+from .serializers import (
+    SyncArchivedMaintenanceRecordSerializer,
+    SyncVehicleSerializer,
+    SyncMaintenanceRecordSerializer,
+    SyncReminderSerializer
+)
+
+DELETED_KEYS = {
+    DeletionLog.Kind.VEHICLE: 'vehicles',
+    DeletionLog.Kind.MAINTENANCE_RECORD: 'maintenance_records',
+    DeletionLog.Kind.REMINDER: 'reminders',
+}
+
+
+class SyncView(ShardRoutingMixin, APIView):
+    """
+    Return the vehicles, maintenance records and reminders changed since the
+    client's ``updated_since`` watermark, plus tombstones for deleted rows.
+
+    Archived records are part of the history: a full sync includes them with
+    their stored reminders, a delta sync those updated or archived since the
+    watermark (archiving deletes the live rows without tombstones).
+
+    Always read from the primary: rows a lagging replica has not replayed yet
+    would fall behind the returned watermark and never be sent.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = None
+        since_param = request.query_params.get('updated_since')
+        if since_param:
+            since = parse_datetime(since_param)
+            if since is None:
+                return Response(
+                    {'updated_since': ['Enter a valid ISO 8601 datetime.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        now = timezone.now()
+        # Tombstones are purged after the retention window, so a client that
+        # has been offline for longer than that needs a full resync.
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if since is not None and since < now - retention:
+            since = None
+
+        # Vehicles pending deletion are already tombstoned
+        vehicles = Vehicle.objects.filter(user=request.user, pending_delete_at__isnull=True)
+        records = MaintenanceRecord.objects.filter(
+            vehicle__user=request.user,
+            vehicle__pending_delete_at__isnull=True
+        )
+        reminders = Reminder.objects.filter(
+            maintenance_record__vehicle__user=request.user,
+            maintenance_record__vehicle__pending_delete_at__isnull=True
+        )
+        archived = ArchivedMaintenanceRecord.objects.filter(
+            vehicle__user=request.user,
+            vehicle__pending_delete_at__isnull=True
+        )
+        deleted = {key: [] for key in DELETED_KEYS.values()}
+
+        if since is not None:
+            vehicles = vehicles.filter(updated_at__gt=since)
+            records = records.filter(updated_at__gt=since)
+            reminders = reminders.filter(updated_at__gt=since)
+            archived = archived.filter(Q(updated_at__gt=since) | Q(archived_at__gt=since))
+            tombstones = DeletionLog.objects.filter(
+                user_id=request.user.pk,
+                deleted_at__gt=since
+            ).order_by('deleted_at').values_list('kind', 'object_id')
+            for kind, object_id in tombstones:
+                deleted[DELETED_KEYS[kind]].append(object_id)
+
+        # The returned watermark overlaps the last few seconds so rows from
+        # transactions that committed while this query ran are sent again
+        # next time instead of being missed; clients apply changes idempotently.
+        watermark = now - timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP_SECONDS)
+
+        archived = list(archived.order_by('updated_at'))
+        archived_reminders = [
+            {field: reminder[field] for field in SyncReminderSerializer.Meta.fields}
+            for record in archived for reminder in record.reminders
+        ]
+
+        return Response({
+            'watermark': watermark.isoformat(),
+            'full': since is None,
+            'vehicles': SyncVehicleSerializer(
+                vehicles.order_by('updated_at'), many=True
+            ).data,
+            'maintenance_records': SyncMaintenanceRecordSerializer(
+                records.order_by('updated_at'), many=True
+            ).data + SyncArchivedMaintenanceRecordSerializer(archived, many=True).data,
+            'reminders': SyncReminderSerializer(
+                reminders.order_by('updated_at'), many=True
+            ).data + archived_reminders,
+            'deleted': deleted,
+        })
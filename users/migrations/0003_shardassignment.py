@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def assign_existing_users_to_default(apps, schema_editor):
+    # Data created before sharding lives on the default database
+    User = apps.get_model('users', 'User')
+    ShardAssignment = apps.get_model('users', 'ShardAssignment')
+    db_alias = schema_editor.connection.alias
+    ShardAssignment.objects.using(db_alias).bulk_create(
+        [ShardAssignment(user_id=pk) for pk in User.objects.using(db_alias).values_list('pk', flat=True)],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_date_joined'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardAssignment',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='shard_assignment', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('alias', models.CharField(default='default', max_length=50)),
+                ('is_moving', models.BooleanField(default=False, help_text='Writes are refused while the user is being moved between shards')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(assign_existing_users_to_default, migrations.RunPython.noop),
+    ]
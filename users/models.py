@@ -27,6 +27,8 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Set (with is_active cleared) when the account is deleted; the data goes in the background
+    pending_delete_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
@@ -44,3 +46,22 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
     def get_short_name(self):
         """Return the short name for the user."""
         return self.first_name
+
+
+class ShardAssignment(models.Model):
+    """Database shard holding a user's vehicles, maintenance records and reminders"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='shard_assignment'
+    )
+    alias = models.CharField(max_length=50, default='default')
+    is_moving = models.BooleanField(
+        default=False,
+        help_text='Writes are refused while the user is being moved between shards'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from common.sharding import invalidate_assignment, is_sharded, shard_for_user, use_shard
+from .models import User
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_user_data(sender, instance, **kwargs):
+    """
+    Cascade an account deletion to the user's shard; the deletion collector
+    only sees rows on the database the user itself lives on.
+    """
+    if not is_sharded():
+        return
+    alias = shard_for_user(instance.pk)
+    if alias != 'default':
+        from vehicles.models import Vehicle
+        with use_shard(alias), transaction.atomic(using=alias):
+            Vehicle.objects.filter(user_id=instance.pk).delete()
+    invalidate_assignment(instance.pk)
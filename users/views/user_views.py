@@ -4,6 +4,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
 from users.serializers.user_serializers import UserRegistrationSerializer, UserProfileSerializer
+from vehicles.deletion import request_account_deletion
 
 User = get_user_model()
 
@@ -66,10 +67,10 @@ class DeleteAccountView(generics.DestroyAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete the user
-        user.delete()
+        # Deactivate the account now; its data is deleted in the background
+        request_account_deletion(user)
         
         return Response(
-            {"message": "Account deleted successfully."},
-            status=status.HTTP_204_NO_CONTENT
+            {"message": "Account scheduled for deletion."},
+            status=status.HTTP_202_ACCEPTED
         )
@@ -1,16 +1,24 @@
 from django.contrib import admin
+from common.admin import ScaleModeAdminMixin
 from .models import Vehicle, VehicleImage
 
 @admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
+class VehicleAdmin(ScaleModeAdminMixin, admin.ModelAdmin):
     list_display = ('make', 'model_name', 'registration_number', 'vehicle_type', 'year', 'user')
     list_filter = ('vehicle_type', 'year', 'make')
+    list_select_related = ('user',)
+    scale_list_filter = ('vehicle_type',)
     search_fields = ('make', 'model_name', 'registration_number', 'vin_number')
-    readonly_fields = ('created_at', 'updated_at')
+    autocomplete_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at') + Vehicle.ROLLUP_FIELDS
     fieldsets = (
         (None, {
             'fields': ('user', 'make', 'model_name', 'registration_number', 'vehicle_type')
         }),
+        ('Maintenance', {
+            'fields': Vehicle.ROLLUP_FIELDS,
+            'classes': ('collapse',)
+        }),
         ('Additional Information', {
             'fields': ('year', 'color', 'vin_number', 'purchase_date', 'current_mileage'),
             'classes': ('collapse',)
@@ -22,8 +30,10 @@ class VehicleAdmin(admin.ModelAdmin):
     )
 
 @admin.register(VehicleImage)
-class VehicleImageAdmin(admin.ModelAdmin):
+class VehicleImageAdmin(ScaleModeAdminMixin, admin.ModelAdmin):
     list_display = ('vehicle', 'uploaded_at')
+    list_select_related = ('vehicle',)
+    autocomplete_fields = ('vehicle',)
     readonly_fields = ('uploaded_at',)
     fieldsets = (
         (None, {
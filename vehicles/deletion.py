@@ -0,0 +1,175 @@
+"""
+Deletion of vehicles and accounts in the background.
+
+Deleting a vehicle or an account only marks it (``pending_delete_at``),
+which hides it from the API at once. The rows are then removed after the
+request, deepest table first (reminders, maintenance records, archived
+records, images, vehicles), in batches of ``DELETION_BATCH_SIZE`` primary keys looked up
+through the foreign key indexes. Every batch is its own short transaction,
+so nothing holds locks on a large history for long and an interrupted run
+simply continues where it stopped (``process_pending_deletions``). Image
+files are removed from storage once the rows referring to them are gone.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from common.metrics import registry
+from common.sharding import shard_for_user, use_shard
+from common.tasks import run_in_background
+from maintenance.caching import invalidate_user
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from sync.models import DeletionLog
+from users.models import User
+from .models import Vehicle, VehicleImage
+
+logger = logging.getLogger(__name__)
+
+image_storage = VehicleImage._meta.get_field('image').storage
+
+
+def request_vehicle_deletion(vehicle):
+    """Hide ``vehicle`` now and delete it with its history after the commit."""
+    alias = vehicle._state.db
+    marked = Vehicle.objects.using(alias).filter(
+        pk=vehicle.pk,
+        pending_delete_at__isnull=True
+    ).update(pending_delete_at=timezone.now())
+    if not marked:
+        return
+    # Synced clients drop the vehicle now rather than when the rows are gone
+    DeletionLog.objects.create(
+        user_id=vehicle.user_id,
+        kind=DeletionLog.Kind.VEHICLE,
+        object_id=vehicle.pk
+    )
+    invalidate_user(vehicle.user_id, using=alias)
+    transaction.on_commit(lambda: run_in_background(purge_vehicle, vehicle.pk, alias), using=alias)
+
+
+def request_account_deletion(user):
+    """Deactivate ``user`` now and delete the account with all its data after the commit."""
+    User.objects.filter(pk=user.pk).update(is_active=False, pending_delete_at=timezone.now())
+    transaction.on_commit(lambda: run_in_background(purge_account, user.pk))
+
+
+def purge_vehicle(vehicle_id, alias):
+    """Delete a vehicle marked for deletion and everything hanging off it."""
+    with use_shard(alias):
+        vehicle = Vehicle.objects.using(alias).filter(
+            pk=vehicle_id,
+            pending_delete_at__isnull=False
+        ).values('user_id').first()
+        if vehicle is None:
+            return
+        purge_vehicles([vehicle_id], alias, tombstone_user_id=vehicle['user_id'])
+    logger.info("Deleted vehicle %s", vehicle_id)
+
+
+def purge_account(user_id):
+    """Delete an account marked for deletion, its vehicles first, batch by batch."""
+    user = User.objects.filter(pk=user_id, pending_delete_at__isnull=False).first()
+    if user is None:
+        return
+    alias = shard_for_user(user_id)
+    vehicles = Vehicle.objects.using(alias).filter(user_id=user_id).order_by('pk').values_list('pk', flat=True)
+    with use_shard(alias):
+        while True:
+            vehicle_ids = list(vehicles[:settings.DELETION_BATCH_SIZE])
+            if not vehicle_ids:
+                break
+            # The account's tombstones are purged with it, so none are written
+            purge_vehicles(vehicle_ids, alias)
+    # Only a handful of rows (tokens, exports, the shard assignment) are left
+    # for the regular collector and its signals.
+    user.delete()
+    logger.info("Deleted account %s", user_id)
+
+
+def purge_vehicles(vehicle_ids, alias, tombstone_user_id=None):
+    """
+    Delete ``vehicle_ids`` on ``alias`` and their dependent rows, deepest
+    table first, writing sync tombstones for ``tombstone_user_id`` if given.
+    """
+    _delete_in_batches(
+        Reminder.objects.using(alias).filter(maintenance_record__vehicle_id__in=vehicle_ids),
+        alias,
+        DeletionLog.Kind.REMINDER if tombstone_user_id else None,
+        tombstone_user_id
+    )
+    for model in (MaintenanceRecord, ArchivedMaintenanceRecord):
+        _delete_in_batches(
+            model.objects.using(alias).filter(vehicle_id__in=vehicle_ids),
+            alias,
+            DeletionLog.Kind.MAINTENANCE_RECORD if tombstone_user_id else None,
+            tombstone_user_id
+        )
+    _delete_images(vehicle_ids, alias)
+    _delete_in_batches(Vehicle.objects.using(alias).filter(pk__in=vehicle_ids), alias)
+
+
+def _delete_in_batches(queryset, alias, kind=None, tombstone_user_id=None):
+    """
+    Delete the rows of ``queryset`` ``DELETION_BATCH_SIZE`` primary keys at a
+    time without loading instances; deletion signals do not fire.
+    """
+    model = queryset.model
+    pks = queryset.order_by().values_list('pk', flat=True)
+    deleted = 0
+    while True:
+        with transaction.atomic(using=alias):
+            batch = list(pks[:settings.DELETION_BATCH_SIZE])
+            if not batch:
+                break
+            if kind is not None:
+                # Written first: a tombstone for a row that survives a failed
+                # batch is harmless, a deleted row without one is not.
+                DeletionLog.objects.bulk_create([
+                    DeletionLog(user_id=tombstone_user_id, kind=kind, object_id=pk) for pk in batch
+                ])
+            deleted += model._base_manager.using(alias).filter(pk__in=batch)._raw_delete(alias)
+    if deleted:
+        registry.inc('deleted_rows_total', (('table', model._meta.db_table),), deleted)
+    return deleted
+
+
+def _delete_images(vehicle_ids, alias):
+    """Delete the image rows of ``vehicle_ids``, then their files once each batch commits."""
+    images = VehicleImage.objects.using(alias).filter(vehicle_id__in=vehicle_ids).order_by()
+    deleted = 0
+    while True:
+        with transaction.atomic(using=alias):
+            batch = list(images.values_list('pk', 'image')[:settings.DELETION_BATCH_SIZE])
+            if not batch:
+                break
+            deleted += VehicleImage._base_manager.using(alias).filter(
+                pk__in=[pk for pk, _ in batch]
+            )._raw_delete(alias)
+            names = [name for _, name in batch if name]
+            transaction.on_commit(lambda names=names: _delete_files(names), using=alias)
+    if deleted:
+        registry.inc('deleted_rows_total', (('table', VehicleImage._meta.db_table),), deleted)
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            image_storage.delete(name)
+        except OSError:
+            # Left behind rather than failing the rest of the deletion
+            logger.warning("Could not delete image file %s", name, exc_info=True)
+
+
+def pending_deletions():
+    """``(account ids, [(vehicle id, alias)])`` still marked for deletion."""
+    accounts = list(User.objects.filter(pending_delete_at__isnull=False).values_list('pk', flat=True))
+    vehicles = []
+    for alias in settings.DATABASE_SHARDS:
+        vehicles.extend(
+            (pk, alias) for pk in Vehicle.objects.using(alias).filter(
+                pending_delete_at__isnull=False
+            ).values_list('pk', flat=True)
+        )
+    return accounts, vehicles
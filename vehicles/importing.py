@@ -0,0 +1,190 @@
+"""
+Bulk vehicle import keyed by registration number.
+
+Rows come from a CSV or JSON ``file`` upload or a JSON body. They are
+validated with ``VehicleImportSerializer`` ``VEHICLE_IMPORT_CHUNK_SIZE`` at a
+time, and each chunk is written with one ``INSERT ... ON CONFLICT
+(registration_number) DO UPDATE`` per set of provided columns: the user's
+existing vehicles are updated in place, new ones inserted, without a
+``save()`` per row (VINs are normalized as ``Vehicle.save`` would). Rows
+that fail validation, repeat a registration number or collide with another
+user's vehicle are reported with their errors; the rest are imported.
+"""
+import csv
+import io
+import itertools
+import json
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, router, transaction
+from rest_framework.exceptions import ValidationError
+
+from maintenance.caching import invalidate_user
+from .models import Vehicle
+from .serializers import VehicleImportSerializer
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = VehicleImportSerializer.Meta.fields
+
+
+class ConcurrentImportConflict(Exception):
+    """Another user took one of the chunk's registration numbers while it was written."""
+
+
+def parse_rows(request):
+    """The rows of an import request as a list; ``ValidationError`` if it can't be read."""
+    max_rows = settings.VEHICLE_IMPORT_MAX_ROWS
+    upload = request.FILES.get('file')
+    if upload is not None:
+        try:
+            content = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError({'file': ['The file must be UTF-8 encoded.']})
+        if upload.name.lower().endswith('.json') or upload.content_type == 'application/json':
+            rows = _load_json(content)
+        else:
+            reader = csv.DictReader(io.StringIO(content))
+            rows = [clean_csv_row(row) for row in itertools.islice(reader, max_rows + 1)]
+    else:
+        rows = request.data
+    if isinstance(rows, dict):
+        rows = rows.get('vehicles')
+    if not isinstance(rows, list):
+        raise ValidationError({
+            'detail': ['Upload a CSV or JSON file as "file", or send a JSON list of vehicles.']
+        })
+    if len(rows) > max_rows:
+        raise ValidationError({'detail': [f"An import can hold at most {max_rows} vehicles."]})
+    return rows
+
+
+def _load_json(content):
+    try:
+        return json.loads(content)
+    except ValueError:
+        raise ValidationError({'file': ['The file is not valid JSON.']})
+
+
+def clean_csv_row(row):
+    """A CSV row as serializer input; empty cells are null (or blank) where the column allows it."""
+    data = {}
+    for column, value in row.items():
+        if column is None or value is None:
+            continue
+        name = column.strip().lower()
+        if name not in IMPORT_FIELDS:
+            continue
+        value = value.strip()
+        if value == '':
+            field = Vehicle._meta.get_field(name)
+            if field.null:
+                value = None
+            elif not field.blank:
+                # Left out, so the model default applies to new vehicles
+                continue
+        data[name] = value
+    return data
+
+
+def import_vehicles(user, rows):
+    """
+    Insert or update ``rows`` as vehicles of ``user``. Returns the number
+    created and updated, and ``errors`` for the rows that were skipped
+    (``row`` is 1-based, not counting a CSV header).
+    """
+    result = {'created': 0, 'updated': 0, 'errors': []}
+    alias = router.db_for_write(Vehicle)
+    seen = {}
+    chunk_size = settings.VEHICLE_IMPORT_CHUNK_SIZE
+    for start in range(0, len(rows), chunk_size):
+        chunk = list(enumerate(rows[start:start + chunk_size], start + 1))
+        _import_chunk(user, chunk, alias, seen, result)
+    if result['created'] or result['updated']:
+        invalidate_user(user.pk, using=alias)
+    result['errors'].sort(key=lambda error: error['row'])
+    return result
+
+
+def _import_chunk(user, chunk, alias, seen, result):
+    valid = []
+    for number, row in chunk:
+        if not isinstance(row, dict):
+            _report(result, number, row, {'non_field_errors': ['Expected an object.']})
+            continue
+        row = dict(row)
+        if isinstance(row.get('vin_number'), str):
+            # Before validation, so spaced-out VINs still fit the 17 characters
+            row['vin_number'] = Vehicle.normalize_vin(row['vin_number'])
+        serializer = VehicleImportSerializer(data=row)
+        if not serializer.is_valid():
+            _report(result, number, row, serializer.errors)
+            continue
+        registration_number = serializer.validated_data['registration_number']
+        if registration_number in seen:
+            _report(result, number, row, {
+                'registration_number': [f"Already imported from row {seen[registration_number]}."]
+            })
+            continue
+        seen[registration_number] = number
+        valid.append((number, serializer.validated_data))
+    if not valid:
+        return
+
+    vehicles = Vehicle.objects.using(alias)
+    writable = []
+    try:
+        with transaction.atomic(using=alias):
+            existing = {
+                registration_number: (user_id, pending_delete_at)
+                for registration_number, user_id, pending_delete_at in vehicles.filter(
+                    registration_number__in=[data['registration_number'] for _, data in valid]
+                ).values_list('registration_number', 'user_id', 'pending_delete_at')
+            }
+            updated = 0
+            groups = {}
+            for number, data in valid:
+                owner = existing.get(data['registration_number'])
+                if owner is not None and owner[0] != user.pk:
+                    _report(result, number, data, {
+                        'registration_number': ['A vehicle with this registration number already exists.']
+                    })
+                    continue
+                if owner is not None and owner[1] is not None:
+                    _report(result, number, data, {
+                        'registration_number': ['This vehicle is being deleted; import it again once it is gone.']
+                    })
+                    continue
+                writable.append((number, data))
+                updated += owner is not None
+                groups.setdefault(frozenset(data), []).append(data)
+
+            # Only the columns a row provides are updated on existing vehicles
+            for fields, group in groups.items():
+                vehicles.bulk_create(
+                    [Vehicle(user=user, **data) for data in group],
+                    update_conflicts=True,
+                    unique_fields=['registration_number'],
+                    update_fields=sorted(fields - {'registration_number'}) + ['updated_at']
+                )
+            # A vehicle another user inserted since the check above was just overwritten
+            if vehicles.filter(
+                registration_number__in=[data['registration_number'] for _, data in writable]
+            ).exclude(user=user).exists():
+                raise ConcurrentImportConflict()
+    except (ConcurrentImportConflict, DatabaseError):
+        logger.warning("Vehicle import chunk of user %s rolled back", user.pk, exc_info=True)
+        for number, data in writable:
+            _report(result, number, data, {'non_field_errors': ['Could not be saved; import this row again.']})
+        return
+    result['created'] += len(writable) - updated
+    result['updated'] += updated
+
+
+def _report(result, number, row, errors):
+    result['errors'].append({
+        'row': number,
+        'registration_number': row.get('registration_number') if isinstance(row, dict) else None,
+        'errors': errors,
+    })
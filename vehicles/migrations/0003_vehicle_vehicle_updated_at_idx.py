@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_alter_vehicleimage_options_remove_vehicleimage_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['updated_at'], name='vehicle_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:23
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_rollups(apps, schema_editor):
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    MaintenanceRecord = apps.get_model('maintenance', 'MaintenanceRecord')
+    Reminder = apps.get_model('maintenance', 'Reminder')
+    alias = schema_editor.connection.alias
+    services = MaintenanceRecord.objects.using(alias).filter(
+        vehicle_id=OuterRef('pk'), status='completed'
+    ).order_by().values('vehicle_id')
+    open_reminders = Reminder.objects.using(alias).filter(
+        maintenance_record__vehicle_id=OuterRef('pk'), is_completed=False
+    ).order_by().values('maintenance_record__vehicle_id')
+    Vehicle.objects.using(alias).update(
+        last_service_date=Subquery(services.annotate(value=Max('date_performed')).values('value')),
+        next_due_date=Subquery(open_reminders.annotate(value=Min('due_date')).values('value')),
+        total_spent=Coalesce(
+            Subquery(services.annotate(value=Sum('cost')).values('value')),
+            Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ),
+        open_reminders=Coalesce(
+            Subquery(open_reminders.annotate(value=Count('pk')).values('value'), output_field=IntegerField()),
+            0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_alter_vehicle_user'),
+        ('maintenance', '0004_maintenancerecord_record_vehicle_timeline_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='last_service_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='last service date'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='next_due_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='next due date'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='open_reminders',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='open reminders'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='total_spent',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='total spent'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_vehicle_maintenance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='pending_delete_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='pending delete since'),
+        ),
+    ]
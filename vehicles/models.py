@@ -11,7 +11,9 @@ class Vehicle(BaseModel):
         User,
         on_delete=models.CASCADE,
         related_name='vehicles',
-        verbose_name=_('owner')
+        verbose_name=_('owner'),
+        # Users live on the default database while vehicles may be on a shard
+        db_constraint=False
     )
     make = models.CharField(_('manufacturer'), max_length=100)
     model_name = models.CharField(_('model'), max_length=100)
@@ -42,20 +44,55 @@ class Vehicle(BaseModel):
         default=0,
         help_text=_('Current mileage in kilometers')
     )
+
+    # Maintenance rollups, maintained by maintenance.rollups; never edited directly
+    last_service_date = models.DateField(_('last service date'), null=True, blank=True, editable=False)
+    next_due_date = models.DateField(_('next due date'), null=True, blank=True, editable=False)
+    total_spent = models.DecimalField(
+        _('total spent'),
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False
+    )
+    open_reminders = models.PositiveIntegerField(_('open reminders'), default=0, editable=False)
+
+    ROLLUP_FIELDS = ('last_service_date', 'next_due_date', 'total_spent', 'open_reminders')
+
+    # Set when the vehicle is deleted; the rows themselves go in the background (vehicles.deletion)
+    pending_delete_at = models.DateTimeField(_('pending delete since'), null=True, blank=True, editable=False)
     
     class Meta:
         verbose_name = _('vehicle')
         verbose_name_plural = _('vehicles')
         # ordering = ['-created_at']
         unique_together = ['user', 'registration_number']
+        indexes = [
+            models.Index(fields=['updated_at'], name='vehicle_updated_at_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.year} {self.make} {self.model_name} ({self.registration_number})"
+        return self.format_label(self.year, self.make, self.model_name, self.registration_number)
+
+    @staticmethod
+    def format_label(year, make, model_name, registration_number):
+        """The ``str()`` of a vehicle, from its column values."""
+        return f"{year} {make} {model_name} ({registration_number})"
+
+    @staticmethod
+    def normalize_vin(vin_number):
+        """VINs are stored uppercase and without spaces."""
+        return vin_number.upper().replace(" ", "") if vin_number else vin_number
     
     def save(self, *args, **kwargs):
-        # Ensure VIN is uppercase and without spaces
-        if self.vin_number:
-            self.vin_number = self.vin_number.upper().replace(" ", "")
+        self.vin_number = self.normalize_vin(self.vin_number)
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            # The rollups on this instance may be stale and a pending delete
+            # must not be undone by it; only set-based updates write them
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ROLLUP_FIELDS + ('pending_delete_at',)
+            ]
         super().save(*args, **kwargs)
 
 
@@ -0,0 +1,17 @@
+from common.projections import Projection
+from .models import VehicleImage
+from .serializers import VehicleListSerializer
+
+image_storage = VehicleImage._meta.get_field('image').storage
+
+
+class VehicleListProjection(Projection):
+    """Projection of ``VehicleListSerializer``"""
+    serializer_class = VehicleListSerializer
+    extra_lookups = ('image__image',)
+
+    def project_vehicle_image(self, row):
+        name = self.value(row, 'image__image')
+        if not name:
+            return None
+        return self.absolute_url(image_storage.url(name))
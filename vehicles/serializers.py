@@ -9,8 +9,8 @@ class VehicleImageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = VehicleImage
-        fields = ['id', 'image', 'image_url', 'caption', 'is_primary', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = ['vehicle', 'image', 'image_url', 'caption', 'uploaded_at']
+        read_only_fields = ['vehicle', 'uploaded_at']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -72,6 +72,19 @@ class VehicleSerializer(serializers.ModelSerializer):
         return instance
 
 
+class VehicleImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk vehicle import (vehicles.importing)"""
+
+    class Meta:
+        model = Vehicle
+        fields = [
+            'registration_number', 'make', 'model_name', 'vehicle_type', 'year',
+            'color', 'vin_number', 'purchase_date', 'current_mileage'
+        ]
+        # Registration numbers are checked per chunk, not with a query per row
+        extra_kwargs = {'registration_number': {'validators': []}}
+
+
 class VehicleListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing vehicles"""
     vehicle_image = serializers.SerializerMethodField()
@@ -80,7 +93,8 @@ class VehicleListSerializer(serializers.ModelSerializer):
         model = Vehicle
         fields = [
             'id', 'make', 'model_name', 'registration_number',
-            'vehicle_type', 'year', 'vehicle_image'
+            'vehicle_type', 'year', 'vehicle_image',
+            'last_service_date', 'next_due_date', 'total_spent', 'open_reminders'
         ]
     
     def get_vehicle_image(self, obj):
@@ -0,0 +1,108 @@
+"""
+Vehicle timeline: maintenance records (live and archived) and open reminders
+of one vehicle as a single stream, newest first, paginated by keyset. Each
+page reads at most ``page_size + 1`` rows from each source, all in the
+timeline's order, and merges them, so a page costs the same three queries
+however long the history.
+"""
+import base64
+import heapq
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from maintenance.models import ArchivedMaintenanceRecord, MaintenanceRecord, Reminder
+from maintenance.projections import MaintenanceRecordListProjection, ReminderListProjection
+
+INVALID_CURSOR = 'Invalid cursor'
+
+
+class Source:
+    """One ordered input of the merge"""
+
+    def __init__(self, kind, rank, date_field, queryset, projection):
+        self.kind = kind
+        # Orders events of different kinds on the same date
+        self.rank = rank
+        self.date_field = date_field
+        self.queryset = queryset
+        self.projection = projection
+
+    def after(self, cursor):
+        """Rows that come after ``cursor`` in the timeline's (date, rank, pk) descending order."""
+        queryset = self.queryset
+        if cursor is not None:
+            cursor_date, cursor_rank, cursor_pk = cursor
+            earlier = Q(**{f"{self.date_field}__lt": cursor_date})
+            if self.rank < cursor_rank:
+                queryset = queryset.filter(earlier | Q(**{self.date_field: cursor_date}))
+            elif self.rank == cursor_rank:
+                queryset = queryset.filter(earlier | Q(**{self.date_field: cursor_date, 'pk__lt': cursor_pk}))
+            else:
+                queryset = queryset.filter(earlier)
+        return queryset.order_by(f"-{self.date_field}", '-pk')
+
+    def keyed(self, rows):
+        for row in rows:
+            yield (self.projection.value(row, self.date_field), self.rank, self.projection.value(row, 'id')), self, row
+
+
+def sources(vehicle, context):
+    return [
+        Source(
+            'service', 0, 'date_performed',
+            MaintenanceRecord.objects.filter(vehicle=vehicle),
+            MaintenanceRecordListProjection(context)
+        ),
+        # Archived records keep their ids, so they interleave with live ones by (date, pk)
+        Source(
+            'service', 0, 'date_performed',
+            ArchivedMaintenanceRecord.objects.filter(vehicle=vehicle),
+            MaintenanceRecordListProjection(context)
+        ),
+        Source(
+            'reminder', 1, 'due_date',
+            Reminder.objects.filter(maintenance_record__vehicle=vehicle, is_completed=False),
+            ReminderListProjection(context)
+        ),
+    ]
+
+
+def encode_cursor(key):
+    event_date, rank, pk = key
+    return base64.urlsafe_b64encode(f"{event_date.isoformat()}.{rank}.{pk}".encode()).decode()
+
+
+def decode_cursor(value):
+    try:
+        event_date, rank, pk = base64.urlsafe_b64decode(value.encode()).decode().split('.')
+        return date.fromisoformat(event_date), int(rank), int(pk)
+    except (ValueError, UnicodeError):
+        raise NotFound(INVALID_CURSOR)
+
+
+def timeline_page(vehicle, context, page_size, cursor=None):
+    """
+    Up to ``page_size`` events after ``cursor``, and the cursor of the next
+    page (``None`` on the last one).
+    """
+    inputs = []
+    for source in sources(vehicle, context):
+        rows = list(source.projection.rows(source.after(cursor))[:page_size + 1])
+        inputs.append(source.keyed(rows))
+    merged = list(heapq.merge(*inputs, key=lambda item: item[0], reverse=True))
+
+    next_cursor = encode_cursor(merged[page_size - 1][0]) if len(merged) > page_size else None
+    merged = merged[:page_size]
+
+    # Project each source's share of the page in one go, then restore the merge order
+    projected = {}
+    for source in {source for _, source, _ in merged}:
+        rows = [row for _, item_source, row in merged if item_source is source]
+        projected[source] = iter(source.projection.project(rows))
+    events = [
+        {'type': source.kind, 'date': key[0].isoformat(), 'data': next(projected[source])}
+        for key, source, _ in merged
+    ]
+    return events, next_cursor
@@ -2,20 +2,28 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from rest_framework.utils.urls import replace_query_param
 
+from common.mixins import ProjectionListMixin, ReplicaReadMixin, ShardRoutingMixin
+from .deletion import request_vehicle_deletion
+from .importing import import_vehicles, parse_rows
 from .models import Vehicle, VehicleImage
+from .projections import VehicleListProjection
+from .timeline import decode_cursor, timeline_page
 from .serializers import (
     VehicleSerializer,
     VehicleListSerializer,
-    VehicleImageSerializer
+    VehicleImageSerializer,
+    VehicleImportSerializer
 )
 from users.models import User
 
 
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(ProjectionListMixin, ShardRoutingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing vehicles.
     """
@@ -27,21 +35,72 @@ class VehicleViewSet(viewsets.ModelViewSet):
     search_fields = ['make', 'model_name', 'registration_number', 'vin_number']
     ordering_fields = ['make', 'model_name', 'year', 'purchase_date']
     ordering = ['-created_at']
+    projection_class = VehicleListProjection
 
     def get_queryset(self):
         """Return only the vehicles owned by the current user."""
-        return Vehicle.objects.filter(user=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation runs without a user
+            return Vehicle.objects.none()
+        return Vehicle.objects.filter(user=self.request.user, pending_delete_at__isnull=True)
 
     def get_serializer_class(self):
         """Use different serializers for list and detail views."""
         if self.action == 'list':
             return VehicleListSerializer
+        if self.action == 'bulk_import':
+            return VehicleImportSerializer
         return VehicleSerializer
 
     def perform_create(self, serializer):
         """Set the current user as the owner of the vehicle."""
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Hide the vehicle at once; its history is deleted in the background."""
+        request_vehicle_deletion(instance)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=[JSONParser, MultiPartParser, FormParser]
+    )
+    def bulk_import(self, request):
+        """
+        Insert or update vehicles matched on registration number, from a CSV or
+        JSON ``file`` or a JSON list; rows with errors are reported and skipped.
+        """
+        return Response(import_vehicles(request.user, parse_rows(request)))
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """
+        Maintenance records and open reminders of the vehicle merged newest
+        first, paginated with an opaque ``cursor`` (``page_size`` optional).
+        """
+        vehicle = self.get_object()
+        page_size = self.timeline_page_size(request)
+        cursor = request.query_params.get('cursor')
+        events, next_cursor = timeline_page(
+            vehicle,
+            self.get_serializer_context(),
+            page_size,
+            decode_cursor(cursor) if cursor else None
+        )
+        next_url = None
+        if next_cursor is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        return Response({'next': next_url, 'results': events})
+
+    @staticmethod
+    def timeline_page_size(request):
+        try:
+            page_size = int(request.query_params.get('page_size', settings.REST_FRAMEWORK['PAGE_SIZE']))
+        except ValueError:
+            page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        return max(1, min(page_size, settings.TIMELINE_MAX_PAGE_SIZE))
+
     @action(detail=True, methods=['post'], url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image for a vehicle."""
@@ -86,7 +145,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
             )
 
 
-class VehicleImageViewSet(viewsets.ModelViewSet):
+class VehicleImageViewSet(ShardRoutingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing vehicle images.
     """
@@ -96,14 +155,20 @@ class VehicleImageViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return only the images for vehicles owned by the current user."""
-        return VehicleImage.objects.filter(vehicle__user=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return VehicleImage.objects.none()
+        return VehicleImage.objects.filter(
+            vehicle__user=self.request.user,
+            vehicle__pending_delete_at__isnull=True
+        )
 
     def get_vehicle(self):
         """Get the vehicle for the current request."""
         return get_object_or_404(
             Vehicle,
             id=self.kwargs['vehicle_pk'],
-            user=self.request.user
+            user=self.request.user,
+            pending_delete_at__isnull=True
         )
 
     def list(self, request, vehicle_pk=None):